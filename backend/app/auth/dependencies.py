@@ -6,6 +6,7 @@ from sqlalchemy.orm import Session
 from app.database.connection import get_db
 from app.database.models import User
 from app.auth.jwt_handler import SECRET_KEY, ALGORITHM
+from app.tracing.tracer import tracer
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
@@ -14,19 +15,22 @@ def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db)
 ):
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email = payload.get("sub")
+    with tracer.span("auth.get_current_user"):
+        try:
+            with tracer.span("auth.jwt_decode"):
+                payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            email = payload.get("sub")
 
-        if email is None:
-            raise HTTPException(status_code=401, detail="Invalid token")
+            if email is None:
+                raise HTTPException(status_code=401, detail="Invalid token")
 
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid token")
+        except JWTError:
+            raise HTTPException(status_code=401, detail="Invalid token")
 
-    user = db.query(User).filter(User.email == email).first()
+        with tracer.span("auth.user_lookup"):
+            user = db.query(User).filter(User.email == email).first()
 
-    if user is None:
-        raise HTTPException(status_code=401, detail="User not found")
+        if user is None:
+            raise HTTPException(status_code=401, detail="User not found")
 
-    return user
+        return user
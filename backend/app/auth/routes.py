@@ -6,6 +6,7 @@ from app.database.models import User
 from app.schemas.user_schema import UserCreate, UserLogin
 from app.auth.password import hash_password, verify_password
 from app.auth.jwt_handler import create_access_token
+from app.ratelimit.dependencies import ip_rate_limit
 
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
@@ -14,7 +15,7 @@ router = APIRouter(prefix="/auth", tags=["Authentication"])
 # ==============================
 # SIGNUP
 # ==============================
-@router.post("/signup")
+@router.post("/signup", dependencies=[Depends(ip_rate_limit("auth"))])
 def signup(user: UserCreate, db: Session = Depends(get_db)):
 
     # check existing user
@@ -42,7 +43,7 @@ def signup(user: UserCreate, db: Session = Depends(get_db)):
 # ==============================
 # LOGIN
 # ==============================
-@router.post("/login")
+@router.post("/login", dependencies=[Depends(ip_rate_limit("auth"))])
 def login(user: UserLogin, db: Session = Depends(get_db)):
 
     db_user = db.query(User).filter(User.email == user.email).first()
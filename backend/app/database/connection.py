@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker, declarative_base
 from dotenv import load_dotenv
 import os
@@ -29,3 +29,9 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def ping_database():
+    """Run a trivial query, which also opens the first pooled connection"""
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
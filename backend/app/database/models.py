@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, Index, UniqueConstraint
 from datetime import datetime
 from app.database.connection import Base
 
@@ -11,3 +11,88 @@ class User(Base):
     email = Column(String, unique=True, nullable=False, index=True)
     password = Column(String, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class ScanReport(Base):
+    """Summary row per stored report, so listings never parse the JSON files"""
+    __tablename__ = "scan_reports"
+
+    id = Column(Integer, primary_key=True, index=True)
+    report_id = Column(String, unique=True, nullable=False, index=True)
+    uploaded_by = Column(String, nullable=False, index=True)
+    filename = Column(String, nullable=False)
+    contract_name = Column(String)
+    uploaded_at = Column(String)
+    security_score = Column(Integer, nullable=False)
+    critical = Column(Integer, default=0)
+    high = Column(Integer, default=0)
+    medium = Column(Integer, default=0)
+    low = Column(Integer, default=0)
+    info = Column(Integer, default=0)
+    total = Column(Integer, default=0)
+    can_deploy = Column(Boolean, nullable=False)
+    risk_level = Column(String)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class ReportFinding(Base):
+    """Fingerprint of each finding in a report, so scans can be diffed with an index join"""
+    __tablename__ = "report_findings"
+    __table_args__ = (Index("ix_report_findings_report_fingerprint", "report_id", "fingerprint"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    report_id = Column(String, nullable=False)
+    fingerprint = Column(String, nullable=False)
+    rule_id = Column(String)
+    issue = Column(String)
+    severity = Column(String)
+    line_numbers = Column(Text)
+
+
+class ReportAnalysis(Base):
+    """
+    Ruleset version that produced each stored report, and when it was last viewed,
+    so the background re-analysis can find stale reports and do the wanted ones first
+    """
+    __tablename__ = "report_analyses"
+
+    id = Column(Integer, primary_key=True, index=True)
+    report_id = Column(String, unique=True, nullable=False, index=True)
+    # NULL for reports written before reports were stamped
+    ruleset_version = Column(Integer, index=True)
+    last_viewed_at = Column(DateTime, index=True)
+    analyzed_at = Column(DateTime)
+    failures = Column(Integer, default=0)
+    last_error = Column(Text)
+
+
+class RollupCounts:
+    """Counters shared by the rollup tables; all of them are sums over the rolled-up reports"""
+    scans = Column(Integer, nullable=False, default=0)
+    score_sum = Column(Integer, nullable=False, default=0)
+    deployable = Column(Integer, nullable=False, default=0)
+    critical = Column(Integer, nullable=False, default=0)
+    high = Column(Integer, nullable=False, default=0)
+    medium = Column(Integer, nullable=False, default=0)
+    low = Column(Integer, nullable=False, default=0)
+    info = Column(Integer, nullable=False, default=0)
+    findings = Column(Integer, nullable=False, default=0)
+
+
+class DailyRollup(RollupCounts, Base):
+    """Scans, scores and findings per severity of one user's reports uploaded on one day"""
+    __tablename__ = "daily_rollups"
+    __table_args__ = (UniqueConstraint("uploaded_by", "day", name="uq_daily_rollups_user_day"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    uploaded_by = Column(String, nullable=False)
+    # YYYY-MM-DD, so ranges compare as strings
+    day = Column(String(10), nullable=False)
+
+
+class UserRollup(RollupCounts, Base):
+    """All-time totals of one user's reports"""
+    __tablename__ = "user_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    uploaded_by = Column(String, unique=True, nullable=False)
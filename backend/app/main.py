@@ -1,12 +1,44 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
 from app.database.connection import engine
 from app.database.models import Base
 from app.auth.routes import router as auth_router
-from app.scanner.routes import router as scanner_router
+from app.scanner.routes import router as scanner_router, shutdown_export_pool
+from app.scanner.warmup import warm_up
+from app.tracing.tracer import tracer
+from app.tracing.logs import get_logger
 
-app = FastAPI()
+logger = get_logger("main")
+
+# Failed warmups are retried in the background, backing off up to the max delay
+WARMUP_RETRY_INITIAL_SECONDS = 1
+WARMUP_RETRY_MAX_SECONDS = 60
+
+async def retry_warmup(app: FastAPI):
+    """Re-run warmup until every step succeeds (e.g. the database was not up yet at startup)"""
+    delay = WARMUP_RETRY_INITIAL_SECONDS
+    while not app.state.warmup["ready"]:
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, WARMUP_RETRY_MAX_SECONDS)
+        app.state.warmup = await run_in_threadpool(warm_up)
+        logger.info("Warmup retried", extra={"fields": app.state.warmup})
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm the worker before it accepts traffic: regexes, PDF styles, DB pool
+    app.state.warmup = await run_in_threadpool(warm_up)
+    logger.info("Warmup finished", extra={"fields": app.state.warmup})
+    retry = asyncio.create_task(retry_warmup(app))
+    yield
+    retry.cancel()
+    await run_in_threadpool(shutdown_export_pool)
+
+app = FastAPI(lifespan=lifespan)
 
 origins = [
     "http://localhost:5173",
@@ -23,6 +55,28 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def add_rate_limit_headers(request: Request, call_next):
+    response = await call_next(request)
+    # Set by the rate limit dependencies on accepted requests
+    headers = getattr(request.state, "rate_limit_headers", None)
+    if headers:
+        response.headers.update(headers)
+    return response
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    # Outermost middleware: every log line and span of the request shares this trace
+    context, token = tracer.start_trace(request.headers.get("traceparent"))
+    try:
+        with tracer.span("http.request", method=request.method, path=request.url.path) as span:
+            response = await call_next(request)
+            span.set_attribute("status_code", response.status_code)
+    finally:
+        tracer.end_trace(token)
+    response.headers["X-Trace-Id"] = context.trace_id
+    return response
+
 Base.metadata.create_all(bind=engine)
 
 app.include_router(auth_router)
@@ -30,4 +84,12 @@ app.include_router(scanner_router)
 
 @app.get("/")
 def root():
-    return {"message": "Smart Contract Auditor API Running"}
\ No newline at end of file
+    return {"message": "Smart Contract Auditor API Running"}
+
+@app.get("/ready")
+async def ready():
+    """Readiness probe: 200 only once warmup has succeeded on this worker (retried in the background)"""
+    warmup = getattr(app.state, "warmup", None)
+    if warmup is None or not warmup["ready"]:
+        return JSONResponse(status_code=503, content={"ready": False, "warmup": warmup})
+    return {"ready": True, "warmup": warmup}
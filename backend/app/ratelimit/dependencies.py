@@ -0,0 +1,43 @@
+from fastapi import Depends, HTTPException, Request
+
+from app.auth.dependencies import get_current_user
+from app.database.models import User
+from app.ratelimit.limiter import rate_limiter, TRUST_PROXY_HEADERS
+
+
+def client_ip(request: Request) -> str:
+    if TRUST_PROXY_HEADERS:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+def _enforce(scope: str, request: Request, user: str = None):
+    decision = rate_limiter.check(scope, client_ip(request), user=user)
+    if decision is None:
+        return
+
+    if not decision.allowed:
+        raise HTTPException(
+            status_code=429,
+            detail=f"Rate limit exceeded, retry in {decision.retry_after}s",
+            headers=decision.headers()
+        )
+
+    # Picked up by the middleware in app.main and added to the response
+    request.state.rate_limit_headers = decision.headers()
+
+
+def rate_limit(scope: str):
+    """Per-user and per-IP limit for authenticated endpoints (analysis, pdf, ...)"""
+    def dependency(request: Request, current_user: User = Depends(get_current_user)):
+        _enforce(scope, request, user=current_user.email)
+    return dependency
+
+
+def ip_rate_limit(scope: str):
+    """Per-IP limit for endpoints called before login (signup, login)"""
+    def dependency(request: Request):
+        _enforce(scope, request)
+    return dependency
@@ -0,0 +1,212 @@
+import os
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# "memory" keeps buckets per worker, "sqlite" shares them between workers on one host
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_SQLITE_PATH = os.getenv("RATE_LIMIT_SQLITE_PATH", os.path.join(BACKEND_DIR, "ratelimit.db"))
+# Only trust X-Forwarded-For when running behind our own proxy
+TRUST_PROXY_HEADERS = os.getenv("TRUST_PROXY_HEADERS", "false").lower() == "true"
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+# A bucket untouched for the longest period is full again, the same as no row at all
+BUCKET_IDLE_SECONDS = max(PERIODS.values())
+# How often each worker deletes idle buckets from the SQLite store
+BUCKET_PRUNE_INTERVAL_SECONDS = 600
+
+# Default rates per scope, overridable with RATE_LIMIT_<SCOPE>_USER / RATE_LIMIT_<SCOPE>_IP
+DEFAULT_RATES = {
+    "analysis": {"user": "10/minute", "ip": "30/minute"},
+    "pdf": {"user": "20/minute", "ip": "60/minute"},
+    "export": {"user": "2/minute", "ip": "6/minute"},
+    "auth": {"user": None, "ip": "10/minute"},
+}
+
+
+@dataclass
+class Rate:
+    """Bucket of `capacity` tokens refilled evenly over `period` seconds"""
+    capacity: int
+    period: int
+
+    @property
+    def refill_per_second(self) -> float:
+        return self.capacity / self.period
+
+    @classmethod
+    def parse(cls, value: Optional[str]) -> Optional["Rate"]:
+        """Parse '10/minute' style rates; empty or 'off' disables the limit"""
+        if not value or value.lower() == "off":
+            return None
+        count, period = value.split("/")
+        return cls(capacity=int(count), period=PERIODS[period.strip().lower()])
+
+
+@dataclass
+class Decision:
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_after: int
+    retry_after: int = 0
+
+    def headers(self) -> Dict[str, str]:
+        """Standard RateLimit-* headers (plus Retry-After on rejection)"""
+        headers = {
+            "RateLimit-Limit": str(self.limit),
+            "RateLimit-Remaining": str(self.remaining),
+            "RateLimit-Reset": str(self.reset_after),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(self.retry_after)
+        return headers
+
+
+def _refill(tokens: float, updated_at: float, now: float, rate: Rate) -> float:
+    return min(rate.capacity, tokens + (now - updated_at) * rate.refill_per_second)
+
+
+def _decide(tokens: float, rate: Rate, allowed: bool) -> Decision:
+    missing = rate.capacity - tokens
+    return Decision(
+        allowed=allowed,
+        limit=rate.capacity,
+        remaining=int(tokens),
+        reset_after=int(missing / rate.refill_per_second + 0.999),
+        retry_after=0 if allowed else int((1 - tokens) / rate.refill_per_second + 0.999),
+    )
+
+
+def _take(levels: List[float], rates: List[Rate], cost: int) -> Tuple[List[float], List[Decision]]:
+    """Take cost from every bucket only if all of them have it, so a rejection costs nothing"""
+    allowed = all(tokens >= cost for tokens in levels)
+    if allowed:
+        levels = [tokens - cost for tokens in levels]
+    # On rejection only the buckets that are short report it
+    return levels, [_decide(tokens, rate, allowed or tokens >= cost) for tokens, rate in zip(levels, rates)]
+
+
+class MemoryBucketStore:
+    """Token buckets in this process; least recently used keys are evicted past max_keys"""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, buckets: List[Tuple[str, Rate]], cost: int = 1) -> List[Decision]:
+        now = time.monotonic()
+        with self._lock:
+            levels = []
+            for key, rate in buckets:
+                tokens, updated_at = self._buckets.pop(key, (rate.capacity, now))
+                levels.append(_refill(tokens, updated_at, now, rate))
+            levels, decisions = _take(levels, [rate for _, rate in buckets], cost)
+            for (key, _), tokens in zip(buckets, levels):
+                self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return decisions
+
+
+class SQLiteBucketStore:
+    """Token buckets in a local SQLite file, shared by every worker process on the host"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._pruned_at = 0.0
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def consume(self, buckets: List[Tuple[str, Rate]], cost: int = 1) -> List[Decision]:
+        # Wall clock, since monotonic clocks are not comparable across processes
+        now = time.time()
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            levels = []
+            for key, rate in buckets:
+                row = conn.execute("SELECT tokens, updated_at FROM buckets WHERE key = ?", (key,)).fetchone()
+                levels.append(_refill(row[0], row[1], now, rate) if row else rate.capacity)
+            levels, decisions = _take(levels, [rate for _, rate in buckets], cost)
+            conn.executemany(
+                "INSERT OR REPLACE INTO buckets (key, tokens, updated_at) VALUES (?, ?, ?)",
+                [(key, tokens, now) for (key, _), tokens in zip(buckets, levels)],
+            )
+            if now - self._pruned_at > BUCKET_PRUNE_INTERVAL_SECONDS:
+                self._pruned_at = now
+                conn.execute("DELETE FROM buckets WHERE updated_at < ?", (now - BUCKET_IDLE_SECONDS,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return decisions
+
+
+class RateLimiter:
+    """Per-user and per-IP token buckets, configured separately for each scope"""
+
+    def __init__(self, store, rates: Dict[str, Dict[str, Optional[Rate]]]):
+        self.store = store
+        self.rates = rates
+
+    @classmethod
+    def from_env(cls) -> "RateLimiter":
+        rates = {}
+        for scope, defaults in DEFAULT_RATES.items():
+            rates[scope] = {
+                kind: Rate.parse(os.getenv(f"RATE_LIMIT_{scope.upper()}_{kind.upper()}", default))
+                for kind, default in defaults.items()
+            }
+        if RATE_LIMIT_BACKEND == "sqlite":
+            store = SQLiteBucketStore(RATE_LIMIT_SQLITE_PATH)
+        else:
+            store = MemoryBucketStore()
+        return cls(store, rates)
+
+    def check(self, scope: str, ip: str, user: Optional[str] = None, cost: int = 1) -> Optional[Decision]:
+        """
+        Take `cost` tokens from every bucket that applies, or from none of them if any
+        bucket is short. Returns the most restrictive decision (None if no limit is configured).
+        """
+        buckets = []
+        user_rate = self.rates[scope].get("user")
+        if user and user_rate:
+            buckets.append((f"{scope}:user:{user}", user_rate))
+        ip_rate = self.rates[scope].get("ip")
+        if ip_rate:
+            buckets.append((f"{scope}:ip:{ip}", ip_rate))
+
+        if not buckets:
+            return None
+        decisions = self.store.consume(buckets, cost)
+        rejected = [d for d in decisions if not d.allowed]
+        if rejected:
+            return max(rejected, key=lambda d: d.retry_after)
+        return min(decisions, key=lambda d: d.remaining)
+
+
+rate_limiter = RateLimiter.from_env()
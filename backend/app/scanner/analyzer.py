@@ -1,71 +1,303 @@
 # D:\My_Work\smartShiledAI\backend\app\scanner\analyzer.py
+import os
 import re
-from typing import List, Dict, Any, Set, Tuple
-from dataclasses import dataclass
-from enum import Enum
-
-class RiskLevel(Enum):
-    CRITICAL = "🔴 CRITICAL"
-    HIGH = "🟠 HIGH"
-    MEDIUM = "🟡 MEDIUM"
-    LOW = "🔵 LOW"
-    INFO = "⚪ INFO"
-    SAFE = "🟢 SAFE"
-
-@dataclass
+import sys
+import time
+from typing import List, Dict, Any, Set, Tuple, Optional, Iterator
+from app.scanner.rules import RiskLevel, RULES
+from app.scanner.imports import Project, ImportScope
+from app.scanner.source import InMemorySource, MappedSource
+from app.scanner.symbols import SymbolTable
+from app.scanner.function_memo import FunctionMemo, function_memo
+from app.scanner.prefilter import LiteralPrefilter
+from app.scanner.features import LineFeature, LineFeatures
+from app.scanner.memory import MemoryProbe
+from app.scanner.fingerprint import finding_fingerprint, number_fingerprint
+from app.scanner.scoring import ScoringPolicy, scoring_policy
+from app.scanner.patterns import pattern_cache, alternation
+from app.tracing.tracer import tracer
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Longer lines (minified or crafted input) are cut before any rule sees them
+MAX_LINE_LENGTH = int(os.getenv("ANALYSIS_MAX_LINE_LENGTH", "2000"))
+# CPU seconds one rule may spend on a file before it is stopped (0 = no limit)
+RULE_BUDGET_SECONDS = float(os.getenv("ANALYSIS_RULE_BUDGET_SECONDS", "10"))
+# Contracts above this size are analyzed memory-mapped, with a capped memory budget
+BOUNDED_ANALYSIS_THRESHOLD = int(os.getenv("BOUNDED_ANALYSIS_THRESHOLD_BYTES", 5 * 1024 * 1024))
+ANALYSIS_MEMORY_LIMIT = int(os.getenv("ANALYSIS_MEMORY_LIMIT_BYTES", 256 * 1024 * 1024))
+
 class Vulnerability:
-    issue: str
-    severity: RiskLevel
-    description: str
-    fix: str
-    line_numbers: List[int]
-    code_snippet: str
-    cwe_reference: str = ""
-    impact: str = ""
-    likelihood: str = ""
+    """
+    One finding, kept small: fix/CWE/impact/likelihood text lives once in RULES and
+    is only expanded by to_dict(). Per-finding overrides are stored for the few
+    checks whose text depends on the contract.
+    """
+    __slots__ = ("rule_id", "issue", "severity", "description", "line_numbers", "snippet_lines", "overrides")
+
+    def __init__(
+        self,
+        rule_id: str,
+        issue: str,
+        severity: RiskLevel,
+        description: str,
+        line_numbers: List[int],
+        snippet_lines: List[int],
+        **overrides: str
+    ):
+        self.rule_id = sys.intern(rule_id)
+        # Titles repeat across findings and reports, so share one string object
+        self.issue = sys.intern(issue)
+        self.severity = severity
+        self.description = description
+        self.line_numbers = tuple(line_numbers)
+        # Lines highlighted in the code snippet; the snippet itself is only rendered on demand
+        self.snippet_lines = tuple(snippet_lines)
+        self.overrides = overrides or None
+
+    def _text(self, name: str) -> str:
+        if self.overrides and name in self.overrides:
+            return self.overrides[name]
+        return getattr(RULES[self.rule_id], name)
+
+    @property
+    def fix(self) -> str:
+        return self._text("fix")
+
+    @property
+    def cwe_reference(self) -> str:
+        return self._text("cwe_reference")
+
+    @property
+    def impact(self) -> str:
+        return self._text("impact")
+
+    @property
+    def likelihood(self) -> str:
+        return self._text("likelihood")
+
+    def to_dict(self, lines) -> Dict[str, Any]:
+        """
+        Full JSON form of the finding, as stored in reports and returned by the API.
+        Compared with the original format it adds rule_id and fingerprint.
+        """
+        return {
+            "rule_id": self.rule_id,
+            "fingerprint": finding_fingerprint(self.rule_id, self.line_numbers, lines, self.fix),
+            "issue": self.issue,
+            "severity": self.severity.value,
+            "description": self.description,
+            "fix": self.fix,
+            "line_numbers": list(self.line_numbers),
+            "snippet_lines": list(self.snippet_lines),
+            "cwe_reference": self.cwe_reference,
+            "impact": self.impact,
+            "likelihood": self.likelihood
+        }
+
+# Admin functions that should have access control
+ADMIN_FUNCTIONS = ['transferOwnership', 'mint', 'destroy', 'pause', 'unpause', 'kill', 'emergency']
+# One pass over the candidate lines finds every admin function declaration
+ADMIN_FUNCTION_PATTERN = alternation(ADMIN_FUNCTIONS, r'function\s+', r'\s*\(')
+
+# Literals a rule's patterns cannot match without. A rule whose literals are all
+# absent is skipped; otherwise it only runs its regexes on the candidate lines.
+RULE_LITERALS = {
+    "check_reentrancy": (".call", ".send", ".transfer"),
+    "check_unchecked_external_calls": (".call", ".delegatecall", ".send"),
+    "check_selfdestruct": ("selfdestruct", "suicide"),
+    "check_access_control": tuple(ADMIN_FUNCTIONS),
+    "check_integer_overflow": ("+", "-", "*=", "/="),
+    "check_tx_origin": ("tx.origin",),
+    "check_gas_limit_issues": (".send", ".transfer"),
+    "check_timestamp_dependency": ("block.timestamp", "now"),
+    "check_floating_pragma": ("pragma",),
+}
+
+# Per-line features the window-based rules ask about, each with the literals it needs
+LINE_FEATURES = {
+    "state_write": (r'(balances\[|\.\w+\s*=|\+=|-=|\*=|/=)', ("balances[", "=")),
+    "success_check": (r'require\s*\(\s*success', ("success",)),
+    "caller_check": (r'onlyOwner|require\s*\(\s*msg\.sender\s*==|if\s*\(\s*msg\.sender\s*==', ("onlyOwner", "msg.sender")),
+    "sender_require": (r'require\s*\(\s*msg\.sender\s*==', ("msg.sender",)),
+    "function_decl": (r'function\s+\w+\s*\(', ("function",)),
+}
+# A state write that is itself a check (require/revert/return) does not count as a state change
+STATE_CHECK_PATTERN = r'require\(|if.*revert|return'
+
+def decode_source(data: bytes) -> str:
+    """Decode an uploaded contract like text-mode open() did (universal newlines)"""
+    return data.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+
+def render_code_snippet(lines, line_numbers: List[int], context: int = 2) -> str:
+    """Render the code around line_numbers (marked with >>) from any sequence of lines"""
+    if not line_numbers:
+        return ""
+    
+    start_line = max(1, min(line_numbers) - context)
+    end_line = min(len(lines), max(line_numbers) + context)
+    
+    highlighted = set(line_numbers)
+    snippet = []
+    for i in range(start_line - 1, end_line):
+        line_num = i + 1
+        prefix = ">> " if line_num in highlighted else "   "
+        snippet.append(f"{prefix}{line_num}: {lines[i]}")
+    
+    return '\n'.join(snippet)
+
+def attach_code_snippets(vulnerabilities: List[Dict[str, Any]], lines) -> List[Dict[str, Any]]:
+    """Fill in code_snippet for serialized findings that only carry snippet_lines"""
+    for vuln in vulnerabilities:
+        if "code_snippet" not in vuln:
+            vuln["code_snippet"] = render_code_snippet(lines, vuln.get("snippet_lines", []))
+    return vulnerabilities
+
+class RuleTimeout(Exception):
+    """Raised inside a rule that has used up its CPU budget"""
+
 
 class SmartContractAnalyzer:
-    def __init__(self, code: str):
-        self.code = code
-        self.lines = code.split('\n')
+    def __init__(
+        self,
+        code: Optional[str] = None,
+        scope: Optional[ImportScope] = None,
+        source=None,
+        memory_limit_bytes: Optional[int] = None,
+        rule_budget_seconds: Optional[float] = RULE_BUDGET_SECONDS,
+        policy: Optional[ScoringPolicy] = None,
+        memo: Optional[FunctionMemo] = function_memo
+    ):
+        # Source is either the code in memory or a MappedSource (bounded-memory mode)
+        self.source = source if source is not None else InMemorySource(code, max_line_length=MAX_LINE_LENGTH)
+        self.code = self.source.code
+        self.lines = self.source
+        self.bounded = isinstance(self.source, MappedSource)
+        self.memory_limit_bytes = memory_limit_bytes
+        self.rule_budget_seconds = rule_budget_seconds or None
+        self.memo = memo
+        self._rule_deadline = None
+        self._ticks = 0
+        self._timed_out_checks = []
         self.vulnerabilities = []
-        self.security_score = 100
+        # Checks only report findings; the policy turns them into a score and readiness
+        self.policy = policy or scoring_policy
+        self.security_score = self.policy.base_score
         self.contract_name = self._extract_contract_name()
         self.pragma_version = self._extract_pragma()
-        
+        # Imports / inheritance visible to this file (single-file project if not given)
+        self.scope = scope or self._default_scope()
+        self.guard_modifier_pattern = self._build_guard_modifier_pattern()
+        self._symbols = None
+        self._prefilter = None
+        self._features = None
+        self._function_ends: Dict[int, int] = {}
+
+    @classmethod
+    def from_file(cls, path: str, scope: Optional[ImportScope] = None, memory_limit_bytes: Optional[int] = None):
+        """Bounded-memory analyzer over a memory-mapped file (for huge or generated contracts)"""
+        return cls(
+            source=MappedSource(path, max_line_length=MAX_LINE_LENGTH),
+            scope=scope,
+            memory_limit_bytes=memory_limit_bytes
+        )
+
+    def _default_scope(self) -> ImportScope:
+        if not self.bounded:
+            return Project({"contract.sol": self.code}).scope_for("contract.sol")
+        # Indexing imports needs the full text, so huge files only get local SafeMath detection
+        return ImportScope(
+            path="contract.sol",
+            uses_safemath=bool(self.source.search(r'import.*SafeMath|using.*SafeMath'))
+        )
+
     def _extract_contract_name(self) -> str:
         """Extract contract name from code"""
-        match = re.search(r'contract\s+(\w+)', self.code)
-        return match.group(1) if match else "Unknown Contract"
+        match = self.source.search(r'contract\s+(\w+)')
+        return match if match else "Unknown Contract"
     
     def _extract_pragma(self) -> str:
         """Extract Solidity version pragma"""
-        match = re.search(r'pragma\s+solidity\s+([^;]+)', self.code)
-        return match.group(1) if match else "Not specified"
+        match = self.source.search(r'pragma\s+solidity\s+([^;]+)')
+        return match if match else "Not specified"
+
+    @property
+    def symbols(self) -> SymbolTable:
+        """Declarations, reads and writes of every variable (built once, on first use)"""
+        if self._symbols is None:
+            # Bounded mode never materializes the lines, so it skips the function memo
+            self._symbols = SymbolTable.build(self.lines, memo=None if self.bounded else self.memo)
+        return self._symbols
     
-    def _find_lines(self, pattern: str) -> List[int]:
-        """Find line numbers matching a pattern"""
+    def _build_guard_modifier_pattern(self) -> Optional[str]:
+        """Pattern for caller-checking modifiers declared here or in inherited contracts"""
+        names = sorted(self.scope.guard_modifiers)
+        if not names:
+            return None
+        return alternation(names, r'\b', r'\b')
+
+    def _has_guard_modifier(self, line: str) -> bool:
+        """Check if a line applies a caller-checking modifier (e.g. inherited onlyOwner)"""
+        return bool(self.guard_modifier_pattern and pattern_cache.search(self.guard_modifier_pattern, line))
+
+    def _checkpoint(self):
+        """
+        Stop the running rule once it has spent its CPU budget. Called from rule loops;
+        the clock is only read every 256 calls, so a call costs next to nothing.
+        """
+        self._ticks += 1
+        if self._ticks & 255 or self._rule_deadline is None:
+            return
+        if time.thread_time() > self._rule_deadline:
+            raise RuleTimeout()
+
+    @property
+    def prefilter(self) -> LiteralPrefilter:
+        """Line index of every rule literal, built in one step on first use"""
+        if self._prefilter is None:
+            literals = {literal for group in RULE_LITERALS.values() for literal in group}
+            self._prefilter = LiteralPrefilter(self.source, literals)
+        return self._prefilter
+
+    @property
+    def features(self) -> LineFeatures:
+        """Per-line features (see LINE_FEATURES), each computed once on first use"""
+        if self._features is None:
+            self._features = LineFeatures(self.source, LINE_FEATURES)
+        return self._features
+
+    def _state_changes(self) -> LineFeature:
+        """State writes that are not themselves checks (require/revert/return)"""
+        if "state_change" not in self.features:
+            check = pattern_cache.compile(STATE_CHECK_PATTERN)
+            writes = self.features["state_write"].lines
+            self.features.define("state_change", [n for n in writes if not check.search(self.lines[n-1])])
+        return self.features["state_change"]
+
+    def _caller_guards(self) -> LineFeature:
+        """Lines checking the caller: guard modifiers (inherited too) or msg.sender checks"""
+        if "caller_guard" not in self.features:
+            lines = set(self.features["caller_check"].lines)
+            if self.guard_modifier_pattern:
+                lines.update(self.features.matching(self.guard_modifier_pattern, self.scope.guard_modifiers))
+            self.features.define("caller_guard", sorted(lines))
+        return self.features["caller_guard"]
+
+    def _find_lines(self, pattern: str, literals: Tuple[str, ...] = ()) -> List[int]:
+        """Find line numbers matching a pattern (only on lines holding one of literals, if given)"""
+        if literals:
+            candidates = self.prefilter.lines_for(literals)
+        else:
+            candidates = range(1, len(self.lines) + 1)
+        compiled = pattern_cache.compile(pattern)
         lines = []
-        for i, line in enumerate(self.lines, 1):
-            if re.search(pattern, line):
+        for i in candidates:
+            self._checkpoint()
+            if compiled.search(self.lines[i-1]):
                 lines.append(i)
         return lines
-    
-    def _get_code_snippet(self, line_numbers: List[int], context: int = 2) -> str:
-        """Get code snippet around vulnerable lines"""
-        if not line_numbers:
-            return ""
-        
-        start_line = max(1, min(line_numbers) - context)
-        end_line = min(len(self.lines), max(line_numbers) + context)
-        
-        snippet = []
-        for i in range(start_line - 1, end_line):
-            line_num = i + 1
-            prefix = ">> " if line_num in line_numbers else "   "
-            snippet.append(f"{prefix}{line_num}: {self.lines[i]}")
-        
-        return '\n'.join(snippet)
 
     # ==================== CRITICAL VULNERABILITIES (🔴) ====================
     
@@ -73,62 +305,56 @@ class SmartContractAnalyzer:
         """Check for reentrancy vulnerabilities - FIXED"""
         # Find external calls
         call_patterns = [
-            (r'\.call\s*\{[^\}]*\}\s*\([^\)]*\)', "call()"),
-            (r'\.send\s*\([^\)]*\)', "send()"),
-            (r'\.transfer\s*\([^\)]*\)', "transfer()")
+            (r'\.call\s*\{[^\}]*\}\s*\([^\)]*\)', "call()", ".call"),
+            (r'\.send\s*\([^\)]*\)', "send()", ".send"),
+            (r'\.transfer\s*\([^\)]*\)', "transfer()", ".transfer")
         ]
         
-        for pattern, call_type in call_patterns:
-            call_lines = self._find_lines(pattern)
+        for pattern, call_type, literal in call_patterns:
+            call_lines = self._find_lines(pattern, (literal,))
+            if not call_lines:
+                continue
+            state_writes = self.features["state_write"]
+            state_changes = self._state_changes()
             
             for call_line in call_lines:
+                self._checkpoint()
                 # Find the function containing this call
                 function_start = self._find_function_start(call_line)
                 function_end = self._find_function_end(function_start)
                 
-                # Look for state changes AFTER the call
-                state_change_after = False
-                state_change_lines = []
-                
-                for i in range(call_line + 1, min(function_end, call_line + 15)):
-                    if re.search(r'(balances\[|\.\w+\s*=|\+=|-=|\*=|/=)', self.lines[i-1]):
-                        if not re.search(r'require\(|if.*revert|return', self.lines[i-1]):  # Ignore checks
-                            state_change_after = True
-                            state_change_lines.append(i)
+                # Look for state changes AFTER the call (checks are ignored)
+                state_change_lines = state_changes.between(call_line + 1, min(function_end, call_line + 15))
+                state_change_after = bool(state_change_lines)
                 
                 # Look for state changes BEFORE the call (this is safe)
-                state_change_before = False
-                for i in range(max(function_start, call_line - 10), call_line):
-                    if re.search(r'(balances\[|\.\w+\s*=|\+=|-=|\*=|/=)', self.lines[i-1]):
-                        state_change_before = True
+                state_change_before = state_writes.any(max(function_start, call_line - 10), call_line)
                 
                 # If state changes AFTER call and NOT before, it's reentrancy vulnerable
                 if state_change_after and not state_change_before:
                     self.vulnerabilities.append(Vulnerability(
+                        rule_id="reentrancy",
                         issue="Critical Reentrancy Vulnerability",
                         severity=RiskLevel.CRITICAL,
                         description=f"External {call_type} before state update. Contract makes an external call and then modifies state, allowing reentrancy attacks.",
-                        fix="1. Use Checks-Effects-Interactions pattern\n2. Use OpenZeppelin's ReentrancyGuard\n3. Move all state changes before external calls",
                         line_numbers=[call_line] + state_change_lines,
-                        code_snippet=self._get_code_snippet([call_line] + state_change_lines[:2]),
-                        cwe_reference="CWE-841",
-                        impact="Attackers can drain contract funds",
-                        likelihood="High"
+                        snippet_lines=[call_line] + state_change_lines[:2]
                     ))
-                    self.security_score -= 30
                     break  # Found reentrancy, move to next call
 
     def check_unchecked_external_calls(self):
         """Check for unchecked external calls - FIXED"""
         patterns = [
-            (r'\.call\s*\([^\)]*\)(?!\s*\.\s*success)', "call()"),
-            (r'\.delegatecall\s*\([^\)]*\)(?!\s*\.\s*success)', "delegatecall()"),
-            (r'\.send\s*\([^\)]*\)(?!\s*\.\s*success)', "send()")
+            (r'\.call\s*\([^\)]*\)(?!\s*\.\s*success)', "call()", ".call"),
+            (r'\.delegatecall\s*\([^\)]*\)(?!\s*\.\s*success)', "delegatecall()", ".delegatecall"),
+            (r'\.send\s*\([^\)]*\)(?!\s*\.\s*success)', "send()", ".send")
         ]
         
-        for pattern, call_type in patterns:
-            lines = self._find_lines(pattern)
+        for pattern, call_type, literal in patterns:
+            lines = self._find_lines(pattern, (literal,))
+            success_checks = self.features["success_check"] if lines else None
             for line_num in lines:
+                self._checkpoint()
                 # Check if this line is part of a require statement or has success check
                 line = self.lines[line_num-1]
                 
@@ -141,277 +367,203 @@ class SmartContractAnalyzer:
                 
                 # Check next 3 lines for require(success)
                 if not is_checked:
-                    for i in range(line_num, min(line_num + 4, len(self.lines))):
-                        if re.search(r'require\s*\(\s*success', self.lines[i-1]):
-                            is_checked = True
-                            break
+                    is_checked = success_checks.any(line_num, min(line_num + 4, len(self.lines)))
                 
                 if not is_checked:
                     self.vulnerabilities.append(Vulnerability(
+                        rule_id="unchecked-external-call",
                         issue=f"Unchecked External {call_type}",
                         severity=RiskLevel.CRITICAL,
                         description=f"Unchecked {call_type} without checking return value. The call might fail silently.",
-                        fix="Always check return value: require(success) or if(!success) revert()",
                         line_numbers=[line_num],
-                        code_snippet=self._get_code_snippet([line_num]),
-                        cwe_reference="CWE-252",
-                        impact="Function may continue execution after failed call",
-                        likelihood="Medium"
+                        snippet_lines=[line_num]
                     ))
-                    self.security_score -= 25
 
     def check_selfdestruct(self):
         """Check for selfdestruct usage - FIXED"""
-        lines = self._find_lines(r'selfdestruct|suicide')
+        lines = self._find_lines(r'selfdestruct|suicide', RULE_LITERALS["check_selfdestruct"])
         if lines:
             # Check if there's access control
-            has_access_control = False
-            for line_num in lines:
-                # Look for onlyOwner or require statements before selfdestruct
-                for i in range(max(1, line_num-10), line_num):
-                    line = self.lines[i-1]
-                    if re.search(r'onlyOwner|require\s*\(\s*msg\.sender\s*==|if\s*\(\s*msg\.sender\s*==', line):
-                        has_access_control = True
-                        break
+            # Look for onlyOwner or require statements before selfdestruct
+            caller_guards = self._caller_guards()
+            has_access_control = any(caller_guards.any(max(1, line_num - 10), line_num) for line_num in lines)
             
             severity = RiskLevel.HIGH if not has_access_control else RiskLevel.MEDIUM
-            score_impact = 20 if not has_access_control else 10
             
             self.vulnerabilities.append(Vulnerability(
+                rule_id="selfdestruct",
                 issue="Selfdestruct Usage",
                 severity=severity,
                 description="Contract contains selfdestruct. This allows contract self-destruction.",
-                fix="1. Implement proper access control\n2. Consider if selfdestruct is necessary\n3. Use multisig for destruction",
                 line_numbers=lines,
-                code_snippet=self._get_code_snippet(lines),
-                cwe_reference="CWE-284",
-                impact="Contract can be destroyed, funds locked",
+                snippet_lines=lines,
                 likelihood="Low" if has_access_control else "Medium"
             ))
-            self.security_score -= score_impact
 
     # ==================== HIGH VULNERABILITIES (🟠) ====================
 
     def check_access_control(self):
         """Check for access control issues - FIXED (no false positives on withdraw)"""
-        # Critical functions that should have access control
-        admin_functions = ['transferOwnership', 'mint', 'destroy', 'pause', 'unpause', 'kill', 'emergency']
-        
-        for func in admin_functions:
-            pattern = rf'function\s+{func}\s*\('
-            lines = self._find_lines(pattern)
-            for line_num in lines:
-                # Check if function has any modifier
-                has_modifier = False
-                line = self.lines[line_num-1]
-                if re.search(r'onlyOwner|onlyAdmin|auth', line):
-                    has_modifier = True
+        # Critical functions that should have access control, found in a single pass
+        admin_pattern = pattern_cache.compile(ADMIN_FUNCTION_PATTERN)
+        declarations = []
+        for line_num in self.prefilter.lines_for(ADMIN_FUNCTIONS):
+            for match in admin_pattern.finditer(self.lines[line_num-1]):
+                declarations.append((ADMIN_FUNCTIONS.index(match.group(1)), line_num, match.group(1)))
+        
+        # Report in ADMIN_FUNCTIONS order, as the per-function scan did
+        for _, line_num, func in sorted(declarations):
+            self._checkpoint()
+            # Check if function has any modifier
+            has_modifier = False
+            line = self.lines[line_num-1]
+            if pattern_cache.search(r'onlyOwner|onlyAdmin|auth', line) or self._has_guard_modifier(line):
+                has_modifier = True
+            
+            if not has_modifier:
+                # Check for require statements inside function
+                func_body_start = line_num
+                func_body_end = self._find_function_end(func_body_start)
+                has_require = self.features["sender_require"].any(func_body_start, min(func_body_end, func_body_start + 20))
                 
-                if not has_modifier:
-                    # Check for require statements inside function
-                    func_body_start = line_num
-                    func_body_end = self._find_function_end(func_body_start)
-                    has_require = False
-                    
-                    for i in range(func_body_start, min(func_body_end, func_body_start + 20)):
-                        if re.search(r'require\s*\(\s*msg\.sender\s*==', self.lines[i-1]):
-                            has_require = True
-                            break
-                    
-                    if not has_require:
-                        self.vulnerabilities.append(Vulnerability(
-                            issue=f"Missing Access Control on {func}()",
-                            severity=RiskLevel.HIGH,
-                            description=f"Admin function '{func}' lacks access control. Anyone can call it.",
-                            fix="Add onlyOwner modifier or implement proper authorization checks",
-                            line_numbers=[line_num],
-                            code_snippet=self._get_code_snippet([line_num]),
-                            cwe_reference="CWE-284",
-                            impact="Unauthorized users can access critical functions",
-                            likelihood="High"
-                        ))
-                        self.security_score -= 20
+                if not has_require:
+                    self.vulnerabilities.append(Vulnerability(
+                        rule_id="missing-access-control",
+                        issue=f"Missing Access Control on {func}()",
+                        severity=RiskLevel.HIGH,
+                        description=f"Admin function '{func}' lacks access control. Anyone can call it.",
+                        line_numbers=[line_num],
+                        snippet_lines=[line_num]
+                    ))
 
     def check_integer_overflow(self):
         """Check for integer overflow/underflow in older versions - FIXED"""
         if any(v in self.pragma_version for v in ['0.4', '0.5', '0.6', '0.7']):
-            arithmetic_ops = self._find_lines(r'[^=]\+[^=]|[^=]-[^=]|\+=|-=|\*=|/=')
+            arithmetic_ops = self._find_lines(r'[^=]\+[^=]|[^=]-[^=]|\+=|-=|\*=|/=', RULE_LITERALS["check_integer_overflow"])
             # Filter out comments and strings
             valid_ops = []
             for line_num in arithmetic_ops:
+                self._checkpoint()
                 line = self.lines[line_num-1]
-                if not re.search(r'//.*|\".*\"', line):
+                if not pattern_cache.search(r'//.*|\".*\"', line):
                     valid_ops.append(line_num)
             
             if valid_ops:
-                # Check if SafeMath is imported or used
-                has_safemath = bool(re.search(r'import.*SafeMath|using.*SafeMath', self.code))
+                # Check if SafeMath is imported or used, here or in an inherited contract
+                has_safemath = self.scope.uses_safemath
                 
                 if not has_safemath:
                     self.vulnerabilities.append(Vulnerability(
+                        rule_id="integer-overflow",
                         issue="Integer Overflow/Underflow Risk",
                         severity=RiskLevel.HIGH,
                         description=f"Using Solidity {self.pragma_version} without SafeMath. Arithmetic operations may overflow/underflow.",
-                        fix="1. Upgrade to Solidity >=0.8.0\n2. Use SafeMath library\n3. Use unchecked blocks only when safe",
                         line_numbers=valid_ops[:5],
-                        code_snippet=self._get_code_snippet(valid_ops[:3]),
-                        cwe_reference="CWE-190",
-                        impact="Unexpected values, potential exploitation",
-                        likelihood="Medium"
+                        snippet_lines=valid_ops[:3]
                     ))
-                    self.security_score -= 15
 
     # ==================== MEDIUM VULNERABILITIES (🟡) ====================
 
     def check_tx_origin(self):
         """Check for tx.origin usage"""
-        lines = self._find_lines(r'tx\.origin')
+        lines = self._find_lines(r'tx\.origin', RULE_LITERALS["check_tx_origin"])
         if lines:
             self.vulnerabilities.append(Vulnerability(
+                rule_id="tx-origin",
                 issue="TX.Origin Authentication",
                 severity=RiskLevel.MEDIUM,
                 description="Using tx.origin for authentication makes the contract vulnerable to phishing attacks.",
-                fix="Use msg.sender instead of tx.origin for authentication",
                 line_numbers=lines,
-                code_snippet=self._get_code_snippet(lines),
-                cwe_reference="CWE-477",
-                impact="Users may be tricked into authorizing malicious contracts",
-                likelihood="Medium"
+                snippet_lines=lines
             ))
-            self.security_score -= 10
 
     def check_gas_limit_issues(self):
         """Check for gas limit related issues - FIXED"""
         patterns = [
-            (r'\.send\s*\(', "send() (2300 gas limit)"),
-            (r'\.transfer\s*\(', "transfer() (2300 gas limit)")
+            (r'\.send\s*\(', "send() (2300 gas limit)", ".send"),
+            (r'\.transfer\s*\(', "transfer() (2300 gas limit)", ".transfer")
         ]
         
-        for pattern, desc in patterns:
-            lines = self._find_lines(pattern)
+        for pattern, desc, literal in patterns:
+            lines = self._find_lines(pattern, (literal,))
             if lines:
                 self.vulnerabilities.append(Vulnerability(
+                    rule_id="gas-limit",
                     issue="Gas Limit Vulnerability",
                     severity=RiskLevel.MEDIUM,
                     description=f"{desc} may fail if gas costs increase. Use call() instead.",
-                    fix="Use call() with appropriate gas amount: (bool success, ) = to.call{value: amount}(\"\")",
                     line_numbers=lines,
-                    code_snippet=self._get_code_snippet(lines),
-                    cwe_reference="CWE-682",
-                    impact="Functions may become unusable",
-                    likelihood="Low"
+                    snippet_lines=lines
                 ))
-                self.security_score -= 5
 
     def check_timestamp_dependency(self):
         """Check for block.timestamp/now usage - FIXED (less aggressive)"""
-        lines = self._find_lines(r'block\.timestamp|now\b')
+        lines = self._find_lines(r'block\.timestamp|now\b', RULE_LITERALS["check_timestamp_dependency"])
         if lines:
             # Check if it's used for critical logic (randomness, lottery, etc.)
             critical_timestamp_usage = []
             for line_num in lines:
+                self._checkpoint()
                 line = self.lines[line_num-1]
-                if re.search(r'random|lottery|winner|seed', line, re.IGNORECASE):
+                if pattern_cache.search(r'random|lottery|winner|seed', line, re.IGNORECASE):
                     critical_timestamp_usage.append(line_num)
             
             if critical_timestamp_usage:
                 self.vulnerabilities.append(Vulnerability(
+                    rule_id="timestamp-dependency",
                     issue="Timestamp Dependency for Critical Logic",
                     severity=RiskLevel.MEDIUM,
                     description="Using block.timestamp for randomness/lottery is unsafe as miners can manipulate it.",
-                    fix="Use Chainlink VRF or commit-reveal scheme for randomness",
                     line_numbers=critical_timestamp_usage,
-                    code_snippet=self._get_code_snippet(critical_timestamp_usage),
-                    cwe_reference="CWE-682",
-                    impact="Miners can influence outcomes",
-                    likelihood="Medium"
+                    snippet_lines=critical_timestamp_usage
                 ))
-                self.security_score -= 8
 
     # ==================== LOW VULNERABILITIES (🔵) ====================
 
     def check_floating_pragma(self):
         """Check for floating pragma"""
-        if re.search(r'pragma\s+solidity\s+\^', self.code):
+        if self.source.search(r'pragma\s+solidity\s+\^'):
             self.vulnerabilities.append(Vulnerability(
+                rule_id="floating-pragma",
                 issue="Floating Pragma",
                 severity=RiskLevel.LOW,
                 description=f"Floating pragma ^ used: {self.pragma_version}. Contracts should be deployed with exact compiler version.",
-                fix="Use exact pragma version: pragma solidity X.Y.Z",
-                line_numbers=self._find_lines(r'pragma\s+solidity\s+\^'),
-                code_snippet=self._get_code_snippet(self._find_lines(r'pragma\s+solidity\s+\^')),
-                cwe_reference="CWE-1103",
-                impact="Unexpected behavior with different compiler versions",
-                likelihood="Low"
+                line_numbers=self._find_lines(r'pragma\s+solidity\s+\^', ("pragma",)),
+                snippet_lines=self._find_lines(r'pragma\s+solidity\s+\^', ("pragma",))
             ))
-            self.security_score -= 2
 
     def check_unused_variables(self):
-        """Check for unused variables - COMPLETELY REWRITTEN to be accurate"""
-        # This is a simplified version - a real implementation would need AST parsing
-        # For now, we'll only flag obvious unused state variables
-        
-        # Find state variable declarations
-        state_var_pattern = r'(public|private|internal)?\s*(uint|int|address|bool|string|mapping|bytes\d*)\s+(public|private|internal)?\s+(\w+)'
-        declared_vars = {}
-        used_vars = set()
-        
-        # Find all state variable declarations
-        for i, line in enumerate(self.lines, 1):
-            # Skip function bodies for declaration detection
-            if re.search(r'function\s+\w+\s*\(', line):
-                continue
-                
-            match = re.search(r'(uint|int|address|bool|string|mapping|bytes\d*)\s+(public|private|internal)?\s*(\w+)', line)
-            if match and 'function' not in line and 'event' not in line:
-                var_type = match.group(1)
-                var_name = match.group(3)
-                if var_name and len(var_name) > 1:  # Avoid single letters
-                    declared_vars[var_name] = i
-        
-        # Find usage
-        for i, line in enumerate(self.lines, 1):
-            for var_name in declared_vars.keys():
-                if var_name in line and not re.search(rf'{var_name}\s*=.*{var_name}', line):
-                    used_vars.add(var_name)
-        
-        # Find unused variables
+        """Check for unused state variables using the symbol table (one token pass, linear in file size)"""
         unused = []
         unused_lines = []
-        for var_name, line_num in declared_vars.items():
-            if var_name not in used_vars:
-                # Check if it's actually used in functions
-                is_used = False
-                for i, line in enumerate(self.lines, 1):
-                    if var_name in line and i != line_num:
-                        is_used = True
-                        break
-                if not is_used:
-                    unused.append(var_name)
-                    unused_lines.append(line_num)
+        for symbol in self.symbols.state_variables():
+            # Avoid single letters; any read or write outside the declaration counts as usage
+            if len(symbol.name) > 1 and not symbol.is_referenced:
+                unused.append(symbol.name)
+                unused_lines.append(symbol.declared_at.line)
         
         if unused:
             self.vulnerabilities.append(Vulnerability(
+                rule_id="unused-state-variable",
                 issue="Unused State Variables",
                 severity=RiskLevel.LOW,
                 description=f"Found {len(unused)} unused state variable(s): {', '.join(unused[:3])}. This increases gas costs.",
-                fix="Remove unused variables or document why they're needed",
                 line_numbers=unused_lines[:5],
-                code_snippet=self._get_code_snippet(unused_lines[:3]),
-                impact="Higher gas costs, code clutter",
-                likelihood="N/A"
+                snippet_lines=unused_lines[:3]
             ))
-            self.security_score -= len(unused)
 
     def _find_function_start(self, line_num: int) -> int:
         """Find where a function starts"""
-        for i in range(max(1, line_num - 20), line_num):
-            if re.search(r'function\s+\w+\s*\(', self.lines[i-1]):
-                return i
-        return max(1, line_num - 10)
+        start = self.features["function_decl"].first(max(1, line_num - 20), line_num)
+        return start if start is not None else max(1, line_num - 10)
 
     def _find_function_end(self, start_line: int) -> int:
-        """Find where a function ends"""
+        """Find where a function ends (several call sites usually share a function)"""
+        if start_line not in self._function_ends:
+            self._function_ends[start_line] = self._scan_function_end(start_line)
+        return self._function_ends[start_line]
+
+    def _scan_function_end(self, start_line: int) -> int:
         brace_count = 0
         in_function = False
         
@@ -433,62 +585,137 @@ class SmartContractAnalyzer:
         recommendations = []
         
         # Check for events
-        if not re.search(r'event\s+\w+', self.code):
+        if not self.source.search(r'event\s+\w+'):
             recommendations.append("Add events for important state changes")
         
         # Check for zero address checks
-        if 'address' in self.code and not re.search(r'require.*address\(0\)', self.code):
+        if self.source.contains('address') and not self.source.search(r'require.*address\(0\)'):
             recommendations.append("Consider adding zero address validation for critical address parameters")
         
         # Check for magic numbers (but ignore small numbers)
-        magic_numbers = re.findall(r'\b(10000|100000|86400|604800|31536000)\b', self.code)
+        magic_numbers = self.source.search(r'\b(10000|100000|86400|604800|31536000)\b')
         if magic_numbers:
             recommendations.append("Replace large magic numbers with named constants")
         
         # Check for NatSpec comments
-        if '@param' not in self.code and '@return' not in self.code:
+        if not self.source.contains('@param') and not self.source.contains('@return'):
             recommendations.append("Add NatSpec comments (@param, @return) for better documentation")
         
         if recommendations:
             self.vulnerabilities.append(Vulnerability(
+                rule_id="best-practices",
                 issue="Best Practices Recommendations",
                 severity=RiskLevel.INFO,
                 description="Your contract could be improved with these best practices:",
-                fix="\n".join(f"• {rec}" for rec in recommendations),
                 line_numbers=[],
-                code_snippet="",
-                impact="Improved security and maintainability",
-                likelihood="N/A"
+                snippet_lines=[],
+                fix="\n".join(f"• {rec}" for rec in recommendations)
             ))
 
-    def analyze(self) -> Dict[str, Any]:
-        """Run all vulnerability checks"""
+    def _over_memory_limit(self, probe: MemoryProbe) -> bool:
+        """Check memory used so far by this scan against the memory cap"""
+        used = probe.sample()
+        return self.memory_limit_bytes is not None and used > self.memory_limit_bytes
+
+    def iter_findings(self, detailed: bool = True) -> Iterator[Dict[str, Any]]:
+        """
+        Run all vulnerability checks, yielding each serialized finding as soon as its
+        rule has produced it (rule order, then line order). Once exhausted,
+        build_report() returns the full report holding the same findings.
+        With detailed=False findings carry line spans only (snippet_lines) and no code_snippet.
+        """
         
-        # Reset score
-        self.security_score = 100
         self.vulnerabilities = []
+        self._findings = []
         
-        # Critical checks (🔴)
-        self.check_reentrancy()
-        self.check_unchecked_external_calls()
-        self.check_selfdestruct()
-        
-        # High checks (🟠)
-        self.check_access_control()
-        self.check_integer_overflow()
-        
-        # Medium checks (🟡)
-        self.check_tx_origin()
-        self.check_gas_limit_issues()
-        self.check_timestamp_dependency()
-        
-        # Low checks (🔵)
-        self.check_floating_pragma()
-        self.check_unused_variables()
-        
-        # Info/Green zone (🟢)
-        self.check_best_practices()
+        checks = [
+            # Critical checks (🔴)
+            self.check_reentrancy,
+            self.check_unchecked_external_calls,
+            self.check_selfdestruct,
+            
+            # High checks (🟠)
+            self.check_access_control,
+            self.check_integer_overflow,
+            
+            # Medium checks (🟡)
+            self.check_tx_origin,
+            self.check_gas_limit_issues,
+            self.check_timestamp_dependency,
+            
+            # Low checks (🔵)
+            self.check_floating_pragma,
+            self.check_unused_variables,
+            
+            # Info/Green zone (🟢)
+            self.check_best_practices,
+        ]
         
+        # Memory is only measured in bounded mode or when a cap is set
+        self._measure_memory = self.bounded or self.memory_limit_bytes is not None
+        probe = MemoryProbe()
+        if self._measure_memory:
+            probe.start()
+        
+        self._skipped_checks = []
+        self._timed_out_checks = []
+        seen_fingerprints = {}
+        try:
+            for check in checks:
+                if self._measure_memory and self._over_memory_limit(probe):
+                    self._skipped_checks.append(check.__name__)
+                    continue
+                # Prefilter: skip rules whose literals never appear in the file
+                literals = RULE_LITERALS.get(check.__name__)
+                if literals and not self.prefilter.contains_any(literals):
+                    continue
+                found_before = len(self.vulnerabilities)
+                with tracer.span("analyzer.rule", rule=check.__name__) as span:
+                    self._run_check(check, found_before)
+                    span.set_attribute("findings", len(self.vulnerabilities) - found_before)
+                
+                for v in self.vulnerabilities[found_before:]:
+                    finding = v.to_dict(self.lines)
+                    number_fingerprint(finding, seen_fingerprints)
+                    if detailed:
+                        finding["code_snippet"] = render_code_snippet(self.lines, finding["snippet_lines"])
+                    self._findings.append(finding)
+                    yield finding
+        finally:
+            self._peak_memory = probe.stop() if self._measure_memory else None
+
+    def _run_check(self, check, found_before: int):
+        """
+        Run one check within its CPU budget. A check that runs out of time keeps none of
+        its partial findings; a "rule timed out" finding stands in for them.
+        """
+        if self.rule_budget_seconds:
+            self._rule_deadline = time.thread_time() + self.rule_budget_seconds
+        try:
+            check()
+        except RuleTimeout:
+            del self.vulnerabilities[found_before:]
+            self._timed_out_checks.append(check.__name__)
+            self.vulnerabilities.append(Vulnerability(
+                rule_id="rule-timeout",
+                issue=f"Rule Timed Out: {check.__name__}",
+                severity=RiskLevel.MEDIUM,
+                description=f"The {check.__name__} check exceeded its {self.rule_budget_seconds:g}s CPU budget and was stopped, so its results are missing.",
+                line_numbers=[],
+                snippet_lines=[],
+                fix=f"Review the code {check.__name__} covers manually; very long or generated lines are the usual cause"
+            ))
+        finally:
+            self._rule_deadline = None
+
+    def analyze(self, detailed: bool = True) -> Dict[str, Any]:
+        """Run all vulnerability checks and return the full report"""
+        for _ in self.iter_findings(detailed=detailed):
+            pass
+        return self.build_report()
+
+    def build_report(self) -> Dict[str, Any]:
+        """Report for the findings produced by the last iter_findings() run"""
         # Sort vulnerabilities by severity
         severity_order = {
             RiskLevel.CRITICAL: 0,
@@ -498,69 +725,82 @@ class SmartContractAnalyzer:
             RiskLevel.INFO: 4,
             RiskLevel.SAFE: 5
         }
-        self.vulnerabilities.sort(key=lambda v: severity_order[v.severity])
-        
-        # Calculate deployment readiness - FIXED
-        has_critical = any(v.severity == RiskLevel.CRITICAL for v in self.vulnerabilities)
-        has_high = any(v.severity == RiskLevel.HIGH for v in self.vulnerabilities)
-        
-        if has_critical:
-            can_deploy = False
-            deployment_risk = "CRITICAL"
-            message = "DO NOT DEPLOY! Critical vulnerabilities detected."
-        elif has_high:
-            can_deploy = False
-            deployment_risk = "HIGH"
-            message = "Fix high severity issues before deployment."
-        else:
-            can_deploy = True
-            deployment_risk = "LOW"
-            message = "Contract is safe to deploy."
+        order = sorted(range(len(self.vulnerabilities)), key=lambda i: severity_order[self.vulnerabilities[i].severity])
+        self.vulnerabilities = [self.vulnerabilities[i] for i in order]
+        findings = [self._findings[i] for i in order]
         
-        # Adjust security score based on findings
-        self.security_score = max(0, min(100, self.security_score))
+        # Score, summary and readiness come from the findings alone (see app.scanner.scoring),
+        # so stored reports can be rescored when the policy changes
+        summary = self.policy.summary(findings)
+        self.security_score = self.policy.score(findings)
         
         # Generate report
         report = {
             "contract_name": self.contract_name,
             "pragma_version": self.pragma_version,
+            "imports": self.scope.to_dict(),
             "security_score": self.security_score,
-            "deployment_readiness": {
-                "can_deploy": can_deploy,
-                "risk_level": deployment_risk,
-                "reason": message,
-                "recommendation": "Fix critical issues before deployment" if not can_deploy else "Ready for deployment"
-            },
+            "deployment_readiness": self.policy.readiness(summary),
             "vulnerabilities": [],
-            "summary": {
-                "critical": len([v for v in self.vulnerabilities if v.severity == RiskLevel.CRITICAL]),
-                "high": len([v for v in self.vulnerabilities if v.severity == RiskLevel.HIGH]),
-                "medium": len([v for v in self.vulnerabilities if v.severity == RiskLevel.MEDIUM]),
-                "low": len([v for v in self.vulnerabilities if v.severity == RiskLevel.LOW]),
-                "info": len([v for v in self.vulnerabilities if v.severity == RiskLevel.INFO]),
-                "total": len(self.vulnerabilities)
-            }
+            "summary": summary
         }
         
-        # Format vulnerabilities for JSON response
-        for v in self.vulnerabilities:
-            report["vulnerabilities"].append({
-                "issue": v.issue,
-                "severity": v.severity.value,
-                "description": v.description,
-                "fix": v.fix,
-                "line_numbers": v.line_numbers,
-                "code_snippet": v.code_snippet,
-                "cwe_reference": v.cwe_reference,
-                "impact": v.impact,
-                "likelihood": v.likelihood
-            })
+        if self._measure_memory:
+            report["resources"] = {
+                "mode": "bounded" if self.bounded else "in_memory",
+                "source_bytes": self.source.size,
+                "lines": len(self.lines),
+                "peak_memory_bytes": self._peak_memory,
+                "memory_limit_bytes": self.memory_limit_bytes,
+                "skipped_checks": self._skipped_checks
+            }
+        
+        # Only present when input limits changed what the rules saw
+        if self.source.truncated_lines or self._timed_out_checks:
+            report["analysis_limits"] = {
+                "max_line_length": MAX_LINE_LENGTH,
+                "truncated_lines": self.source.truncated_lines,
+                "rule_budget_seconds": self.rule_budget_seconds,
+                "timed_out_checks": self._timed_out_checks
+            }
         
+        report["vulnerabilities"] = findings
         return report
 
-def analyze_smart_contract(code: str) -> Dict[str, Any]:
+def analyze_smart_contract(code: str, scope: Optional[ImportScope] = None, detailed: bool = True) -> Dict[str, Any]:
     """
     Main entry point for smart contract analysis
     """
-    analyzer = SmartContractAnalyzer(code)
-    return analyzer.analyze()
\ No newline at end of file
+    analyzer = SmartContractAnalyzer(code, scope=scope)
+    return analyzer.analyze(detailed=detailed)
+
+def analyze_smart_contract_file(
+    path: str,
+    memory_limit_bytes: Optional[int] = None,
+    detailed: bool = True
+) -> Dict[str, Any]:
+    """
+    Bounded-memory analysis of a contract on disk.
+    The file is memory-mapped instead of loaded, and peak memory is capped and reported.
+    """
+    analyzer = SmartContractAnalyzer.from_file(path, memory_limit_bytes=memory_limit_bytes)
+    try:
+        return analyzer.analyze(detailed=detailed)
+    finally:
+        analyzer.source.close()
+
+def project_analyzers(sources: Dict[str, str]) -> Iterator[Tuple[str, SmartContractAnalyzer]]:
+    """Analyzer per project file, with imports resolved against the other files"""
+    project = Project(sources)
+    for path in project.analysis_targets():
+        yield path, SmartContractAnalyzer(project.sources[path], scope=project.scope_for(path))
+
+def analyze_project(sources: Dict[str, str], detailed: bool = True) -> Dict[str, Dict[str, Any]]:
+    """
+    Analyze every project file with its imports resolved against the other files.
+    Returns {path: report}; dependency folders are indexed but not reported on.
+    """
+    return {
+        path: analyzer.analyze(detailed=detailed)
+        for path, analyzer in project_analyzers(sources)
+    }
@@ -0,0 +1,81 @@
+# D:\My_Work\smartShiledAI\backend\app\scanner\features.py
+from array import array
+from bisect import bisect_left
+from itertools import accumulate
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class LineFeature:
+    """Lines where one boolean feature holds, with prefix sums for O(1) window counts"""
+    __slots__ = ("lines", "line_count", "_prefix")
+
+    def __init__(self, lines: List[int], line_count: int):
+        self.lines = lines
+        self.line_count = line_count
+        self._prefix = None
+
+    def _build_prefix(self) -> array:
+        flags = bytearray(self.line_count + 2)
+        for line_num in self.lines:
+            flags[line_num] = 1
+        # _prefix[k] = number of feature lines before line k
+        self._prefix = array('l', accumulate(flags, initial=0))
+        return self._prefix
+
+    def count(self, start: int, end: int) -> int:
+        """Feature lines in [start, end)"""
+        prefix = self._prefix if self._prefix is not None else self._build_prefix()
+        start = max(start, 0)
+        end = min(end, len(prefix) - 1)
+        if end <= start:
+            return 0
+        return prefix[end] - prefix[start]
+
+    def any(self, start: int, end: int) -> bool:
+        return self.count(start, end) > 0
+
+    def between(self, start: int, end: int) -> List[int]:
+        """Feature lines in [start, end), in order"""
+        first = bisect_left(self.lines, start)
+        return self.lines[first:bisect_left(self.lines, end, first)]
+
+    def first(self, start: int, end: int) -> Optional[int]:
+        """First feature line in [start, end), if any"""
+        index = bisect_left(self.lines, start)
+        if index < len(self.lines) and self.lines[index] < end:
+            return self.lines[index]
+        return None
+
+
+class LineFeatures:
+    """
+    Per-line boolean features of one file (external call, state write, success check,
+    caller guard, ...). Each is computed once, on first use, in one regex pass over the
+    source; window-based rules then query it instead of re-running regexes on the lines
+    around every hit.
+    """
+
+    def __init__(self, source, definitions: Dict[str, Tuple[str, Tuple[str, ...]]]):
+        self.source = source
+        self.definitions = definitions
+        self._features: Dict[str, LineFeature] = {}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._features
+
+    def __getitem__(self, name: str) -> LineFeature:
+        feature = self._features.get(name)
+        if feature is None:
+            pattern, literals = self.definitions[name]
+            feature = self.define(name, self.matching(pattern, literals))
+        return feature
+
+    def matching(self, pattern: str, literals: Iterable[str]) -> List[int]:
+        """Lines matching pattern, which must not be able to match without one of literals"""
+        return self.source.matching_lines(pattern, literals)
+
+    def define(self, name: str, lines: List[int]) -> LineFeature:
+        """Register a feature computed by the caller (e.g. combined from other features)"""
+        feature = LineFeature(lines, len(self.source))
+        self._features[name] = feature
+        return feature
@@ -0,0 +1,66 @@
+# D:\My_Work\smartShiledAI\backend\app\scanner\fingerprint.py
+import re
+import hashlib
+from typing import List, Dict, Any
+
+from app.scanner.scoring import finding_rule_id
+
+COMMENT_PATTERN = re.compile(r'//.*$|/\*.*?\*/')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+SNIPPET_LINE_PATTERN = re.compile(r'^>> \d+: (.*)$')
+
+
+def normalize_code_line(line: str) -> str:
+    """Line content without comments and with whitespace collapsed"""
+    line = COMMENT_PATTERN.sub('', line)
+    return WHITESPACE_PATTERN.sub(' ', line).strip()
+
+
+def _fingerprint(rule_id: str, context: List[str]) -> str:
+    digest = hashlib.sha256(rule_id.encode("utf-8"))
+    for part in context:
+        digest.update(b"\n")
+        digest.update(part.encode("utf-8"))
+    return digest.hexdigest()[:32]
+
+
+def finding_fingerprint(rule_id: str, line_numbers: List[int], lines, fallback: str = "") -> str:
+    """
+    Stable identity of a finding: rule + normalized code of its lines.
+    Line numbers themselves are left out, so the fingerprint survives code moving around.
+    """
+    context = [normalize_code_line(lines[n - 1]) for n in line_numbers if 0 < n <= len(lines)]
+    if not context:
+        context = [normalize_code_line(fallback)]
+    return _fingerprint(rule_id, context)
+
+
+def fingerprint_from_stored(vuln: Dict[str, Any]) -> str:
+    """
+    Fingerprint for a finding stored before fingerprints existed, from its snippet text.
+    Seeded with the (inferred) rule ID like finding_fingerprint, so a rescan of the same
+    code matches; the title only stands in for rules that can't be inferred.
+    """
+    if vuln.get("fingerprint"):
+        return vuln["fingerprint"]
+    context = []
+    for snippet_line in vuln.get("code_snippet", "").split('\n'):
+        match = SNIPPET_LINE_PATTERN.match(snippet_line)
+        if match:
+            context.append(normalize_code_line(match.group(1)))
+    if not context:
+        context = [normalize_code_line(vuln.get("fix", ""))]
+    return _fingerprint(finding_rule_id(vuln) or vuln.get("issue", ""), context)
+
+
+def number_fingerprint(vuln: Dict[str, Any], seen: Dict[str, int]):
+    """
+    Number a repeated fingerprint (identical code flagged twice), given those seen so far.
+    Findings are numbered in the order they are produced: rule order, then line order.
+    """
+    base = vuln["fingerprint"]
+    count = seen.get(base, 0)
+    seen[base] = count + 1
+    if count:
+        vuln["fingerprint"] = f"{base}-{count}"
+
@@ -0,0 +1,206 @@
+# D:\My_Work\smartShiledAI\backend\app\scanner\function_memo.py
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+from dotenv import load_dotenv
+
+from app.tracing.logs import get_logger
+
+# Load environment variables
+load_dotenv()
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# "sqlite" keeps function summaries across restarts and shares them between workers on
+# one host, "memory" keeps them per worker, "off" analyzes every function every time
+FUNCTION_MEMO_BACKEND = os.getenv("FUNCTION_MEMO_BACKEND", "sqlite")
+FUNCTION_MEMO_SQLITE_PATH = os.getenv("FUNCTION_MEMO_SQLITE_PATH", os.path.join(BACKEND_DIR, "function_memo.db"))
+FUNCTION_MEMO_MAX_ENTRIES = int(os.getenv("FUNCTION_MEMO_MAX_ENTRIES", "50000"))
+# Rows kept in the SQLite store; the least recently used are trimmed beyond it
+FUNCTION_MEMO_STORE_MAX_ENTRIES = int(os.getenv("FUNCTION_MEMO_STORE_MAX_ENTRIES", "500000"))
+# last_used is only rewritten once it is this old, so hits rarely cost a write
+MEMO_TOUCH_INTERVAL_SECONDS = 86400
+# How often each worker checks the store size
+MEMO_TRIM_INTERVAL_SECONDS = 600
+
+# Bump whenever tokenizing or symbol collection changes, so stale summaries are never reused
+MEMO_VERSION = 1
+
+logger = get_logger("function_memo")
+
+# What one function body contributes to a symbol table, with lines given as indexes into
+# the body's normalized lines and columns relative to each line's indentation:
+# ([(name, type, kind, line_index, column)], [(name, line_index, column, is_read, is_write)])
+Summary = Tuple[List[tuple], List[tuple]]
+
+
+def function_key(context: str, normalized: str) -> str:
+    """Key of a normalized function body analyzed in the given block context"""
+    digest = hashlib.sha256(f"{MEMO_VERSION}\n{context}\n".encode("utf-8"))
+    digest.update(normalized.encode("utf-8"))
+    return digest.hexdigest()[:32]
+
+
+class SQLiteMemoStore:
+    """
+    Function summaries in a local SQLite file, shared by every worker process on the host.
+    Rows carry when they were last used; beyond max_entries the least recently used go.
+    """
+
+    def __init__(self, path: str, max_entries: int = FUNCTION_MEMO_STORE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._trimmed_at = 0.0
+        conn = self._connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS function_summaries ("
+            "key TEXT PRIMARY KEY, summary TEXT NOT NULL, last_used INTEGER NOT NULL DEFAULT 0)"
+        )
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(function_summaries)")]
+        if "last_used" not in columns:
+            # Stores created before eviction; their rows count as least recently used
+            try:
+                conn.execute("ALTER TABLE function_summaries ADD COLUMN last_used INTEGER NOT NULL DEFAULT 0")
+            except sqlite3.OperationalError:
+                # Another worker added it first
+                pass
+        conn.execute("CREATE INDEX IF NOT EXISTS function_summaries_last_used ON function_summaries (last_used)")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def load(self, keys: List[str]) -> Dict[str, Summary]:
+        conn = self._connection()
+        found = {}
+        # Stay under SQLite's bound parameter limit
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            rows = conn.execute(
+                f"SELECT key, summary FROM function_summaries WHERE key IN ({','.join('?' * len(chunk))})",
+                chunk,
+            )
+            for key, summary in rows:
+                found[key] = tuple(json.loads(summary))
+
+        now = int(time.time())
+        keys = list(found)
+        try:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                conn.execute(
+                    f"UPDATE function_summaries SET last_used = ? "
+                    f"WHERE key IN ({','.join('?' * len(chunk))}) AND last_used < ?",
+                    [now, *chunk, now - MEMO_TOUCH_INTERVAL_SECONDS],
+                )
+        except sqlite3.OperationalError:
+            # A busy store only delays the touch
+            pass
+        return found
+
+    def save(self, entries: Dict[str, Summary]):
+        conn = self._connection()
+        now = int(time.time())
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Summaries are deterministic, so a row another worker wrote first is just as good
+            conn.executemany(
+                "INSERT OR IGNORE INTO function_summaries (key, summary, last_used) VALUES (?, ?, ?)",
+                [(key, json.dumps(summary, separators=(",", ":")), now) for key, summary in entries.items()],
+            )
+            if time.monotonic() - self._trimmed_at > MEMO_TRIM_INTERVAL_SECONDS:
+                self._trimmed_at = time.monotonic()
+                self._trim(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _trim(self, conn: sqlite3.Connection):
+        """Delete the least recently used rows beyond max_entries (inside save's transaction)"""
+        excess = conn.execute("SELECT COUNT(*) FROM function_summaries").fetchone()[0] - self.max_entries
+        if excess > 0:
+            conn.execute(
+                "DELETE FROM function_summaries WHERE key IN "
+                "(SELECT key FROM function_summaries ORDER BY last_used LIMIT ?)",
+                (excess,),
+            )
+            logger.info("Function memo trimmed", extra={"fields": {"deleted": excess}})
+
+
+class FunctionMemo:
+    """
+    Symbol-table summaries of function bodies, keyed by their normalized text, so code
+    shared between contracts (copied token logic, Ownable, withdraw patterns) is only
+    tokenized once. Recent summaries stay in memory; the optional store persists them.
+    """
+
+    def __init__(self, store=None, max_entries: int = 50_000):
+        self.store = store
+        self.max_entries = max_entries
+        self._summaries: Dict[str, Summary] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls) -> Optional["FunctionMemo"]:
+        if FUNCTION_MEMO_BACKEND == "off":
+            return None
+        store = SQLiteMemoStore(FUNCTION_MEMO_SQLITE_PATH) if FUNCTION_MEMO_BACKEND == "sqlite" else None
+        return cls(store, FUNCTION_MEMO_MAX_ENTRIES)
+
+    def get(self, key: str) -> Optional[Summary]:
+        summary = self._summaries.get(key)
+        if summary is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return summary
+
+    def put(self, key: str, summary: Summary):
+        with self._lock:
+            self._summaries[key] = summary
+            # Oldest first, as in the pattern cache
+            while len(self._summaries) > self.max_entries:
+                self._summaries.pop(next(iter(self._summaries)))
+
+    def prefetch(self, keys: Iterable[str]):
+        """Load the summaries of keys that are not in memory from the store (one batch per scan)"""
+        if self.store is None:
+            return
+        missing = list({key for key in keys if key not in self._summaries})
+        if not missing:
+            return
+        try:
+            found = self.store.load(missing)
+        except sqlite3.Error:
+            logger.exception("Function memo load failed")
+            return
+        for key, summary in found.items():
+            self.put(key, summary)
+
+    def persist(self, entries: Dict[str, Summary]):
+        """Write summaries computed by a scan to the store; a failure only costs a future miss"""
+        if self.store is None or not entries:
+            return
+        try:
+            self.store.save(entries)
+        except sqlite3.Error:
+            logger.exception("Function memo save failed", extra={"fields": {"entries": len(entries)}})
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._summaries)}
+
+
+function_memo = FunctionMemo.from_env()
@@ -0,0 +1,133 @@
+# D:\My_Work\smartShiledAI\backend\app\scanner\http_cache.py
+import gzip
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from fastapi import Request
+from fastapi.responses import Response
+
+try:
+    import brotli
+except ImportError:  # optional, gzip is used when it is not installed
+    brotli = None
+
+# Reports are rewritten in place by rescoring and re-analysis, so clients must
+# revalidate every time (a cheap 304 while the ETag matches); "private" because
+# they are per-user
+REVALIDATE_CACHE_CONTROL = "private, no-cache"
+MIN_COMPRESS_SIZE = 1024
+# In order of preference
+CONTENT_CODINGS = ["br", "gzip"]
+
+
+class LRUCache:
+    """Thread-safe mapping that drops the least recently used entries beyond max_entries"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def __setitem__(self, key: str, value: Any):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def variant_etag(etag: str, variant: str) -> str:
+    """ETag for a representation derived from the same content (e.g. summary vs detailed)"""
+    return f'{etag[:-1]}-{variant}"'
+
+
+def _if_none_match(request: Request, etags: List[str]) -> Optional[str]:
+    """First of etags listed in If-None-Match (weak comparison, as allowed for GET)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return None
+    if header.strip() == "*":
+        return etags[0]
+    candidates = {tag[2:] if tag.startswith("W/") else tag for tag in (tag.strip() for tag in header.split(","))}
+    return next((etag for etag in etags if etag in candidates), None)
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """Evaluate If-None-Match against etag, for responses that are never compressed"""
+    return _if_none_match(request, [etag]) is not None
+
+
+def not_modified_etag(request: Request, etag: str) -> Optional[str]:
+    """
+    For cached_json_response: the tag the client's copy matches, in whichever content
+    coding it was sent (each coding has its own tag), or None if it must be refetched
+    """
+    return _if_none_match(request, [etag] + [variant_etag(etag, encoding) for encoding in CONTENT_CODINGS])
+
+
+def cache_headers(etag: str) -> Dict[str, str]:
+    return {
+        "ETag": etag,
+        "Cache-Control": REVALIDATE_CACHE_CONTROL,
+        "Vary": "Accept-Encoding, Authorization",
+    }
+
+
+def not_modified_response(etag: str) -> Response:
+    return Response(status_code=304, headers=cache_headers(etag))
+
+
+def _choose_encoding(request: Request) -> Optional[str]:
+    """Coding with the highest q-value the client accepts (q=0 refuses it); br wins ties"""
+    qualities = {}
+    for part in request.headers.get("accept-encoding", "").split(","):
+        name, *params = [item.strip() for item in part.split(";")]
+        if not name:
+            continue
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[name.lower()] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in CONTENT_CODINGS:
+        if encoding == "br" and brotli is None:
+            continue
+        quality = qualities.get(encoding, qualities.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def cached_json_response(request: Request, content: dict, etag: str, media_type: str = "application/json") -> Response:
+    """JSON response with caching headers, compressed with brotli/gzip when large enough"""
+    body = json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    headers = cache_headers(etag)
+
+    encoding = _choose_encoding(request) if len(body) >= MIN_COMPRESS_SIZE else None
+    if encoding == "br":
+        body = brotli.compress(body, quality=5)
+    elif encoding == "gzip":
+        body = gzip.compress(body, compresslevel=6)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+        # Strong validators differ per content coding
+        headers["ETag"] = variant_etag(etag, encoding)
+
+    return Response(content=body, media_type=media_type, headers=headers)
@@ -0,0 +1,400 @@
+# D:\My_Work\smartShiledAI\backend\app\scanner\imports.py
+import io
+import os
+import re
+import json
+import time
+import hashlib
+import zipfile
+import threading
+import posixpath
+from collections import OrderedDict
+from dataclasses import dataclass, field, asdict
+from typing import List, Dict, Optional, Set, Tuple
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Get the absolute path to the backend directory
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+PARSE_CACHE_DIR = os.path.join(BACKEND_DIR, "cache", "parsed")
+# Disk cache entries unused for longer are deleted, then the oldest ones beyond the size cap
+PARSE_CACHE_MAX_AGE_DAYS = int(os.getenv("PARSE_CACHE_MAX_AGE_DAYS", "30"))
+PARSE_CACHE_MAX_BYTES = int(os.getenv("PARSE_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+PARSE_CACHE_PRUNE_INTERVAL_SECONDS = 3600
+
+# Limits on uploaded project archives (uncompressed sizes, as declared by the archive)
+MAX_ARCHIVE_ENTRIES = int(os.getenv("MAX_ARCHIVE_ENTRIES", "10000"))
+MAX_ARCHIVE_FILE_BYTES = int(os.getenv("MAX_ARCHIVE_FILE_BYTES", 10 * 1024 * 1024))
+MAX_ARCHIVE_TOTAL_BYTES = int(os.getenv("MAX_ARCHIVE_TOTAL_BYTES", 200 * 1024 * 1024))
+
+# Bump when ParsedSource changes shape so stale disk entries are ignored
+PARSER_VERSION = 1
+
+# Folders that hold third-party code inside an uploaded project
+DEPENDENCY_DIRS = ("node_modules/", "lib/")
+
+COMMENT_PATTERN = re.compile(r'//[^\n]*|/\*.*?\*/', re.DOTALL)
+IMPORT_PATTERN = re.compile(r'\bimport\s+(?:[^;"\']*?\bfrom\s+)?["\']([^"\']+)["\'][^;]*;')
+CONTRACT_PATTERN = re.compile(r'\b(?:abstract\s+)?(contract|interface|library)\s+(\w+)\s*(?:is\s+([^{]+))?\{')
+MODIFIER_PATTERN = re.compile(r'\bmodifier\s+(\w+)[^{;]*\{')
+# Any using-directive naming a SafeMath library (SafeMath, SafeMathUpgradeable, ...)
+SAFEMATH_PATTERN = re.compile(r'\busing\b[^;\n]*SafeMath')
+SAFEMATH_IMPORT_PATTERN = re.compile(r'import.*SafeMath')
+# A modifier counts as access control when its body checks the caller
+GUARD_BODY_PATTERN = re.compile(r'msg\.sender|_msgSender\s*\(|_check\w*\s*\(')
+
+
+@dataclass
+class ParsedContract:
+    name: str
+    kind: str
+    bases: List[str] = field(default_factory=list)
+    guard_modifiers: List[str] = field(default_factory=list)
+    uses_safemath: bool = False
+
+
+@dataclass
+class ParsedSource:
+    """Index of a single Solidity source, independent of where it lives in a project"""
+    content_hash: str
+    imports: List[str] = field(default_factory=list)
+    contracts: List[ParsedContract] = field(default_factory=list)
+    imports_safemath: bool = False
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "ParsedSource":
+        return cls(
+            content_hash=data["content_hash"],
+            imports=data["imports"],
+            contracts=[ParsedContract(**c) for c in data["contracts"]],
+            imports_safemath=data["imports_safemath"],
+        )
+
+
+def _match_block(code: str, open_brace: int) -> int:
+    """Return the index just past the brace block starting at open_brace"""
+    depth = 0
+    for i in range(open_brace, len(code)):
+        if code[i] == '{':
+            depth += 1
+        elif code[i] == '}':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+    return len(code)
+
+
+def _split_bases(bases: str) -> List[str]:
+    """Turn 'A, B(msg.sender), C' into ['A', 'B', 'C']"""
+    # Drop constructor arguments, innermost parentheses first
+    previous = None
+    while previous != bases:
+        previous = bases
+        bases = re.sub(r'\([^()]*\)', '', bases)
+    return [b.strip().split('.')[-1] for b in bases.split(',') if b.strip()]
+
+
+def parse_source(code: str, content_hash: str) -> ParsedSource:
+    """Extract imports, contracts, bases and guard modifiers from source code"""
+    stripped = COMMENT_PATTERN.sub('', code)
+    parsed = ParsedSource(
+        content_hash=content_hash,
+        imports=IMPORT_PATTERN.findall(stripped),
+        imports_safemath=bool(SAFEMATH_IMPORT_PATTERN.search(stripped)),
+    )
+
+    for match in CONTRACT_PATTERN.finditer(stripped):
+        body_end = _match_block(stripped, match.end() - 1)
+        body = stripped[match.end():body_end]
+
+        guard_modifiers = []
+        for modifier in MODIFIER_PATTERN.finditer(body):
+            modifier_body = body[modifier.end():_match_block(body, modifier.end() - 1)]
+            if GUARD_BODY_PATTERN.search(modifier_body):
+                guard_modifiers.append(modifier.group(1))
+
+        parsed.contracts.append(ParsedContract(
+            name=match.group(2),
+            kind=match.group(1),
+            bases=_split_bases(match.group(3) or ''),
+            guard_modifiers=guard_modifiers,
+            uses_safemath=bool(SAFEMATH_PATTERN.search(body)),
+        ))
+
+    return parsed
+
+
+class DependencyCache:
+    """
+    Parsed sources keyed by content hash.
+    Shared across scans so common libraries (OpenZeppelin etc.) are parsed once,
+    kept in a small in-process LRU backed by JSON files on disk. Only sources asked
+    for with persist=True (imported files) are written to disk; disk entries are
+    pruned by last use and total size (see prune()).
+    """
+
+    def __init__(self, cache_dir: Optional[str] = PARSE_CACHE_DIR, max_entries: int = 2048,
+                 max_age_days: int = PARSE_CACHE_MAX_AGE_DAYS, max_disk_bytes: int = PARSE_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_days * 86400
+        self.max_disk_bytes = max_disk_bytes
+        # content hash -> (parsed, whether it is on disk)
+        self._entries: "OrderedDict[str, Tuple[ParsedSource, bool]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._pruned_at = 0.0
+        self.hits = 0
+        self.misses = 0
+
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _disk_path(self, content_hash: str) -> str:
+        return os.path.join(self.cache_dir, f"{content_hash}.json")
+
+    def _load_from_disk(self, content_hash: str) -> Optional[ParsedSource]:
+        if not self.cache_dir:
+            return None
+        path = self._disk_path(content_hash)
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+            # mtime doubles as last use for pruning
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        if data.get("parser_version") != PARSER_VERSION:
+            return None
+        return ParsedSource.from_dict(data["source"])
+
+    def _save_to_disk(self, parsed: ParsedSource):
+        if not self.cache_dir:
+            return
+        tmp_path = self._disk_path(parsed.content_hash) + ".tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump({"parser_version": PARSER_VERSION, "source": parsed.to_dict()}, f)
+            os.replace(tmp_path, self._disk_path(parsed.content_hash))
+        except OSError:
+            pass
+        if time.monotonic() - self._pruned_at > PARSE_CACHE_PRUNE_INTERVAL_SECONDS:
+            self.prune()
+
+    def prune(self) -> int:
+        """
+        Delete disk entries unused for max_age_days, then the least recently used ones
+        until the cache fits in max_disk_bytes. Returns the number of files deleted.
+        """
+        self._pruned_at = time.monotonic()
+        if not self.cache_dir:
+            return 0
+        now = time.time()
+        entries = []
+        try:
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        except OSError:
+            return 0
+
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        deleted = 0
+        for mtime, size, path in entries:
+            if now - mtime <= self.max_age_seconds and total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            deleted += 1
+        return deleted
+
+    def get(self, code: str, persist: bool = True) -> ParsedSource:
+        """
+        Return the parsed index for code, parsing it only if never seen before.
+        persist=False keeps a newly parsed source in memory only (e.g. a single upload
+        nothing imports, which would otherwise leave a disk entry per scan).
+        """
+        content_hash = hashlib.sha256(code.encode("utf-8")).hexdigest()
+
+        with self._lock:
+            entry = self._entries.get(content_hash)
+            if entry is not None:
+                self._entries.move_to_end(content_hash)
+                self.hits += 1
+        if entry is not None:
+            parsed, on_disk = entry
+            if persist and not on_disk:
+                self._save_to_disk(parsed)
+                self._remember(content_hash, parsed, True)
+            return parsed
+
+        parsed = self._load_from_disk(content_hash)
+        on_disk = parsed is not None
+        with self._lock:
+            if on_disk:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if parsed is None:
+            parsed = parse_source(code, content_hash)
+            if persist:
+                self._save_to_disk(parsed)
+                on_disk = True
+        self._remember(content_hash, parsed, on_disk)
+        return parsed
+
+    def _remember(self, content_hash: str, parsed: ParsedSource, on_disk: bool):
+        with self._lock:
+            self._entries[content_hash] = (parsed, on_disk)
+            self._entries.move_to_end(content_hash)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+
+dependency_cache = DependencyCache()
+
+
+@dataclass
+class ImportScope:
+    """What one file can see through its imports and inheritance chain"""
+    path: str
+    resolved_imports: List[str] = field(default_factory=list)
+    unresolved_imports: List[str] = field(default_factory=list)
+    guard_modifiers: Set[str] = field(default_factory=set)
+    inherited_contracts: List[str] = field(default_factory=list)
+    uses_safemath: bool = False
+
+    def to_dict(self) -> Dict:
+        return {
+            "resolved": self.resolved_imports,
+            "unresolved": self.unresolved_imports,
+            "inherited_contracts": self.inherited_contracts,
+            "guard_modifiers": sorted(self.guard_modifiers),
+        }
+
+
+class ArchiveTooLarge(ValueError):
+    """A project archive exceeds the entry count or uncompressed size limits"""
+
+
+def read_project_archive(content: bytes) -> Dict[str, str]:
+    """
+    Solidity sources of a zipped project by archive path (raises zipfile.BadZipFile).
+    Raises ArchiveTooLarge before decompressing anything if the archive is over the
+    limits; declared sizes can be trusted since zipfile never reads past them.
+    """
+    sources = {}
+    with zipfile.ZipFile(io.BytesIO(content)) as archive:
+        entries = archive.infolist()
+        if len(entries) > MAX_ARCHIVE_ENTRIES:
+            raise ArchiveTooLarge(f"Archive has more than {MAX_ARCHIVE_ENTRIES} entries")
+        entries = [entry for entry in entries if not entry.is_dir() and entry.filename.endswith(".sol")]
+        for entry in entries:
+            if entry.file_size > MAX_ARCHIVE_FILE_BYTES:
+                raise ArchiveTooLarge(f"{entry.filename} is larger than {MAX_ARCHIVE_FILE_BYTES} bytes uncompressed")
+        if sum(entry.file_size for entry in entries) > MAX_ARCHIVE_TOTAL_BYTES:
+            raise ArchiveTooLarge(f"Sources are larger than {MAX_ARCHIVE_TOTAL_BYTES} bytes uncompressed")
+        for entry in entries:
+            sources[entry.filename] = archive.read(entry).decode("utf-8", errors="replace")
+    return sources
+
+
+class Project:
+    """A set of Solidity sources (path -> code) with import resolution between them"""
+
+    def __init__(self, sources: Dict[str, str], cache: Optional[DependencyCache] = None):
+        self.sources = {self.normalize_path(path): code for path, code in sources.items()}
+        self.cache = cache or dependency_cache
+
+    @staticmethod
+    def normalize_path(path: str) -> str:
+        return posixpath.normpath(path.replace('\\', '/')).lstrip('/')
+
+    def parsed(self, path: str, persist: bool = True) -> ParsedSource:
+        return self.cache.get(self.sources[path], persist=persist)
+
+    def resolve_import(self, importer: str, target: str) -> Optional[str]:
+        """Map an import string to a path inside the project, if it is there"""
+        if target.startswith('.'):
+            candidate = self.normalize_path(posixpath.join(posixpath.dirname(importer), target))
+            return candidate if candidate in self.sources else None
+
+        candidate = self.normalize_path(target)
+        if candidate in self.sources:
+            return candidate
+
+        # Package imports (@openzeppelin/...) usually live under node_modules/ or lib/
+        for path in self.sources:
+            if path.endswith('/' + candidate):
+                return path
+        return None
+
+    def analysis_targets(self) -> List[str]:
+        """Project files worth reporting on (third-party dependencies are only indexed)"""
+        return sorted(
+            path for path in self.sources
+            if not any(path.startswith(d) or f"/{d}" in path for d in DEPENDENCY_DIRS)
+        )
+
+    def scope_for(self, path: str) -> ImportScope:
+        path = self.normalize_path(path)
+        scope = ImportScope(path=path)
+
+        # Walk the import graph once, collecting every reachable file
+        reachable = [path]
+        seen = {path}
+        index = 0
+        while index < len(reachable):
+            current = reachable[index]
+            index += 1
+            # Only imported files are worth a disk entry; the scanned file usually isn't reused
+            for target in self.parsed(current, persist=current != path).imports:
+                resolved = self.resolve_import(current, target)
+                if resolved is None:
+                    if current == path:
+                        scope.unresolved_imports.append(target)
+                    continue
+                if current == path:
+                    scope.resolved_imports.append(resolved)
+                if resolved not in seen:
+                    seen.add(resolved)
+                    reachable.append(resolved)
+
+        contracts: Dict[str, ParsedContract] = {}
+        for reachable_path in reversed(reachable):
+            for contract in self.parsed(reachable_path, persist=reachable_path != path).contracts:
+                contracts[contract.name] = contract
+
+        # Inheritance closure of the contracts declared in this file
+        own = self.parsed(path, persist=False)
+        pending = [c.name for c in own.contracts]
+        visited: Set[str] = set()
+        while pending:
+            name = pending.pop()
+            if name in visited or name not in contracts:
+                continue
+            visited.add(name)
+            contract = contracts[name]
+            scope.guard_modifiers.update(contract.guard_modifiers)
+            scope.uses_safemath = scope.uses_safemath or contract.uses_safemath
+            pending.extend(contract.bases)
+
+        local_names = {c.name for c in own.contracts}
+        scope.inherited_contracts = sorted(visited - local_names)
+        scope.uses_safemath = scope.uses_safemath or own.imports_safemath
+        return scope
@@ -0,0 +1,391 @@
+# D:\My_Work\smartShiledAI\backend\app\scanner\lsp.py
+"""
+Language server for live in-editor analysis. The editor starts it and talks
+JSON-RPC (Language Server Protocol) over stdin/stdout:
+
+    python -m app.scanner.lsp
+
+Open documents live in memory and take incremental edits. Each change re-arms a short
+debounce timer; when it fires the document is analyzed with SmartContractAnalyzer and
+its findings are published as diagnostics. Parsed imports and function summaries stay
+in in-process caches, so a keystroke never touches disk.
+"""
+import os
+import sys
+import json
+import logging
+import threading
+import time
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urlparse, unquote
+from urllib.request import url2pathname
+from dotenv import load_dotenv
+
+from app.scanner.analyzer import SmartContractAnalyzer
+from app.scanner.function_memo import FunctionMemo
+from app.scanner.imports import DependencyCache, Project
+from app.scanner.rules import RiskLevel
+from app.tracing.logs import ROOT_LOGGER, get_logger
+
+# Load environment variables
+load_dotenv()
+
+# Quiet time after the last edit before a document is re-analyzed
+LSP_DEBOUNCE_MS = int(os.getenv("LSP_DEBOUNCE_MS", "50"))
+
+SERVER_NAME = "SmartShield"
+# LSP DiagnosticSeverity: 1 error, 2 warning, 3 information, 4 hint
+DIAGNOSTIC_SEVERITY = {
+    RiskLevel.CRITICAL.value: 1,
+    RiskLevel.HIGH.value: 1,
+    RiskLevel.MEDIUM.value: 2,
+    RiskLevel.LOW.value: 3,
+    RiskLevel.INFO.value: 4,
+}
+CWE_URL = "https://cwe.mitre.org/data/definitions/{}.html"
+# Where package imports (@openzeppelin/...) are looked up, relative to the workspace root
+PACKAGE_DIRS = ["", "node_modules", "lib"]
+
+# JSON-RPC error codes
+METHOD_NOT_FOUND = -32601
+INTERNAL_ERROR = -32603
+
+logger = get_logger("lsp")
+
+
+def _utf16_offset(line: str, character: int) -> int:
+    """Index into line of an LSP character offset (counted in UTF-16 code units)"""
+    if line.isascii():
+        return min(character, len(line))
+    units = 0
+    for index, char in enumerate(line):
+        if units >= character:
+            return index
+        units += 2 if ord(char) > 0xFFFF else 1
+    return len(line)
+
+
+def _utf16_length(text: str) -> int:
+    if text.isascii():
+        return len(text)
+    return sum(2 if ord(char) > 0xFFFF else 1 for char in text)
+
+
+def uri_to_path(uri: str) -> str:
+    parsed = urlparse(uri)
+    if parsed.scheme == "file":
+        return url2pathname(unquote(parsed.path))
+    # Unsaved buffers (untitled:Untitled-1) get a path of their own
+    return unquote(parsed.path) or uri
+
+
+class Document:
+    """Text of an open document as a list of lines, edited in place"""
+
+    def __init__(self, uri: str, version: int, text: str):
+        self.uri = uri
+        self.path = uri_to_path(uri)
+        self.version = version
+        self.lines = text.split("\n")
+
+    @property
+    def text(self) -> str:
+        # Editors may send CRLF; the analyzer works on bare \n lines
+        text = "\n".join(self.lines)
+        return text.replace("\r", "") if "\r" in text else text
+
+    def apply_change(self, change: Dict[str, Any]):
+        """Apply one TextDocumentContentChangeEvent (a range edit, or the full text)"""
+        if "range" not in change:
+            self.lines = change["text"].split("\n")
+            return
+        start, end = change["range"]["start"], change["range"]["end"]
+        start_line, end_line = start["line"], end["line"]
+        if start_line >= len(self.lines):
+            self.lines.extend([""] * (start_line - len(self.lines) + 1))
+        first = self.lines[start_line]
+        last = self.lines[end_line] if end_line < len(self.lines) else ""
+        prefix = first[:_utf16_offset(first, start["character"])]
+        suffix = last[_utf16_offset(last, end["character"]):]
+        self.lines[start_line:end_line + 1] = (prefix + change["text"] + suffix).split("\n")
+
+    def line_range(self, line_number: int) -> Dict[str, Any]:
+        """Range of a 1-based line, without its indentation"""
+        index = min(max(line_number - 1, 0), len(self.lines) - 1)
+        line = self.lines[index].rstrip("\r")
+        indent = len(line) - len(line.lstrip())
+        return {
+            "start": {"line": index, "character": _utf16_length(line[:indent])},
+            "end": {"line": index, "character": _utf16_length(line)},
+        }
+
+
+def to_diagnostic(document: Document, finding: Dict[str, Any]) -> Dict[str, Any]:
+    """LSP Diagnostic for a serialized finding, placed on its first line"""
+    line_numbers = finding.get("line_numbers") or [1]
+    diagnostic = {
+        "range": document.line_range(line_numbers[0]),
+        "severity": DIAGNOSTIC_SEVERITY.get(finding["severity"], 2),
+        "code": finding["rule_id"],
+        "source": SERVER_NAME,
+        "message": f"{finding['issue']}: {finding['description']}",
+    }
+    cwe = finding.get("cwe_reference") or ""
+    if cwe.startswith("CWE-"):
+        diagnostic["codeDescription"] = {"href": CWE_URL.format(cwe[4:])}
+    if len(line_numbers) > 1:
+        diagnostic["relatedInformation"] = [
+            {
+                "location": {"uri": document.uri, "range": document.line_range(line_number)},
+                "message": finding["issue"],
+            }
+            for line_number in line_numbers[1:]
+        ]
+    return diagnostic
+
+
+class LanguageServer:
+    def __init__(self, reader, writer, debounce_seconds: float = LSP_DEBOUNCE_MS / 1000):
+        self.reader = reader
+        self.writer = writer
+        self.debounce_seconds = debounce_seconds
+        self.documents: Dict[str, Document] = {}
+        self.root: Optional[str] = None
+        # Memory-only caches: parsed imports by content hash, function summaries by body
+        self.dependency_cache = DependencyCache(cache_dir=None)
+        self.memo = FunctionMemo()
+        # Imported files that are not open, as path -> (mtime, text)
+        self._disk_sources: Dict[str, Tuple[int, str]] = {}
+        self._timers: Dict[str, threading.Timer] = {}
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        # One analysis at a time; a newer edit simply makes the running one moot
+        self._analysis_lock = threading.Lock()
+        self._shutdown = False
+
+    # ---- transport ----
+
+    def read_message(self) -> Optional[Dict[str, Any]]:
+        length = None
+        while True:
+            header = self.reader.readline()
+            if not header:
+                return None
+            header = header.strip()
+            if not header:
+                break
+            name, _, value = header.decode("ascii").partition(":")
+            if name.lower() == "content-length":
+                length = int(value)
+        if length is None:
+            return {}
+        return json.loads(self.reader.read(length).decode("utf-8"))
+
+    def send(self, message: Dict[str, Any]):
+        body = json.dumps(dict(message, jsonrpc="2.0"), ensure_ascii=False).encode("utf-8")
+        with self._write_lock:
+            self.writer.write(b"Content-Length: %d\r\n\r\n" % len(body) + body)
+            self.writer.flush()
+
+    def notify(self, method: str, params: Dict[str, Any]):
+        self.send({"method": method, "params": params})
+
+    # ---- protocol ----
+
+    def initialize(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        root_uri = params.get("rootUri")
+        if root_uri:
+            self.root = uri_to_path(root_uri)
+        elif params.get("rootPath"):
+            self.root = params["rootPath"]
+        return {
+            "capabilities": {
+                # openClose, incremental changes, save notifications
+                "textDocumentSync": {"openClose": True, "change": 2, "save": {"includeText": False}},
+            },
+            "serverInfo": {"name": SERVER_NAME},
+        }
+
+    def did_open(self, params: Dict[str, Any]):
+        item = params["textDocument"]
+        with self._lock:
+            self.documents[item["uri"]] = Document(item["uri"], item.get("version", 0), item["text"])
+        self.schedule(item["uri"], delay=0)
+
+    def did_change(self, params: Dict[str, Any]):
+        uri = params["textDocument"]["uri"]
+        with self._lock:
+            document = self.documents.get(uri)
+            if document is None:
+                return
+            for change in params["contentChanges"]:
+                document.apply_change(change)
+            document.version = params["textDocument"].get("version", document.version + 1)
+        self.schedule(uri)
+
+    def did_save(self, params: Dict[str, Any]):
+        self.schedule(params["textDocument"]["uri"], delay=0)
+
+    def did_close(self, params: Dict[str, Any]):
+        uri = params["textDocument"]["uri"]
+        with self._lock:
+            self.documents.pop(uri, None)
+            timer = self._timers.pop(uri, None)
+        if timer is not None:
+            timer.cancel()
+        self.notify("textDocument/publishDiagnostics", {"uri": uri, "diagnostics": []})
+
+    # ---- analysis ----
+
+    def schedule(self, uri: str, delay: Optional[float] = None):
+        """(Re)start the debounce timer of a document"""
+        timer = threading.Timer(self.debounce_seconds if delay is None else delay, self.analyze, args=(uri,))
+        timer.daemon = True
+        with self._lock:
+            previous = self._timers.pop(uri, None)
+            self._timers[uri] = timer
+        if previous is not None:
+            previous.cancel()
+        timer.start()
+
+    def _read_disk_source(self, path: str) -> Optional[str]:
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        cached = self._disk_sources.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        try:
+            with open(path, encoding="utf-8", errors="replace") as f:
+                text = f.read()
+        except OSError:
+            return None
+        self._disk_sources[path] = (mtime, text)
+        return text
+
+    def _import_candidates(self, importer: str, target: str) -> List[str]:
+        if target.startswith("."):
+            return [os.path.normpath(os.path.join(os.path.dirname(importer), target))]
+        if self.root is None:
+            return []
+        return [os.path.normpath(os.path.join(self.root, base, target)) for base in PACKAGE_DIRS]
+
+    def project_sources(self, document: Document, text: str) -> Dict[str, str]:
+        """
+        The document plus everything its imports reach: open documents with their
+        unsaved text, other files from disk (re-read only when they changed)
+        """
+        with self._lock:
+            open_texts = {doc.path: doc.text for doc in self.documents.values() if doc is not document}
+        sources = {document.path: text}
+        pending = [document.path]
+        while pending:
+            importer = pending.pop()
+            for target in self.dependency_cache.get(sources[importer]).imports:
+                for candidate in self._import_candidates(importer, target):
+                    if candidate in sources:
+                        break
+                    code = open_texts.get(candidate)
+                    if code is None:
+                        code = self._read_disk_source(candidate)
+                    if code is not None:
+                        sources[candidate] = code
+                        pending.append(candidate)
+                        break
+        return sources
+
+    def analyze(self, uri: str):
+        with self._analysis_lock:
+            with self._lock:
+                self._timers.pop(uri, None)
+                document = self.documents.get(uri)
+                if document is None:
+                    return
+                version, text = document.version, document.text
+
+            start = time.perf_counter()
+            try:
+                project = Project(self.project_sources(document, text), cache=self.dependency_cache)
+                analyzer = SmartContractAnalyzer(
+                    text, scope=project.scope_for(document.path), memo=self.memo
+                )
+                findings = list(analyzer.iter_findings(detailed=False))
+            except Exception:
+                logger.exception("Analysis failed", extra={"fields": {"uri": uri}})
+                return
+
+            with self._lock:
+                # A newer edit is already waiting for its own analysis
+                if self.documents.get(uri) is not document or document.version != version:
+                    return
+                diagnostics = [to_diagnostic(document, finding) for finding in findings]
+            self.notify("textDocument/publishDiagnostics", {
+                "uri": uri, "version": version, "diagnostics": diagnostics
+            })
+            logger.debug("Published diagnostics", extra={"fields": {
+                "uri": uri,
+                "version": version,
+                "diagnostics": len(diagnostics),
+                "ms": round((time.perf_counter() - start) * 1000, 1),
+            }})
+
+    # ---- main loop ----
+
+    def handle(self, message: Dict[str, Any]) -> bool:
+        """Dispatch one message; returns False once the client asked to exit"""
+        method = message.get("method")
+        params = message.get("params") or {}
+        request_id = message.get("id")
+
+        if method == "exit":
+            return False
+        if method == "initialize":
+            self.send({"id": request_id, "result": self.initialize(params)})
+        elif method == "shutdown":
+            self._shutdown = True
+            self.send({"id": request_id, "result": None})
+        elif method in self.NOTIFICATIONS:
+            if not self._shutdown:
+                self.NOTIFICATIONS[method](self, params)
+        elif method is not None and request_id is not None:
+            self.send({"id": request_id, "error": {"code": METHOD_NOT_FOUND, "message": f"Unhandled method {method}"}})
+        # Other notifications (initialized, $/cancelRequest, ...) need no answer
+        return True
+
+    NOTIFICATIONS = {
+        "textDocument/didOpen": did_open,
+        "textDocument/didChange": did_change,
+        "textDocument/didSave": did_save,
+        "textDocument/didClose": did_close,
+    }
+
+    def serve(self) -> int:
+        while True:
+            message = self.read_message()
+            if message is None:
+                break
+            try:
+                if not self.handle(message):
+                    break
+            except Exception:
+                logger.exception("Message handling failed", extra={"fields": {"method": message.get("method")}})
+                if message.get("id") is not None and message.get("method"):
+                    self.send({"id": message["id"], "error": {"code": INTERNAL_ERROR, "message": "Internal error"}})
+        # Per the spec: exit code 0 only after a shutdown request
+        return 0 if self._shutdown else 1
+
+
+def main():
+    # stdout carries the protocol: logs (and any stray print) go to stderr
+    protocol_out = sys.stdout.buffer
+    for handler in logging.getLogger(ROOT_LOGGER).handlers:
+        if isinstance(handler, logging.StreamHandler):
+            handler.setStream(sys.stderr)
+    sys.stdout = sys.stderr
+    server = LanguageServer(sys.stdin.buffer, protocol_out)
+    sys.exit(server.serve())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# D:\My_Work\smartShiledAI\backend\app\scanner\memory.py
+import os
+import threading
+import tracemalloc
+
+STATM_PATH = "/proc/self/statm"
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+# Probes running at once share tracemalloc; the last one to stop turns it off
+_tracing_lock = threading.Lock()
+_tracing_probes = 0
+_started_tracing = False
+
+
+class MemoryProbe:
+    """
+    Memory used by one scan, measured as growth over the usage at start().
+    Reads resident memory from /proc where available (near-zero overhead);
+    elsewhere falls back to tracemalloc, which is exact but slows allocation.
+    Both are process-wide, so scans running at the same time in the worker add to
+    each other's numbers while they overlap.
+    """
+
+    def __init__(self):
+        self.use_proc = os.path.exists(STATM_PATH)
+        self.baseline = 0
+        self.peak = 0
+        self._tracing = False
+
+    def _current(self) -> int:
+        if self.use_proc:
+            with open(STATM_PATH, "r") as f:
+                return int(f.read().split()[1]) * PAGE_SIZE
+        return tracemalloc.get_traced_memory()[0]
+
+    def start(self):
+        global _tracing_probes, _started_tracing
+        if not self.use_proc:
+            with _tracing_lock:
+                if _tracing_probes == 0 and not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                    _started_tracing = True
+                _tracing_probes += 1
+            self._tracing = True
+        self.baseline = self._current()
+        self.peak = 0
+
+    def sample(self) -> int:
+        """Current usage above baseline; also updates the recorded peak"""
+        used = max(0, self._current() - self.baseline)
+        self.peak = max(self.peak, used)
+        return used
+
+    def stop(self) -> int:
+        global _tracing_probes, _started_tracing
+        self.sample()
+        if self._tracing:
+            self._tracing = False
+            with _tracing_lock:
+                _tracing_probes -= 1
+                if _tracing_probes == 0 and _started_tracing:
+                    tracemalloc.stop()
+                    _started_tracing = False
+        return self.peak
@@ -0,0 +1,101 @@
+# D:\My_Work\smartShiledAI\backend\app\scanner\patterns.py
+import os
+import re
+import threading
+from typing import Dict, List, Optional, Pattern, Tuple, Union
+from dotenv import load_dotenv
+
+try:
+    import re2
+except ImportError:  # optional linear-time engine (pip install google-re2)
+    re2 = None
+
+# Load environment variables
+load_dotenv()
+
+# "auto" runs whole-source searches on RE2 when it is installed, "re" never uses it
+REGEX_ENGINE = os.getenv("REGEX_ENGINE", "auto")
+
+AnyStr = Union[str, bytes]
+
+# Constructs RE2 does not implement (lookaround, backreferences, atomic groups)
+RE2_UNSUPPORTED = re.compile(r'\(\?<?[=!]|\(\?>|\\[1-9]')
+
+
+def _compile_linear(pattern: AnyStr, flags: int):
+    """
+    RE2 version of pattern (time linear in the input, no catastrophic backtracking),
+    or None if RE2 is unavailable or lacks a construct the pattern uses.
+    """
+    if re2 is None or REGEX_ENGINE == "re" or flags & ~re.IGNORECASE:
+        return None
+    text = pattern.decode('latin-1') if isinstance(pattern, bytes) else pattern
+    if RE2_UNSUPPORTED.search(text):
+        return None
+    if flags & re.IGNORECASE:
+        pattern = (b'(?i)' if isinstance(pattern, bytes) else '(?i)') + pattern
+    try:
+        return re2.compile(pattern)
+    except re2.error:
+        return None
+
+
+class PatternCache:
+    """
+    Compiled regexes keyed by (pattern, flags, linear).
+    re keeps its own cache, but it is small and shared with every other module, so
+    analyzers building patterns per name kept recompiling; this one is sized for the
+    scanner and counts hits/misses so that churn is visible.
+
+    linear=True asks for the RE2 engine, for searches over a whole (attacker supplied)
+    source, where one backtracking pattern could otherwise pin a worker. Per-line
+    searches stay on re: lines are capped in length and re is far cheaper per call.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._patterns: Dict[Tuple[AnyStr, int, bool], Pattern] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def compile(self, pattern: AnyStr, flags: int = 0, linear: bool = False) -> Pattern:
+        key = (pattern, flags, linear)
+        # Hits skip the lock: a dict lookup is atomic and the counters are only indicative
+        compiled = self._patterns.get(key)
+        if compiled is not None:
+            self.hits += 1
+            return compiled
+
+        compiled = (_compile_linear(pattern, flags) if linear else None) or re.compile(pattern, flags)
+        with self._lock:
+            self.misses += 1
+            self._patterns[key] = compiled
+            # Oldest first; analyzer patterns are few and long lived, so FIFO is enough
+            while len(self._patterns) > self.max_entries:
+                self._patterns.pop(next(iter(self._patterns)))
+        return compiled
+
+    def search(self, pattern: AnyStr, text: AnyStr, flags: int = 0, linear: bool = False) -> Optional[re.Match]:
+        return self.compile(pattern, flags, linear).search(text)
+
+    def findall(self, pattern: AnyStr, text, flags: int = 0, linear: bool = False) -> List:
+        """re.findall results, built from finditer since RE2's findall cannot read an mmap"""
+        compiled = self.compile(pattern, flags, linear)
+        groups = compiled.groups
+        return [
+            match.group(0) if groups == 0 else match.group(1) if groups == 1 else match.groups()
+            for match in compiled.finditer(text)
+        ]
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._patterns)}
+
+
+def alternation(names, prefix: str = '', suffix: str = '') -> str:
+    """One pattern matching any of names (longest first), captured as group 1"""
+    escaped = sorted((re.escape(name) for name in names), key=len, reverse=True)
+    return prefix + '(' + '|'.join(escaped) + ')' + suffix
+
+
+pattern_cache = PatternCache()
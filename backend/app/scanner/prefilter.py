@@ -0,0 +1,31 @@
+# D:\My_Work\smartShiledAI\backend\app\scanner\prefilter.py
+from typing import Dict, Iterable, List
+
+
+class LiteralPrefilter:
+    """
+    Which rule literals (selfdestruct, tx.origin, .call, ...) occur on which lines.
+    Built once per scan before any rule runs, so a rule can skip the file when none
+    of its literals are present and otherwise only regex its candidate lines.
+    """
+
+    def __init__(self, source, literals: Iterable[str]):
+        self._lines: Dict[str, List[int]] = {
+            literal: source.literal_lines(literal) for literal in set(literals)
+        }
+
+    def contains_any(self, literals: Iterable[str]) -> bool:
+        return any(self._lines[literal] for literal in literals)
+
+    def lines_for(self, literals: Iterable[str]) -> List[int]:
+        """Sorted line numbers containing at least one of literals"""
+        literals = list(literals)
+        if len(literals) == 1:
+            return self._lines[literals[0]]
+        found = set()
+        for literal in literals:
+            found.update(self._lines[literal])
+        return sorted(found)
+
+    def stats(self) -> Dict[str, int]:
+        return {literal: len(lines) for literal, lines in self._lines.items()}
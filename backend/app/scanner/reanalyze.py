@@ -0,0 +1,220 @@
+# D:\My_Work\smartShiledAI\backend\app\scanner\reanalyze.py
+import os
+import time
+import signal
+import argparse
+import threading
+from datetime import datetime
+from itertools import islice
+from typing import Dict, Any, List, Optional, Tuple
+from dotenv import load_dotenv
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.database.connection import SessionLocal
+from app.database.models import ReportAnalysis
+from app.scanner.analyzer import (
+    SmartContractAnalyzer, analyze_smart_contract, decode_source, BOUNDED_ANALYSIS_THRESHOLD, ANALYSIS_MEMORY_LIMIT
+)
+from app.scanner.imports import Project, read_project_archive
+from app.scanner.report_index import index_report, reanalysis_progress
+from app.scanner.rules import RULESET_VERSION
+from app.storage.storage import upload_storage, report_storage
+from app.tracing.logs import get_logger
+
+# Load environment variables
+load_dotenv()
+
+# Fraction of one core the reanalyzer may use: after each report it sleeps long enough
+# to keep its busy time at this share of wall time
+REANALYSIS_CPU_SHARE = float(os.getenv("REANALYSIS_CPU_SHARE", "0.1"))
+# Process niceness, so the OS scheduler always prefers the API workers
+REANALYSIS_NICE = int(os.getenv("REANALYSIS_NICE", "19"))
+REANALYSIS_BATCH_SIZE = int(os.getenv("REANALYSIS_BATCH_SIZE", "20"))
+# Seconds to wait before looking again once nothing is stale
+REANALYSIS_IDLE_SECONDS = float(os.getenv("REANALYSIS_IDLE_SECONDS", "60"))
+# A report that failed this often (e.g. its upload is gone) is left alone
+REANALYSIS_MAX_FAILURES = int(os.getenv("REANALYSIS_MAX_FAILURES", "3"))
+
+REPORT_SUFFIX = "_report.json"
+BACKFILL_CHUNK_SIZE = 500
+PROGRESS_INTERVAL_SECONDS = 30
+
+logger = get_logger("reanalyze")
+
+
+def _is_detailed(report: Dict[str, Any]) -> bool:
+    """Whether a stored report was made with detailed=True (findings carry code snippets)"""
+    findings = report.get("vulnerabilities") or []
+    return not findings or "code_snippet" in findings[0]
+
+
+class Reanalyzer:
+    """Re-runs the current ruleset on stale reports from their stored uploads, at low priority"""
+
+    def __init__(self, cpu_share: float = REANALYSIS_CPU_SHARE, batch_size: int = REANALYSIS_BATCH_SIZE):
+        self.cpu_share = min(max(cpu_share, 0.01), 1.0)
+        self.batch_size = batch_size
+        self.stop_event = threading.Event()
+        # The project archive last read, as (source_file, sources); a project's reports
+        # sit next to each other in the queue
+        self._project: Optional[Tuple[str, Dict[str, str]]] = None
+
+    # ---- finding work ----
+
+    def backfill(self, db: Session) -> int:
+        """
+        Index stored reports that have no report_analyses row yet (written before
+        reports were stamped). Idempotent, so an interrupted backfill just runs again.
+        """
+        added = 0
+        keys = report_storage.iter_keys_sync(REPORT_SUFFIX)
+        while not self.stop_event.is_set():
+            chunk = list(islice(keys, BACKFILL_CHUNK_SIZE))
+            if not chunk:
+                break
+            known = {
+                report_id for (report_id,) in
+                db.query(ReportAnalysis.report_id).filter(ReportAnalysis.report_id.in_(chunk))
+            }
+            for report_id in chunk:
+                if report_id in known:
+                    continue
+                try:
+                    index_report(db, report_id, report_storage.read_json_sync(report_id))
+                    added += 1
+                except (OSError, ValueError, KeyError):
+                    db.rollback()
+                    logger.exception("Backfill failed", extra={"fields": {"report": report_id}})
+        return added
+
+    def stale_batch(self, db: Session) -> List[str]:
+        """Next stale reports: recently viewed first, then newest"""
+        rows = (
+            db.query(ReportAnalysis.report_id)
+            .filter(
+                or_(ReportAnalysis.ruleset_version.is_(None), ReportAnalysis.ruleset_version < RULESET_VERSION),
+                ReportAnalysis.failures < REANALYSIS_MAX_FAILURES
+            )
+            .order_by(ReportAnalysis.last_viewed_at.desc().nullslast(), ReportAnalysis.id.desc())
+            .limit(self.batch_size)
+        )
+        return [report_id for (report_id,) in rows]
+
+    # ---- re-analysis ----
+
+    def _analyze_contract(self, source_file: str, detailed: bool) -> Dict[str, Any]:
+        stat = upload_storage.stat_sync(source_file)
+        if stat is None:
+            raise FileNotFoundError(source_file)
+        path = upload_storage.local_path(source_file)
+        if stat.size > BOUNDED_ANALYSIS_THRESHOLD and path is not None:
+            analyzer = SmartContractAnalyzer.from_file(path, memory_limit_bytes=ANALYSIS_MEMORY_LIMIT)
+            try:
+                return analyzer.analyze(detailed=detailed)
+            finally:
+                analyzer.source.close()
+        return analyze_smart_contract(decode_source(upload_storage.read_bytes_sync(source_file)), detailed=detailed)
+
+    def _analyze_project_file(self, source_file: str, path: str, detailed: bool) -> Dict[str, Any]:
+        if self._project is None or self._project[0] != source_file:
+            self._project = (source_file, read_project_archive(upload_storage.read_bytes_sync(source_file)))
+        project = Project(self._project[1])
+        if path not in project.sources:
+            raise FileNotFoundError(f"{path} in {source_file}")
+        analyzer = SmartContractAnalyzer(project.sources[path], scope=project.scope_for(path))
+        return analyzer.analyze(detailed=detailed)
+
+    def reanalyze(self, db: Session, report_id: str):
+        """Re-run the current ruleset on the source of one stored report and store the result"""
+        full_report = report_storage.read_json_sync(report_id)
+        detailed = _is_detailed(full_report["report"])
+        # Single uploads are stored as <timestamp>_<name>.sol next to <timestamp>_<name>_report.json
+        source_file = full_report.get("source_file") or report_id.replace(REPORT_SUFFIX, ".sol")
+
+        if full_report.get("project"):
+            report = self._analyze_project_file(source_file, full_report["filename"], detailed)
+        else:
+            report = self._analyze_contract(source_file, detailed)
+
+        full_report["report"] = report
+        full_report["ruleset_version"] = RULESET_VERSION
+        full_report["reanalyzed_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        report_storage.write_json_sync(report_id, full_report)
+        index_report(db, report_id, full_report)
+
+    def _record_failure(self, db: Session, report_id: str, error: Exception):
+        db.rollback()
+        row = db.query(ReportAnalysis).filter(ReportAnalysis.report_id == report_id).first()
+        if row is not None:
+            row.failures = (row.failures or 0) + 1
+            row.last_error = str(error)[:500]
+            db.commit()
+
+    # ---- main loop ----
+
+    def _throttle(self, busy_seconds: float):
+        """Sleep so that busy time stays at cpu_share of the elapsed time"""
+        if self.cpu_share < 1.0:
+            self.stop_event.wait(busy_seconds * (1.0 - self.cpu_share) / self.cpu_share)
+
+    def run(self, once: bool = False):
+        db = SessionLocal()
+        try:
+            added = self.backfill(db)
+            logger.info("Reanalysis backfill finished", extra={"fields": {"indexed": added}})
+            done = failed = 0
+            last_logged = time.monotonic()
+            while not self.stop_event.is_set():
+                batch = self.stale_batch(db)
+                if not batch:
+                    if once:
+                        break
+                    self.stop_event.wait(REANALYSIS_IDLE_SECONDS)
+                    continue
+
+                for report_id in batch:
+                    if self.stop_event.is_set():
+                        break
+                    start = time.perf_counter()
+                    try:
+                        self.reanalyze(db, report_id)
+                        done += 1
+                    except Exception as e:
+                        failed += 1
+                        logger.exception("Reanalysis failed", extra={"fields": {"report": report_id}})
+                        self._record_failure(db, report_id, e)
+                    self._throttle(time.perf_counter() - start)
+
+                if time.monotonic() - last_logged >= PROGRESS_INTERVAL_SECONDS:
+                    last_logged = time.monotonic()
+                    logger.info("Reanalysis progress", extra={"fields": dict(
+                        reanalysis_progress(db), reanalyzed=done, failed_now=failed
+                    )})
+            logger.info("Reanalysis stopped", extra={"fields": dict(reanalysis_progress(db), reanalyzed=done)})
+        finally:
+            db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Re-analyze stored reports made by an older ruleset, recently viewed first; "
+                    "progress is kept in the database, so a restart continues where it stopped"
+    )
+    parser.add_argument("--cpu-share", type=float, default=REANALYSIS_CPU_SHARE, help="fraction of one core to use")
+    parser.add_argument("--batch-size", type=int, default=REANALYSIS_BATCH_SIZE, help="reports fetched per queue query")
+    parser.add_argument("--once", action="store_true", help="exit once nothing is stale instead of waiting")
+    args = parser.parse_args()
+
+    if REANALYSIS_NICE and hasattr(os, "nice"):
+        os.nice(REANALYSIS_NICE)
+
+    reanalyzer = Reanalyzer(cpu_share=args.cpu_share, batch_size=args.batch_size)
+    # Finish the current report on shutdown; everything after it stays queued
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: reanalyzer.stop_event.set())
+    reanalyzer.run(once=args.once)
+
+
+if __name__ == "__main__":
+    main()
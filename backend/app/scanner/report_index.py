@@ -0,0 +1,227 @@
+# D:\My_Work\smartShiledAI\backend\app\scanner\report_index.py
+import os
+import re
+import json
+from datetime import datetime
+from typing import List, Dict, Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.database.models import ScanReport, ReportFinding, ReportAnalysis
+from app.scanner.fingerprint import fingerprint_from_stored
+from app.scanner.rollups import apply_rollup_change, contribution
+from app.scanner.rules import RULESET_VERSION
+from app.scanner.search_index import index_report_findings
+from app.storage.storage import Storage
+
+# Stored reports are <YYYYmmdd_HHMMSS>_<name>_report.json. Storage keys only use the
+# basename, so anything else (x/<id>, a\\<id>) would index the same file under a second id
+REPORT_ID_PATTERN = re.compile(r'\d{8}_\d{6}_[^/\\]+_report\.json')
+
+
+def is_report_id(report_id: str) -> bool:
+    """Whether report_id is the canonical key of a stored report"""
+    return (
+        os.path.basename(report_id) == report_id
+        and REPORT_ID_PATTERN.fullmatch(report_id) is not None
+    )
+
+
+def _set_scores(row: ScanReport, report: dict):
+    summary = report["summary"]
+    readiness = report["deployment_readiness"]
+    row.security_score = report["security_score"]
+    row.critical = summary.get("critical", 0)
+    row.high = summary.get("high", 0)
+    row.medium = summary.get("medium", 0)
+    row.low = summary.get("low", 0)
+    row.info = summary.get("info", 0)
+    row.total = summary.get("total", 0)
+    row.can_deploy = readiness["can_deploy"]
+    row.risk_level = readiness.get("risk_level")
+
+
+def index_report(db: Session, report_id: str, full_report: dict) -> ScanReport:
+    """Insert or refresh the summary row of a stored report"""
+    report = full_report["report"]
+
+    row = db.query(ScanReport).filter(ScanReport.report_id == report_id).first()
+    before = None
+    if row is None:
+        row = ScanReport(report_id=report_id)
+        db.add(row)
+    else:
+        before = contribution(row)
+
+    row.uploaded_by = full_report["uploaded_by"]
+    row.filename = full_report["filename"]
+    row.contract_name = full_report.get("contract_name")
+    row.uploaded_at = full_report.get("uploaded_at")
+    _set_scores(row, report)
+    # Dashboard rollups change by the difference, in the same transaction
+    apply_rollup_change(db, before, contribution(row))
+    _set_ruleset(db, report_id, full_report.get("ruleset_version"))
+
+    # Findings are replaced wholesale, a report's findings only change on re-analysis
+    db.query(ReportFinding).filter(ReportFinding.report_id == report_id).delete()
+    db.add_all([
+        ReportFinding(
+            report_id=report_id,
+            fingerprint=fingerprint_from_stored(vuln),
+            rule_id=vuln.get("rule_id"),
+            issue=vuln.get("issue"),
+            severity=vuln.get("severity"),
+            line_numbers=json.dumps(vuln.get("line_numbers", []))
+        )
+        for vuln in report["vulnerabilities"]
+    ])
+    db.commit()
+    index_report_findings(report_id, full_report)
+    return row
+
+
+def _analysis_row(db: Session, report_id: str) -> ReportAnalysis:
+    row = db.query(ReportAnalysis).filter(ReportAnalysis.report_id == report_id).first()
+    if row is None:
+        row = ReportAnalysis(report_id=report_id, failures=0)
+        db.add(row)
+    return row
+
+
+def _set_ruleset(db: Session, report_id: str, ruleset_version: Optional[int]):
+    row = _analysis_row(db, report_id)
+    row.ruleset_version = ruleset_version
+    if ruleset_version is not None:
+        row.analyzed_at = datetime.utcnow()
+        row.failures = 0
+        row.last_error = None
+
+
+def record_view(db: Session, report_id: str):
+    """Remember that a report was just viewed (re-analysis does recently viewed reports first)"""
+    _analysis_row(db, report_id).last_viewed_at = datetime.utcnow()
+    db.commit()
+
+
+def reanalysis_progress(db: Session) -> Dict:
+    """How many indexed reports the current ruleset produced, and how many are still stale"""
+    total = db.query(func.count(ReportAnalysis.id)).scalar()
+    current = db.query(func.count(ReportAnalysis.id)).filter(ReportAnalysis.ruleset_version == RULESET_VERSION).scalar()
+    failed = db.query(func.count(ReportAnalysis.id)).filter(ReportAnalysis.failures > 0).scalar()
+    return {"ruleset_version": RULESET_VERSION, "current": current, "stale": total - current, "failed": failed}
+
+
+def index_scores(db: Session, report_id: str, full_report: dict) -> ScanReport:
+    """Refresh only the score, summary and readiness of a report (its findings are unchanged)"""
+    row = db.query(ScanReport).filter(ScanReport.report_id == report_id).first()
+    if row is None:
+        return index_report(db, report_id, full_report)
+    before = contribution(row)
+    _set_scores(row, full_report["report"])
+    apply_rollup_change(db, before, contribution(row))
+    db.commit()
+    return row
+
+
+def report_summary(row: ScanReport) -> Dict:
+    """Dashboard summary of one report (score, counts, readiness)"""
+    return {
+        "report_id": row.report_id,
+        "filename": row.filename,
+        "contract_name": row.contract_name,
+        "uploaded_at": row.uploaded_at,
+        "security_score": row.security_score,
+        "summary": {
+            "critical": row.critical,
+            "high": row.high,
+            "medium": row.medium,
+            "low": row.low,
+            "info": row.info,
+            "total": row.total
+        },
+        "deployment_readiness": {
+            "can_deploy": row.can_deploy,
+            "risk_level": row.risk_level
+        }
+    }
+
+
+def _backfill(db: Session, storage: Storage, report_id: str) -> Optional[ScanReport]:
+    """Index a report written before the index existed (parses its JSON once)"""
+    if not is_report_id(report_id):
+        return None
+    try:
+        full_report = storage.read_json_sync(report_id)
+        return index_report(db, report_id, full_report)
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def get_indexed_report(db: Session, storage: Storage, report_id: str) -> Optional[ScanReport]:
+    """Index row of a report, indexing it from its JSON file if needed"""
+    if not is_report_id(report_id):
+        return None
+    row = db.query(ScanReport).filter(ScanReport.report_id == report_id).first()
+    return row or _backfill(db, storage, report_id)
+
+
+def _finding_entry(finding: ReportFinding) -> Dict:
+    return {
+        "fingerprint": finding.fingerprint,
+        "rule_id": finding.rule_id,
+        "issue": finding.issue,
+        "severity": finding.severity,
+        "line_numbers": json.loads(finding.line_numbers or "[]")
+    }
+
+
+def diff_reports(db: Session, base_id: str, target_id: str) -> Dict:
+    """
+    New, fixed and persisting findings between two indexed reports,
+    matched on stored fingerprints (no re-analysis).
+    """
+    findings = db.query(ReportFinding).filter(ReportFinding.report_id.in_([base_id, target_id])).all()
+    base = {f.fingerprint: f for f in findings if f.report_id == base_id}
+    target = {f.fingerprint: f for f in findings if f.report_id == target_id}
+
+    new = [_finding_entry(target[fp]) for fp in target if fp not in base]
+    fixed = [_finding_entry(base[fp]) for fp in base if fp not in target]
+    persisting = []
+    for fp in target:
+        if fp in base:
+            entry = _finding_entry(target[fp])
+            entry["base_line_numbers"] = json.loads(base[fp].line_numbers or "[]")
+            persisting.append(entry)
+
+    return {
+        "base": base_id,
+        "target": target_id,
+        "summary": {"new": len(new), "fixed": len(fixed), "persisting": len(persisting)},
+        "new": new,
+        "fixed": fixed,
+        "persisting": persisting
+    }
+
+
+def get_report_summaries(db: Session, storage: Storage, report_ids: List[str], user_email: str) -> Dict:
+    """
+    Summaries for report_ids owned by user_email, in request order, in one query.
+    IDs that don't exist or belong to someone else are returned under "missing".
+    """
+    wanted = list(dict.fromkeys(report_ids))
+    missing = [report_id for report_id in wanted if not is_report_id(report_id)]
+    wanted = [report_id for report_id in wanted if is_report_id(report_id)]
+    rows = {
+        row.report_id: row
+        for row in db.query(ScanReport).filter(ScanReport.report_id.in_(wanted)).all()
+    }
+
+    summaries = []
+    for report_id in wanted:
+        row = rows.get(report_id) or _backfill(db, storage, report_id)
+        if row is None or row.uploaded_by != user_email:
+            missing.append(report_id)
+        else:
+            summaries.append(report_summary(row))
+
+    return {"reports": summaries, "missing": missing}
@@ -0,0 +1,160 @@
+# D:\My_Work\smartShiledAI\backend\app\scanner\rescore.py
+import os
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from itertools import islice
+from typing import Dict, Iterator, List, Optional
+
+from app.scanner.scoring import ScoringPolicy
+from app.storage.storage import Storage, get_storage, REPORTS_DIR
+from app.tracing.logs import get_logger
+
+REPORT_SUFFIX = "_report.json"
+
+# Reports per task handed to a worker, and tasks queued per worker: at most
+# workers * MAX_PENDING_PER_WORKER * BATCH_SIZE report ids are held at any time
+BATCH_SIZE = 50
+MAX_PENDING_PER_WORKER = 2
+PROGRESS_INTERVAL_SECONDS = 5
+
+logger = get_logger("rescore")
+
+
+class Rescorer:
+    """Rescores reports one at a time (each worker process holds one)"""
+
+    def __init__(self, policy: ScoringPolicy, dry_run: bool = False, index: bool = True):
+        self.policy = policy
+        self.dry_run = dry_run
+        self.index = index
+        self.storage: Storage = get_storage("reports", REPORTS_DIR)
+        self._db = None
+
+    def _index_scores(self, report_id: str, full_report: dict):
+        # Imported here: the database modules need DATABASE_URL, --no-index runs don't
+        from app.database.connection import SessionLocal
+        from app.scanner.report_index import index_scores
+        if self._db is None:
+            self._db = SessionLocal()
+        index_scores(self._db, report_id, full_report)
+
+    def rescore(self, report_id: str) -> str:
+        """Rescore one report; returns the outcome (rescored, unchanged or failed)"""
+        try:
+            full_report = self.storage.read_json_sync(report_id)
+            if not self.policy.apply(full_report["report"]):
+                return "unchanged"
+            if not self.dry_run:
+                self.storage.write_json_sync(report_id, full_report)
+                if self.index:
+                    self._index_scores(report_id, full_report)
+            return "rescored"
+        except Exception:
+            logger.exception("Rescoring failed", extra={"fields": {"report": report_id}})
+            if self._db is not None:
+                self._db.rollback()
+            return "failed"
+
+    def rescore_batch(self, report_ids: List[str]) -> Dict[str, int]:
+        counts = {"rescored": 0, "unchanged": 0, "failed": 0}
+        for report_id in report_ids:
+            counts[self.rescore(report_id)] += 1
+        return counts
+
+
+# Set in each worker process by _init_worker
+_worker: Optional[Rescorer] = None
+
+
+def _init_worker(policy: ScoringPolicy, dry_run: bool, index: bool):
+    global _worker
+    _worker = Rescorer(policy, dry_run=dry_run, index=index)
+
+
+def _rescore_batch(report_ids: List[str]) -> Dict[str, int]:
+    return _worker.rescore_batch(report_ids)
+
+
+def _batches(keys: Iterator[str], size: int) -> Iterator[List[str]]:
+    while batch := list(islice(keys, size)):
+        yield batch
+
+
+def rescore_all(
+    policy: ScoringPolicy,
+    workers: int = 1,
+    dry_run: bool = False,
+    index: bool = True,
+    batch_size: int = BATCH_SIZE
+) -> Dict[str, int]:
+    """
+    Rescore every stored report. Report ids are streamed from the storage listing and
+    handed out in batches, with a bounded number in flight, so memory stays flat however
+    many reports there are. Returns totals per outcome.
+    """
+    totals = {"rescored": 0, "unchanged": 0, "failed": 0}
+    start = last_logged = time.perf_counter()
+
+    def add(counts: Dict[str, int]):
+        nonlocal last_logged
+        for outcome, count in counts.items():
+            totals[outcome] += count
+        now = time.perf_counter()
+        if now - last_logged >= PROGRESS_INTERVAL_SECONDS:
+            last_logged = now
+            logger.info("Rescore progress", extra={"fields": dict(totals, seconds=round(now - start, 1))})
+
+    rescorer = Rescorer(policy, dry_run=dry_run, index=index)
+    batches = _batches(rescorer.storage.iter_keys_sync(REPORT_SUFFIX), batch_size)
+
+    if workers <= 1:
+        for batch in batches:
+            add(rescorer.rescore_batch(batch))
+        return totals
+
+    max_pending = workers * MAX_PENDING_PER_WORKER
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(policy, dry_run, index)) as pool:
+        pending = set()
+        for batch in batches:
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    add(future.result())
+            pending.add(pool.submit(_rescore_batch, batch))
+        for future in wait(pending).done:
+            add(future.result())
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Rescore stored reports from their persisted findings with the current scoring policy "
+                    "(no contract is re-analyzed)"
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes")
+    parser.add_argument("--policy", help="scoring policy JSON (default: SCORING_POLICY_PATH or the built-in policy)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="reports per worker task")
+    parser.add_argument("--dry-run", action="store_true", help="count changes without writing them")
+    parser.add_argument("--no-index", action="store_true", help="don't update the report index in the database")
+    args = parser.parse_args()
+
+    if args.policy:
+        with open(args.policy, encoding="utf-8") as f:
+            policy = ScoringPolicy.from_dict(json.load(f))
+    else:
+        policy = ScoringPolicy.from_env()
+
+    totals = rescore_all(
+        policy,
+        workers=args.workers,
+        dry_run=args.dry_run,
+        index=not args.no_index,
+        batch_size=args.batch_size
+    )
+    logger.info("Rescore finished", extra={"fields": dict(totals, policy_version=policy.version)})
+
+
+if __name__ == "__main__":
+    main()
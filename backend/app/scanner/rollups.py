@@ -0,0 +1,168 @@
+# D:\My_Work\smartShiledAI\backend\app\scanner\rollups.py
+import argparse
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional, Tuple
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.database.connection import Base, SessionLocal, engine
+from app.database.models import ScanReport, DailyRollup, UserRollup
+from app.scanner.scoring import SUMMARY_SEVERITIES
+from app.tracing.logs import get_logger
+
+ROLLUP_COUNTS = ["scans", "score_sum", "deployable"] + SUMMARY_SEVERITIES + ["findings"]
+MAX_DAYS = 366
+REBUILD_CHUNK_SIZE = 1000
+# Day of reports without a parseable upload timestamp: fixed, so taking back a report's
+# contribution always hits the row it was added to; outside every dashboard range
+UNKNOWN_DAY = "0000-00-00"
+
+logger = get_logger("rollups")
+
+Contribution = Tuple[str, str, Dict[str, int]]
+
+
+def report_day(uploaded_at: Optional[str]) -> str:
+    """Upload day of a report (uploaded_at is the YYYYmmdd_HHMMSS upload timestamp)"""
+    try:
+        return datetime.strptime((uploaded_at or "")[:8], "%Y%m%d").strftime("%Y-%m-%d")
+    except ValueError:
+        return UNKNOWN_DAY
+
+
+def contribution(row: ScanReport) -> Optional[Contribution]:
+    """What one indexed report adds to its owner's rollups, as (user, day, counts)"""
+    if row.uploaded_by is None or row.security_score is None:
+        return None
+    counts = {
+        "scans": 1,
+        "score_sum": row.security_score,
+        "deployable": 1 if row.can_deploy else 0,
+        "findings": row.total or 0,
+    }
+    for severity in SUMMARY_SEVERITIES:
+        counts[severity] = getattr(row, severity) or 0
+    return row.uploaded_by, report_day(row.uploaded_at), counts
+
+
+def _increment(db: Session, model, keys: Dict[str, str], delta: Dict[str, int]):
+    """Add delta to the counters of one rollup row, creating it if needed, atomically"""
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        insert = (postgresql if dialect == "postgresql" else sqlite).insert
+        statement = insert(model).values(**keys, **delta)
+        statement = statement.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={name: getattr(model, name) + statement.excluded[name] for name in delta},
+        )
+        db.execute(statement)
+        return
+    updated = (
+        db.query(model)
+        .filter_by(**keys)
+        .update({getattr(model, name): getattr(model, name) + value for name, value in delta.items()},
+                synchronize_session=False)
+    )
+    if not updated:
+        db.add(model(**keys, **{**dict.fromkeys(ROLLUP_COUNTS, 0), **delta}))
+
+
+def apply_rollup_change(db: Session, before: Optional[Contribution], after: Optional[Contribution]):
+    """Replace a report's contribution before with after (either may be None); no commit"""
+    deltas: Dict[Tuple[str, str], Dict[str, int]] = defaultdict(lambda: dict.fromkeys(ROLLUP_COUNTS, 0))
+    for item, sign in ((before, -1), (after, 1)):
+        if item is None:
+            continue
+        user, day, counts = item
+        for name, value in counts.items():
+            deltas[(user, day)][name] += sign * value
+
+    users: Dict[str, Dict[str, int]] = defaultdict(lambda: dict.fromkeys(ROLLUP_COUNTS, 0))
+    for (user, day), delta in deltas.items():
+        delta = {name: value for name, value in delta.items() if value}
+        if not delta:
+            continue
+        _increment(db, DailyRollup, {"uploaded_by": user, "day": day}, delta)
+        for name, value in delta.items():
+            users[user][name] += value
+    for user, delta in users.items():
+        delta = {name: value for name, value in delta.items() if value}
+        if delta:
+            _increment(db, UserRollup, {"uploaded_by": user}, delta)
+
+
+def _stats_entry(counts) -> Dict:
+    scans = counts.scans if counts is not None else 0
+    entry = {name: getattr(counts, name) if counts is not None else 0 for name in ROLLUP_COUNTS if name != "score_sum"}
+    entry["average_score"] = round(counts.score_sum / scans, 1) if scans else None
+    return entry
+
+
+def dashboard_stats(db: Session, user_email: str, days: int = 30) -> Dict:
+    """All-time totals and one entry per day for the last `days` days, read from the rollups"""
+    days = min(max(days, 1), MAX_DAYS)
+    today = date.today()
+    first = today - timedelta(days=days - 1)
+    rows = {
+        row.day: row
+        for row in db.query(DailyRollup).filter(
+            DailyRollup.uploaded_by == user_email,
+            DailyRollup.day >= first.isoformat(),
+            DailyRollup.day <= today.isoformat(),
+        )
+    }
+    totals = db.query(UserRollup).filter(UserRollup.uploaded_by == user_email).first()
+    series = []
+    for offset in range(days):
+        day = (first + timedelta(days=offset)).isoformat()
+        series.append(dict(day=day, **_stats_entry(rows.get(day))))
+    return {"totals": _stats_entry(totals), "days": series}
+
+
+def rebuild_rollups(db: Session) -> int:
+    """Recompute every rollup from scan_reports in one transaction (run it before serving traffic)"""
+    daily: Dict[Tuple[str, str], Dict[str, int]] = defaultdict(lambda: dict.fromkeys(ROLLUP_COUNTS, 0))
+    reports = 0
+    for row in db.query(ScanReport).yield_per(REBUILD_CHUNK_SIZE):
+        item = contribution(row)
+        if item is None:
+            continue
+        user, day, counts = item
+        for name, value in counts.items():
+            daily[(user, day)][name] += value
+        reports += 1
+
+    users: Dict[str, Dict[str, int]] = defaultdict(lambda: dict.fromkeys(ROLLUP_COUNTS, 0))
+    for (user, _), counts in daily.items():
+        for name, value in counts.items():
+            users[user][name] += value
+
+    db.query(DailyRollup).delete()
+    db.query(UserRollup).delete()
+    db.add_all([DailyRollup(uploaded_by=user, day=day, **counts) for (user, day), counts in daily.items()])
+    db.add_all([UserRollup(uploaded_by=user, **counts) for user, counts in users.items()])
+    db.commit()
+    return reports
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Dashboard rollups per user and day (--rebuild fills them for reports indexed before they existed)"
+    )
+    parser.add_argument("--rebuild", action="store_true", help="recompute all rollups from the report index")
+    args = parser.parse_args()
+    if not args.rebuild:
+        parser.error("nothing to do (use --rebuild)")
+
+    Base.metadata.create_all(bind=engine, tables=[DailyRollup.__table__, UserRollup.__table__])
+    db = SessionLocal()
+    try:
+        reports = rebuild_rollups(db)
+    finally:
+        db.close()
+    logger.info("Rollups rebuilt", extra={"fields": {"reports": reports}})
+
+
+if __name__ == "__main__":
+    main()
@@ -2,13 +2,47 @@
 
 import os
 import json
-from datetime import datetime
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
-from fastapi.responses import JSONResponse, FileResponse
+import time
+import signal
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Request, Query
+from fastapi.responses import JSONResponse, FileResponse, Response, StreamingResponse
+from fastapi.concurrency import run_in_threadpool, iterate_in_threadpool
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
 from app.auth.dependencies import get_current_user
-from app.database.models import User
-from app.scanner.analyzer import analyze_smart_contract
-from typing import Optional
+from app.database.connection import get_db, SessionLocal
+from app.ratelimit.dependencies import rate_limit
+from app.database.models import User, ScanReport
+from app.scanner.analyzer import (
+    SmartContractAnalyzer, project_analyzers, attach_code_snippets, decode_source,
+    BOUNDED_ANALYSIS_THRESHOLD, ANALYSIS_MEMORY_LIMIT
+)
+from app.scanner.sarif import to_sarif, SARIF_MEDIA_TYPE
+from app.scanner.source import InMemorySource, MappedSource
+from app.scanner.imports import read_project_archive, ArchiveTooLarge
+from app.scanner.report_index import (
+    index_report, get_report_summaries, get_indexed_report, diff_reports, record_view, reanalysis_progress,
+    is_report_id
+)
+from app.scanner.rollups import dashboard_stats, MAX_DAYS
+from app.scanner.rules import RULESET_VERSION
+from app.scanner.scheduler import scan_scheduler, choose_lane
+from app.scanner.search_index import search_index, MAX_RESULTS, SEVERITY_VALUES
+from app.schemas.report_schema import ReportBatchRequest, ReportExportRequest, MAX_EXPORT_REPORTS
+from app.storage.storage import upload_storage, report_storage, BACKEND_DIR, UPLOAD_DIR, REPORTS_DIR
+from app.tracing.tracer import tracer
+from app.tracing.logs import get_logger
+from app.scanner.http_cache import (
+    variant_etag, is_not_modified, not_modified_etag, not_modified_response, cached_json_response, cache_headers,
+    LRUCache
+)
+from typing import List, Optional, Tuple
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.lib import colors
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
@@ -21,34 +55,155 @@ from reportlab.graphics.charts.barcharts import VerticalBarChart
 from reportlab.graphics.widgets.markers import makeMarker
 import io
 import textwrap
+from functools import lru_cache
+import zipfile
+from xml.sax.saxutils import escape
 
 router = APIRouter(prefix="/scan", tags=["Smart Contract Scanner"])
+logger = get_logger("scanner")
 
-# Get the absolute path to the backend directory
-BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-UPLOAD_DIR = os.path.join(BACKEND_DIR, "uploads")
-REPORTS_DIR = os.path.join(BACKEND_DIR, "reports")
+logger.info("Scanner storage paths", extra={"fields": {
+    "backend_dir": BACKEND_DIR, "upload_dir": UPLOAD_DIR, "reports_dir": REPORTS_DIR
+}})
 
-# Print paths for debugging (remove in production)
-print(f"BACKEND_DIR: {BACKEND_DIR}")
-print(f"UPLOAD_DIR: {UPLOAD_DIR}")
-print(f"REPORTS_DIR: {REPORTS_DIR}")
+UPLOAD_CHUNK_SIZE = 1024 * 1024
 
-# Ensure directories exist
-os.makedirs(UPLOAD_DIR, exist_ok=True)
-os.makedirs(REPORTS_DIR, exist_ok=True)
+# Bump when the PDF layout changes so cached PDFs and their ETags are invalidated
+PDF_TEMPLATE_VERSION = 1
 
-@router.post("/upload")
+# Entries kept by each of the per-worker report caches below
+REPORT_CACHE_MAX_ENTRIES = int(os.getenv("REPORT_CACHE_MAX_ENTRIES", "10000"))
+# Owner and contract name per report file; these never change when a report is rewritten,
+# so conditional requests can be authorized without parsing the JSON again
+_report_meta = LRUCache(REPORT_CACHE_MAX_ENTRIES)
+# ETag each generated PDF was built for (PDFs on disk from other workers are rebuilt once)
+_pdf_versions = LRUCache(REPORT_CACHE_MAX_ENTRIES)
+# Report views are written to the database at most this often per report and worker
+VIEW_RECORD_INTERVAL_SECONDS = 300
+_recorded_views = LRUCache(REPORT_CACHE_MAX_ENTRIES)
+# Worker processes rendering the PDFs of bulk exports (started on the first export)
+PDF_EXPORT_WORKERS = int(os.getenv("PDF_EXPORT_WORKERS", min(4, os.cpu_count() or 1)))
+# Renders in flight per worker; bounds the PDFs held in memory while an export streams
+EXPORT_PENDING_PER_WORKER = 2
+_export_pool = None
+
+async def _upload_chunks(file: UploadFile):
+    while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+        yield chunk
+
+@asynccontextmanager
+async def _contract_analyzer(safe_filename: str, file_size: int):
+    """Analyzer for an uploaded contract; huge files are memory-mapped with a memory cap"""
+    if file_size > BOUNDED_ANALYSIS_THRESHOLD:
+        async with upload_storage.local_copy(safe_filename) as file_path:
+            analyzer = SmartContractAnalyzer.from_file(file_path, memory_limit_bytes=ANALYSIS_MEMORY_LIMIT)
+            try:
+                yield analyzer
+            finally:
+                analyzer.source.close()
+    else:
+        yield SmartContractAnalyzer(decode_source(await upload_storage.read_bytes(safe_filename)))
+
+async def _save_report(db: Session, report_filename: str, full_report: dict):
+    """Persist a report and its summary row for dashboard listings"""
+    # Reports from an older ruleset are re-analyzed in the background (app.scanner.reanalyze)
+    full_report["ruleset_version"] = RULESET_VERSION
+    with tracer.span("storage.report_persist", report=report_filename):
+        await report_storage.write_json(report_filename, full_report)
+    with tracer.span("report.index", report=report_filename):
+        index_report(db, report_filename, full_report)
+
+def _ndjson(record: dict) -> bytes:
+    return (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+
+_ANALYSIS_DONE = object()
+
+async def _analyze_in_slot(user: str, lane: str, analyze):
+    """
+    Run analyze(ticket), an async generator, in a background task holding a scheduler
+    slot, and yield what it produces. Items are buffered, so the slot is released as
+    soon as the analysis ends rather than when a slow client has read the stream.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def run():
+        async with scan_scheduler.slot(user, lane) as ticket:
+            async for item in analyze(ticket):
+                queue.put_nowait(item)
+
+    task = asyncio.create_task(run())
+    task.add_done_callback(lambda _: queue.put_nowait(_ANALYSIS_DONE))
+    try:
+        while (item := await queue.get()) is not _ANALYSIS_DONE:
+            yield item
+        # Re-raise an analysis error
+        task.result()
+    finally:
+        # Client went away: stop analyzing and give the slot back
+        task.cancel()
+
+async def _stream_contract_scan(safe_filename: str, file_size: int, full_report: dict, report_filename: str, detailed: bool, lane: str):
+    """
+    NDJSON scan: a "scan" line, one "finding" line per finding as soon as its rule has
+    run, then a "summary" line once the report is stored.
+    """
+    yield _ndjson({"type": "scan", "report_id": report_filename, "filename": full_report["filename"], "lane": lane})
+    result = {}
+
+    async def analyze(ticket):
+        result["ticket"] = ticket
+        async with _contract_analyzer(safe_filename, file_size) as analyzer:
+            with tracer.span("analysis", mode="stream", lane=lane, queue_wait_ms=ticket.wait_ms):
+                # Each rule runs in the threadpool, so the event loop keeps serving
+                async for finding in iterate_in_threadpool(analyzer.iter_findings(detailed=detailed)):
+                    yield finding
+                result["report"] = analyzer.build_report()
+
+    try:
+        async for finding in _analyze_in_slot(full_report["uploaded_by"], lane, analyze):
+            yield _ndjson({"type": "finding", **finding})
+        report, ticket = result["report"], result["ticket"]
+
+        full_report["report"] = report
+        # The request's session is closed once streaming starts, so use our own
+        db = SessionLocal()
+        try:
+            await _save_report(db, report_filename, full_report)
+        finally:
+            db.close()
+    except Exception as e:
+        logger.exception("Streaming analysis failed", extra={"fields": {"file": safe_filename}})
+        yield _ndjson({"type": "error", "detail": f"Analysis failed: {str(e)}"})
+        return
+
+    yield _ndjson({
+        "type": "summary",
+        "report_id": report_filename,
+        "security_score": report["security_score"],
+        "deployment_readiness": report["deployment_readiness"],
+        "summary": report["summary"],
+        "message": _get_deployment_message(report),
+        "resources": report.get("resources"),
+        "lane": lane,
+        "queue_wait_ms": ticket.wait_ms
+    })
+
+@router.post("/upload", dependencies=[Depends(rate_limit("analysis"))])
 async def upload_contract(
     file: UploadFile = File(...),
     detailed: Optional[bool] = True,
-    current_user: User = Depends(get_current_user)
+    output_format: str = Query("json", alias="format", pattern="^(json|sarif|ndjson)$"),
+    lane: str = Query("auto", pattern="^(auto|fast|bulk)$"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
 ):
     """
     Upload and analyze a Solidity smart contract
     - Returns detailed vulnerability report
     - Includes deployment readiness assessment
     - Color-coded risk levels (🔴 CRITICAL, 🟠 HIGH, 🟡 MEDIUM, 🔵 LOW, 🟢 SAFE)
+    - format=sarif returns a SARIF 2.1.0 log, format=ndjson streams findings as they are found
+    - lane=bulk queues the scan with batch work (CI); small files otherwise take the fast lane
     """
     
     # =============================
@@ -60,57 +215,70 @@ async def upload_contract(
     # Create unique filename to avoid conflicts
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     safe_filename = f"{timestamp}_{file.filename}"
-    file_path = os.path.join(UPLOAD_DIR, safe_filename)
+    report_filename = f"{timestamp}_{file.filename.replace('.sol', '_report.json')}"
     
-    print(f"Saving file to: {file_path}")  # Debug print
+    # Add metadata to report
+    full_report = {
+        "filename": file.filename,
+        "source_file": safe_filename,
+        "uploaded_by": current_user.email,
+        "uploaded_at": timestamp,
+        "contract_name": file.filename.replace('.sol', ''),
+        "analysis_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "report": None
+    }
     
     try:
         # =============================
-        # Save file
+        # Save file (in chunks, huge contracts never sit in memory)
         # =============================
-        with open(file_path, "wb") as buffer:
-            buffer.write(await file.read())
+        with tracer.span("storage.upload_persist", file=safe_filename) as span:
+            file_size = await upload_storage.write_stream(safe_filename, _upload_chunks(file))
+            span.set_attribute("bytes", file_size)
         
-        print(f"File saved successfully at: {file_path}")  # Debug print
+        logger.info("Upload saved", extra={"fields": {"file": safe_filename, "bytes": file_size}})
+        scan_lane = choose_lane(file_size, lane)
         
-        # =============================
-        # Read file content
-        # =============================
-        with open(file_path, "r", encoding="utf-8") as f:
-            code = f.read()
+        if output_format == "ndjson":
+            return StreamingResponse(
+                _stream_contract_scan(safe_filename, file_size, full_report, report_filename, detailed, scan_lane),
+                media_type="application/x-ndjson"
+            )
         
         # =============================
         # Analyze contract deeply
         # =============================
-        report = analyze_smart_contract(code)
+        # detailed=False skips snippet rendering; stored reports then keep line spans
+        # only and snippets are rendered from the upload when the report is read
+        async with scan_scheduler.slot(current_user.email, scan_lane) as ticket:
+            async with _contract_analyzer(safe_filename, file_size) as analyzer:
+                with tracer.span(
+                    "analysis", mode="bounded" if analyzer.bounded else "in_memory",
+                    lane=scan_lane, queue_wait_ms=ticket.wait_ms
+                ):
+                    report = await run_in_threadpool(analyzer.analyze, detailed=detailed)
         
         # =============================
         # Save report for history
         # =============================
-        report_filename = f"{timestamp}_{file.filename.replace('.sol', '_report.json')}"
-        report_path = os.path.join(REPORTS_DIR, report_filename)
-        
-        print(f"Saving report to: {report_path}")  # Debug print
-        
-        # Add metadata to report
-        full_report = {
-            "filename": file.filename,
-            "uploaded_by": current_user.email,
-            "uploaded_at": timestamp,
-            "contract_name": file.filename.replace('.sol', ''),
-            "analysis_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "report": report
-        }
-        
-        with open(report_path, "w") as f:
-            json.dump(full_report, f, indent=2)
+        full_report["report"] = report
+        await _save_report(db, report_filename, full_report)
         
-        print(f"Report saved successfully at: {report_path}")  # Debug print
+        logger.info("Report saved", extra={"fields": {
+            "report": report_filename, "security_score": report["security_score"],
+            "lane": scan_lane, "queue_wait_ms": ticket.wait_ms
+        }})
         
         # =============================
         # Return formatted response
         # =============================
-        return JSONResponse(content={
+        queue_headers = {"X-Scan-Lane": scan_lane, "X-Queue-Wait-Ms": str(ticket.wait_ms)}
+        if output_format == "sarif":
+            return JSONResponse(
+                content=to_sarif([(file.filename, report)]), media_type=SARIF_MEDIA_TYPE, headers=queue_headers
+            )
+        
+        response = {
             "status": "success",
             "filename": file.filename,
             "uploaded_by": current_user.email,
@@ -118,15 +286,180 @@ async def upload_contract(
             "security_score": report["security_score"],
             "deployment_readiness": report["deployment_readiness"],
             "summary": report["summary"],
-            "vulnerabilities": report["vulnerabilities"],
             "report_id": report_filename,
-            "message": _get_deployment_message(report)
-        })
+            "message": _get_deployment_message(report),
+            "resources": report.get("resources"),
+            "lane": scan_lane,
+            "queue_wait_ms": ticket.wait_ms
+        }
+        # Summary-only fast path
+        if detailed:
+            response["vulnerabilities"] = report["vulnerabilities"]
+        return JSONResponse(content=response, headers=queue_headers)
         
     except Exception as e:
-        print(f"Error: {str(e)}")  # Debug print
+        logger.exception("Analysis failed", extra={"fields": {"file": safe_filename}})
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
+async def _stream_project_scan(sources: dict, full_report_for, detailed: bool, user: str, lane: str):
+    """NDJSON project scan: per file a "file" line, its "finding" lines and a "summary" line"""
+    db = SessionLocal()
+    try:
+        async for path, analyzer in iterate_in_threadpool(project_analyzers(sources)):
+            report_filename, full_report = full_report_for(path, None)
+            yield _ndjson({"type": "file", "filename": path, "report_id": report_filename})
+            result = {}
+
+            async def analyze(ticket, analyzer=analyzer, result=result):
+                result["ticket"] = ticket
+                async for finding in iterate_in_threadpool(analyzer.iter_findings(detailed=detailed)):
+                    yield finding
+                result["report"] = analyzer.build_report()
+
+            # One slot per file, so other users' scans interleave with a large archive
+            async for finding in _analyze_in_slot(user, lane, analyze):
+                yield _ndjson({"type": "finding", "filename": path, **finding})
+            report, ticket = result["report"], result["ticket"]
+            full_report["report"] = report
+            await _save_report(db, report_filename, full_report)
+            yield _ndjson({
+                "type": "summary",
+                "filename": path,
+                "report_id": report_filename,
+                "security_score": report["security_score"],
+                "deployment_readiness": report["deployment_readiness"],
+                "summary": report["summary"],
+                "imports": report["imports"],
+                "message": _get_deployment_message(report),
+                "lane": lane,
+                "queue_wait_ms": ticket.wait_ms
+            })
+    except Exception as e:
+        logger.exception("Streaming project analysis failed")
+        yield _ndjson({"type": "error", "detail": f"Project analysis failed: {str(e)}"})
+    finally:
+        db.close()
+
+@router.post("/upload/project", dependencies=[Depends(rate_limit("analysis"))])
+async def upload_project(
+    file: UploadFile = File(...),
+    detailed: Optional[bool] = True,
+    output_format: str = Query("json", alias="format", pattern="^(json|sarif|ndjson)$"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Upload a zipped Solidity project and analyze every contract in it (in the bulk lane)
+    - Imports are resolved between files of the project (incl. node_modules/ and lib/)
+    - Inherited modifiers (onlyOwner etc.) and SafeMath usage count as in the base contract
+    - Returns one report per project file; dependency folders are not reported on
+    - format=sarif returns one SARIF 2.1.0 run for all files, format=ndjson streams findings per file
+    """
+
+    # =============================
+    # Validate file type
+    # =============================
+    if not file.filename.endswith(".zip"):
+        raise HTTPException(status_code=400, detail="Only .zip project archives allowed")
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    safe_filename = f"{timestamp}_{file.filename}"
+    project_name = file.filename[:-len(".zip")]
+
+    try:
+        content = await file.read()
+        with tracer.span("storage.upload_persist", file=safe_filename, bytes=len(content)):
+            await upload_storage.write_bytes(safe_filename, content)
+
+        # =============================
+        # Collect Solidity sources
+        # =============================
+        try:
+            sources = read_project_archive(content)
+        except zipfile.BadZipFile:
+            raise HTTPException(status_code=400, detail="Invalid .zip archive")
+        except ArchiveTooLarge as e:
+            raise HTTPException(status_code=413, detail=str(e))
+
+        if not sources:
+            raise HTTPException(status_code=400, detail="No .sol files found in archive")
+
+        # =============================
+        # Analyze with imports resolved
+        # =============================
+        def full_report_for(path: str, report: Optional[dict]) -> Tuple[str, dict]:
+            report_filename = f"{timestamp}_{project_name}_{path.replace('/', '__').replace('.sol', '_report.json')}"
+            return report_filename, {
+                "filename": path,
+                "project": file.filename,
+                "source_file": safe_filename,
+                "uploaded_by": current_user.email,
+                "uploaded_at": timestamp,
+                "contract_name": os.path.basename(path).replace('.sol', ''),
+                "analysis_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "report": report
+            }
+
+        scan_lane = choose_lane(len(content), archive=True)
+        if output_format == "ndjson":
+            return StreamingResponse(
+                _stream_project_scan(sources, full_report_for, detailed, current_user.email, scan_lane),
+                media_type="application/x-ndjson"
+            )
+
+        reports = {}
+        queue_waits = {}
+        with tracer.span("analysis", mode="project", files=len(sources), lane=scan_lane) as span:
+            async for path, analyzer in iterate_in_threadpool(project_analyzers(sources)):
+                # One slot per file, so other users' scans interleave with a large archive
+                async with scan_scheduler.slot(current_user.email, scan_lane) as ticket:
+                    reports[path] = await run_in_threadpool(analyzer.analyze, detailed=detailed)
+                queue_waits[path] = ticket.wait_ms
+            queue_wait_ms = round(sum(queue_waits.values()), 1)
+            span.set_attribute("queue_wait_ms", queue_wait_ms)
+
+        results = []
+        for path, report in reports.items():
+            report_filename, full_report = full_report_for(path, report)
+            await _save_report(db, report_filename, full_report)
+
+            result = {
+                "filename": path,
+                "security_score": report["security_score"],
+                "deployment_readiness": report["deployment_readiness"],
+                "summary": report["summary"],
+                "imports": report["imports"],
+                "report_id": report_filename,
+                "message": _get_deployment_message(report),
+                "queue_wait_ms": queue_waits[path]
+            }
+            if detailed:
+                result["vulnerabilities"] = report["vulnerabilities"]
+            results.append(result)
+
+        queue_headers = {"X-Scan-Lane": scan_lane, "X-Queue-Wait-Ms": str(queue_wait_ms)}
+        if output_format == "sarif":
+            return JSONResponse(
+                content=to_sarif(list(reports.items())), media_type=SARIF_MEDIA_TYPE, headers=queue_headers
+            )
+
+        return JSONResponse(content={
+            "status": "success",
+            "filename": file.filename,
+            "uploaded_by": current_user.email,
+            "uploaded_at": timestamp,
+            "files_analyzed": len(results),
+            "lane": scan_lane,
+            "queue_wait_ms": queue_wait_ms,
+            "reports": results
+        }, headers=queue_headers)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Project analysis failed", extra={"fields": {"file": safe_filename}})
+        raise HTTPException(status_code=500, detail=f"Project analysis failed: {str(e)}")
+
 def _get_deployment_message(report: dict) -> str:
     """Generate user-friendly deployment message"""
     if report["deployment_readiness"]["can_deploy"]:
@@ -140,42 +473,203 @@ def _get_deployment_message(report: dict) -> str:
         else:
             return "DO NOT DEPLOY! High vulnerabilities detected. Fix all LOW issues first."
 
-@router.get("/report/{report_id}")
-def get_report(report_id: str, current_user: User = Depends(get_current_user)):
-    report_path = os.path.join(REPORTS_DIR, report_id)
+@router.post("/reports/batch")
+def get_reports_batch(
+    batch: ReportBatchRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Summaries (score, counts, deployment readiness) of several reports in one request
+    - Served from the report index, report JSON files are not parsed
+    - IDs that are unknown or not owned by the caller are listed under "missing"
+    """
+    return JSONResponse(content=get_report_summaries(db, report_storage, batch.report_ids, current_user.email))
 
-    if not os.path.exists(report_path):
+@router.get("/search")
+def search_findings(
+    q: str = "",
+    severity: Optional[List[str]] = Query(None),
+    rule: Optional[List[str]] = Query(None),
+    cwe: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=MAX_RESULTS),
+    offset: int = Query(0, ge=0),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Search the findings of all your reports
+    - q: words or "quoted phrases" that must all appear in the issue, description, CWE or code snippet; word* matches a prefix
+    - severity / rule (repeatable) and cwe narrow the results
+    - facets: matches per severity and per rule, for filter counts
+    """
+    if search_index is None:
+        raise HTTPException(status_code=503, detail="Search is not available")
+    unknown = [name for name in severity or [] if name not in SEVERITY_VALUES]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown severity: {', '.join(unknown)}")
+    return search_index.search(
+        current_user.email, q, severities=severity, rules=rule, cwe=cwe, limit=limit, offset=offset
+    )
+
+@router.get("/reanalysis")
+def get_reanalysis_progress(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Progress of the background re-analysis after a ruleset change
+    - current: reports produced by the running ruleset_version, stale: still queued
+    - failed: reports whose last re-analysis attempt failed
+    """
+    return reanalysis_progress(db)
+
+@router.get("/stats")
+def get_dashboard_stats(
+    days: int = Query(30, ge=1, le=MAX_DAYS),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Dashboard statistics of your scans, served from rollups (no report is read)
+    - totals: all-time scans, average security_score, deployable scans and findings per severity
+    - days: the same per upload day for the last `days` days, oldest first, empty days included
+    """
+    return dashboard_stats(db, current_user.email, days)
+
+@router.get("/queue")
+async def get_scan_queue(current_user: User = Depends(get_current_user)):
+    """
+    Analysis slots of this API worker per lane (fast, bulk)
+    - busy: scans analyzing now, waiting: scans queued, waiting_users: users with queued scans
+    """
+    return scan_scheduler.stats()
+
+@router.get("/report/{base_id}/diff/{target_id}")
+def diff_report(
+    base_id: str,
+    target_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Compare two scans of a contract
+    - new: findings only in target, fixed: only in base, persisting: in both
+    - Findings are matched by fingerprints (rule + normalized code), so moved code still matches
+    """
+    for report_id in (base_id, target_id):
+        row = get_indexed_report(db, report_storage, report_id)
+        if row is None:
+            raise HTTPException(status_code=404, detail=f"Report not found: {report_id}")
+        if row.uploaded_by != current_user.email:
+            raise HTTPException(status_code=403, detail="Access denied")
+
+    return JSONResponse(content=diff_reports(db, base_id, target_id))
+
+def _attach_report_snippets(report_data: dict) -> dict:
+    """Render code snippets that were not stored with the report, from the uploaded source"""
+    vulnerabilities = report_data["report"]["vulnerabilities"]
+    if all("code_snippet" in v for v in vulnerabilities):
+        return report_data
+
+    source_file = report_data.get("source_file")
+    if not source_file or not upload_storage.exists_sync(source_file):
+        return report_data
+
+    # Local files are opened in place; other backends are read into memory
+    source_path = upload_storage.local_path(source_file)
+    if source_file.endswith(".zip"):
+        with zipfile.ZipFile(source_path or io.BytesIO(upload_storage.read_bytes_sync(source_file))) as archive:
+            source = InMemorySource(archive.read(report_data["filename"]).decode("utf-8", errors="replace"))
+    elif source_path:
+        source = MappedSource(source_path)
+    else:
+        source = InMemorySource(decode_source(upload_storage.read_bytes_sync(source_file)))
+
+    try:
+        attach_code_snippets(vulnerabilities, source)
+    finally:
+        source.close()
+    return report_data
+
+def _load_report(report_id: str) -> Tuple[dict, dict]:
+    """Report JSON and its cached owner/name"""
+    report_data = report_storage.read_json_sync(report_id)
+    meta = {
+        "uploaded_by": report_data.get("uploaded_by"),
+        "contract_name": report_data.get("contract_name", "contract")
+    }
+    _report_meta[report_id] = meta
+    return report_data, meta
+
+def _record_view(db: Session, report_id: str):
+    """Note a report view for re-analysis priority; never fails the request"""
+    now = time.monotonic()
+    last = _recorded_views.get(report_id)
+    if last is not None and now - last < VIEW_RECORD_INTERVAL_SECONDS:
+        return
+    _recorded_views[report_id] = now
+    try:
+        record_view(db, report_id)
+    except SQLAlchemyError:
+        db.rollback()
+        logger.exception("Recording report view failed", extra={"fields": {"report": report_id}})
+
+def _get_report_meta(report_id: str) -> Tuple[dict, Optional[dict]]:
+    """Cached owner/name of a report, loading (and returning) the JSON only on first access"""
+    meta = _report_meta.get(report_id)
+    if meta is not None:
+        return meta, None
+    report_data, meta = _load_report(report_id)
+    return meta, report_data
+
+@router.get("/report/{report_id}")
+def get_report(
+    report_id: str,
+    request: Request,
+    detailed: Optional[bool] = True,
+    output_format: str = Query("json", alias="format", pattern="^(json|sarif)$"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    if not is_report_id(report_id) or not report_storage.exists_sync(report_id):
         raise HTTPException(status_code=404, detail="Report not found")
 
-    with open(report_path, "r") as f:
-        report_data = json.load(f)
+    meta, report_data = _get_report_meta(report_id)
 
     # user access check
-    if report_data["uploaded_by"] != current_user.email:
+    if meta["uploaded_by"] != current_user.email:
         raise HTTPException(status_code=403, detail="Access denied")
+    _record_view(db, report_id)
 
-    return JSONResponse(content=report_data)
+    # Rescoring and re-analysis rewrite the report, which changes its ETag; clients
+    # revalidate on every use (no-cache), so a matching ETag means their copy is current
+    variant = "sarif" if output_format == "sarif" else "detailed" if detailed else "summary"
+    etag = variant_etag(report_storage.etag_sync(report_id), variant)
+    matched = not_modified_etag(request, etag)
+    if matched is not None:
+        return not_modified_response(matched)
 
-def generate_professional_pdf_report(report_data: dict, pdf_path: str):
-    """Generate a super professional and developer-friendly PDF report"""
-    
-    # Create the PDF document with better formatting
-    doc = SimpleDocTemplate(
-        pdf_path,
-        pagesize=A4,
-        rightMargin=72,
-        leftMargin=72,
-        topMargin=72,
-        bottomMargin=72,
-    )
-    
-    # Container for the 'Flowable' objects
-    elements = []
-    
-    # Get styles
+    if report_data is None:
+        report_data, _ = _load_report(report_id)
+
+    if output_format == "sarif":
+        sarif = to_sarif([(report_data.get("filename", report_id), report_data["report"])])
+        return cached_json_response(request, sarif, etag, media_type=SARIF_MEDIA_TYPE)
+
+    if detailed:
+        _attach_report_snippets(report_data)
+
+    return cached_json_response(request, report_data, etag)
+
+@lru_cache(maxsize=None)
+def get_pdf_styles() -> dict:
+    """
+    Paragraph styles of the PDF report.
+    Built once per worker (getSampleStyleSheet is slow on first use) and shared by every
+    report; ReportLab only reads styles while building, so sharing them is safe.
+    """
     styles = getSampleStyleSheet()
     
-    # Create custom styles
     title_style = ParagraphStyle(
         'CustomTitle',
         parent=styles['Heading1'],
@@ -234,6 +728,38 @@ def generate_professional_pdf_report(report_data: dict, pdf_path: str):
         borderRadius=3
     )
     
+    return {
+        "title": title_style,
+        "heading": heading_style,
+        "subheading": subheading_style,
+        "normal": normal_style,
+        "code": code_style
+    }
+
+def generate_professional_pdf_report(report_data: dict, output):
+    """Generate a super professional and developer-friendly PDF report (to a path or binary file object)"""
+    
+    # Create the PDF document with better formatting
+    doc = SimpleDocTemplate(
+        output,
+        pagesize=A4,
+        rightMargin=72,
+        leftMargin=72,
+        topMargin=72,
+        bottomMargin=72,
+    )
+    
+    # Container for the 'Flowable' objects
+    elements = []
+    
+    # Get styles (shared, built once per worker)
+    pdf_styles = get_pdf_styles()
+    title_style = pdf_styles["title"]
+    heading_style = pdf_styles["heading"]
+    subheading_style = pdf_styles["subheading"]
+    normal_style = pdf_styles["normal"]
+    code_style = pdf_styles["code"]
+    
     # Add header with logo and title
     header_text = f"""
     <para alignment="center">
@@ -426,8 +952,13 @@ def generate_professional_pdf_report(report_data: dict, pdf_path: str):
                 elements.append(Paragraph(rec_text, normal_style))
             
             # Code snippet if available
-            if 'code' in vuln:
-                code_lines = textwrap.wrap(vuln['code'], width=60)
+            code = vuln.get('code') or vuln.get('code_snippet')
+            if code:
+                code_lines = [
+                    escape(wrapped)
+                    for code_line in code.split('\n')
+                    for wrapped in (textwrap.wrap(code_line, width=60) or [''])
+                ]
                 for line in code_lines:
                     code_text = f"""
                     <para>
@@ -455,38 +986,247 @@ def generate_professional_pdf_report(report_data: dict, pdf_path: str):
     # Build PDF
     doc.build(elements)
 
-@router.get("/report/{report_id}/download")
-async def download_report_pdf(report_id: str, current_user: User = Depends(get_current_user)):
-    report_path = os.path.join(REPORTS_DIR, report_id)
+def _render_pdf(report_id: str, report_data: Optional[dict]) -> bytes:
+    if report_data is None:
+        report_data, _ = _load_report(report_id)
+    _attach_report_snippets(report_data)
+    buffer = io.BytesIO()
+    generate_professional_pdf_report(report_data, buffer)
+    return buffer.getvalue()
 
-    if not os.path.exists(report_path):
+@router.get("/report/{report_id}/download", dependencies=[Depends(rate_limit("pdf"))])
+async def download_report_pdf(
+    report_id: str,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    report_stat = await report_storage.stat(report_id) if is_report_id(report_id) else None
+    if report_stat is None:
         raise HTTPException(status_code=404, detail="Report not found")
 
-    # Load JSON report
-    with open(report_path, "r") as f:
-        report_data = json.load(f)
+    meta, report_data = await run_in_threadpool(_get_report_meta, report_id)
 
     # User access check
-    if report_data.get("uploaded_by") != current_user.email:
+    if meta["uploaded_by"] != current_user.email:
         raise HTTPException(status_code=403, detail="Access denied")
+    await run_in_threadpool(_record_view, db, report_id)
 
-    # Create PDF file path
+    etag = variant_etag(await report_storage.etag(report_id), f"pdf{PDF_TEMPLATE_VERSION}")
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+
+    # Create PDF file name
     pdf_filename = report_id.replace(".json", ".pdf")
-    pdf_path = os.path.join(REPORTS_DIR, pdf_filename)
+    contract_name = meta["contract_name"]
+    headers = {
+        **cache_headers(etag),
+        "Content-Disposition": f"attachment; filename=SmartShield_Report_{contract_name}.pdf"
+    }
 
     try:
-        # Generate professional PDF
-        generate_professional_pdf_report(report_data, pdf_path)
+        # Generate professional PDF, unless one was already built from this report version
+        pdf_stat = await report_storage.stat(pdf_filename)
+        pdf_is_current = (
+            pdf_stat is not None
+            and pdf_stat.mtime >= report_stat.mtime
+            and _pdf_versions.get(pdf_filename) == etag
+        )
+        pdf_bytes = None
+        if not pdf_is_current:
+            with tracer.span("pdf.build", report=report_id):
+                pdf_bytes = await run_in_threadpool(_render_pdf, report_id, report_data)
+            with tracer.span("storage.pdf_persist", bytes=len(pdf_bytes)):
+                await report_storage.write_bytes(pdf_filename, pdf_bytes)
+            _pdf_versions[pdf_filename] = etag
         
         # Return the PDF file
-        return FileResponse(
-            path=pdf_path,
-            filename=f"SmartShield_Report_{report_data.get('contract_name', 'contract')}.pdf",
-            media_type="application/pdf",
-            headers={
-                "Content-Disposition": f"attachment; filename=SmartShield_Report_{report_data.get('contract_name', 'contract')}.pdf"
-            }
-        )
+        pdf_path = report_storage.local_path(pdf_filename)
+        if pdf_path:
+            return FileResponse(
+                path=pdf_path,
+                filename=f"SmartShield_Report_{contract_name}.pdf",
+                media_type="application/pdf",
+                headers=headers
+            )
+        if pdf_bytes is None:
+            pdf_bytes = await report_storage.read_bytes(pdf_filename)
+        return Response(content=pdf_bytes, media_type="application/pdf", headers=headers)
     except Exception as e:
-        print(f"Error generating PDF: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Failed to generate PDF: {str(e)}")
\ No newline at end of file
+        logger.exception("PDF generation failed", extra={"fields": {"report": report_id}})
+        raise HTTPException(status_code=500, detail=f"Failed to generate PDF: {str(e)}")
+
+def _init_export_worker():
+    # Ctrl+C reaches the whole process group; leave it to the server, which shuts the pool down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def _get_export_pool() -> ProcessPoolExecutor:
+    global _export_pool
+    if _export_pool is None:
+        # Never fork the server itself: its threads, locks, DB connections and signal
+        # handlers would be copied into the workers. A forkserver (preloaded with this
+        # module) starts clean workers quickly; spawn where it is not available
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("forkserver")
+            context.set_forkserver_preload([__name__])
+        else:
+            context = multiprocessing.get_context("spawn")
+        _export_pool = ProcessPoolExecutor(
+            max_workers=PDF_EXPORT_WORKERS, mp_context=context, initializer=_init_export_worker
+        )
+    return _export_pool
+
+def shutdown_export_pool():
+    """Stop the export workers (on server shutdown); a later export starts a new pool"""
+    global _export_pool
+    if _export_pool is not None:
+        _export_pool.shutdown(cancel_futures=True)
+        _export_pool = None
+
+def _export_pdf(report_id: str) -> bytes:
+    """Render one report's PDF in an export worker; nothing is written to storage"""
+    return _render_pdf(report_id, report_storage.read_json_sync(report_id))
+
+def _export_pdf_name(report_id: str) -> str:
+    return report_id.replace(".json", ".pdf")
+
+class _ZipStream:
+    """Write-only file for zipfile; what it wrote is drained after each entry"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+def _zip_entry(name: str, compress_type: int) -> zipfile.ZipInfo:
+    entry = zipfile.ZipInfo(name, date_time=datetime.now().timetuple()[:6])
+    entry.compress_type = compress_type
+    return entry
+
+def _export_entry(row: ScanReport) -> dict:
+    return {
+        "report_id": row.report_id,
+        "pdf": _export_pdf_name(row.report_id),
+        "filename": row.filename,
+        "contract_name": row.contract_name,
+        "uploaded_at": row.uploaded_at,
+        "security_score": row.security_score
+    }
+
+async def _stream_pdf_export(entries: List[dict], missing: List[str]):
+    """
+    Zip of the PDFs of the exported reports, streamed: a manifest.json first, then each
+    PDF as soon as a worker has rendered it (completion order), and failed.json if any
+    render failed
+    """
+    global _export_pool
+    stream = _ZipStream()
+    archive = zipfile.ZipFile(stream, "w")
+    archive.writestr(_zip_entry("manifest.json", zipfile.ZIP_DEFLATED), json.dumps({
+        "exported_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "reports": entries,
+        "missing": missing
+    }, indent=2, ensure_ascii=False))
+    yield stream.drain()
+
+    loop = asyncio.get_running_loop()
+    pool = _get_export_pool()
+    max_pending = PDF_EXPORT_WORKERS * EXPORT_PENDING_PER_WORKER
+    report_ids = iter([entry["report_id"] for entry in entries])
+    pending = {}
+    failed = {}
+    try:
+        while True:
+            while len(pending) < max_pending and (report_id := next(report_ids, None)) is not None:
+                pending[loop.run_in_executor(pool, _export_pdf, report_id)] = report_id
+            if not pending:
+                break
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                report_id = pending.pop(future)
+                try:
+                    pdf_bytes = future.result()
+                except Exception as e:
+                    if isinstance(e, BrokenProcessPool):
+                        # A worker died; the next export starts a fresh pool
+                        _export_pool = None
+                    logger.exception("PDF export failed", extra={"fields": {"report": report_id}})
+                    failed[report_id] = str(e) or type(e).__name__
+                    continue
+                # PDFs are compressed already
+                archive.writestr(_zip_entry(_export_pdf_name(report_id), zipfile.ZIP_STORED), pdf_bytes)
+                yield stream.drain()
+
+        if failed:
+            archive.writestr(_zip_entry("failed.json", zipfile.ZIP_DEFLATED), json.dumps(failed, indent=2))
+        archive.close()
+        yield stream.drain()
+        logger.info("PDF export finished", extra={"fields": {
+            "reports": len(entries), "failed": len(failed), "missing": len(missing)
+        }})
+    finally:
+        # Client went away: drop renders that haven't started
+        for future in pending:
+            future.cancel()
+
+@router.post("/reports/export", dependencies=[Depends(rate_limit("export"))])
+def export_reports_pdf(
+    export: ReportExportRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Download the PDFs of many reports as one zip
+    - report_ids, or date_from / date_to (upload days, inclusive) for all your reports in that range
+    - PDFs are rendered in parallel worker processes and streamed as each one finishes
+    - manifest.json lists the exported reports and requested IDs that are unknown or not yours
+    """
+    missing = []
+    if export.report_ids is not None:
+        wanted = list(dict.fromkeys(export.report_ids))
+        missing = [report_id for report_id in wanted if not is_report_id(report_id)]
+        wanted = [report_id for report_id in wanted if is_report_id(report_id)]
+        indexed = {row.report_id: row for row in db.query(ScanReport).filter(ScanReport.report_id.in_(wanted))}
+        entries = []
+        for report_id in wanted:
+            row = indexed.get(report_id) or get_indexed_report(db, report_storage, report_id)
+            if row is None or row.uploaded_by != current_user.email:
+                missing.append(report_id)
+            else:
+                entries.append(_export_entry(row))
+    else:
+        # uploaded_at is the YYYYmmdd_HHMMSS upload timestamp, so days compare as prefixes
+        query = db.query(ScanReport).filter(ScanReport.uploaded_by == current_user.email)
+        if export.date_from:
+            query = query.filter(ScanReport.uploaded_at >= export.date_from.strftime("%Y%m%d"))
+        if export.date_to:
+            query = query.filter(ScanReport.uploaded_at < (export.date_to + timedelta(days=1)).strftime("%Y%m%d"))
+        entries = [
+            _export_entry(row)
+            for row in query.order_by(ScanReport.uploaded_at, ScanReport.id).limit(MAX_EXPORT_REPORTS + 1)
+        ]
+        if len(entries) > MAX_EXPORT_REPORTS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"More than {MAX_EXPORT_REPORTS} reports in this range, narrow it down"
+            )
+
+    if not entries:
+        raise HTTPException(status_code=404, detail="No reports to export")
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return StreamingResponse(
+        _stream_pdf_export(entries, missing),
+        media_type="application/zip",
+        headers={"Content-Disposition": f"attachment; filename=SmartShield_Reports_{timestamp}.zip"}
+    )
@@ -0,0 +1,141 @@
+# D:\My_Work\smartShiledAI\backend\app\scanner\rules.py
+from dataclasses import dataclass
+from enum import Enum
+from typing import Dict
+
+# Bump whenever a check's logic or the rule text below changes; stored reports from an
+# older ruleset are then re-analyzed in the background (see app.scanner.reanalyze)
+RULESET_VERSION = 1
+
+class RiskLevel(Enum):
+    CRITICAL = "🔴 CRITICAL"
+    HIGH = "🟠 HIGH"
+    MEDIUM = "🟡 MEDIUM"
+    LOW = "🔵 LOW"
+    INFO = "⚪ INFO"
+    SAFE = "🟢 SAFE"
+
+@dataclass(frozen=True)
+class Rule:
+    """Text shared by every finding of a rule; findings only reference it by rule_id"""
+    rule_id: str
+    name: str
+    severity: RiskLevel
+    fix: str
+    cwe_reference: str = ""
+    impact: str = ""
+    likelihood: str = ""
+
+RULES: Dict[str, Rule] = {rule.rule_id: rule for rule in [
+    # ==================== CRITICAL (🔴) ====================
+    Rule(
+        rule_id="reentrancy",
+        name="Reentrancy",
+        severity=RiskLevel.CRITICAL,
+        fix="1. Use Checks-Effects-Interactions pattern\n2. Use OpenZeppelin's ReentrancyGuard\n3. Move all state changes before external calls",
+        cwe_reference="CWE-841",
+        impact="Attackers can drain contract funds",
+        likelihood="High"
+    ),
+    Rule(
+        rule_id="unchecked-external-call",
+        name="Unchecked external call",
+        severity=RiskLevel.CRITICAL,
+        fix="Always check return value: require(success) or if(!success) revert()",
+        cwe_reference="CWE-252",
+        impact="Function may continue execution after failed call",
+        likelihood="Medium"
+    ),
+    Rule(
+        rule_id="selfdestruct",
+        name="Selfdestruct usage",
+        severity=RiskLevel.HIGH,
+        fix="1. Implement proper access control\n2. Consider if selfdestruct is necessary\n3. Use multisig for destruction",
+        cwe_reference="CWE-284",
+        impact="Contract can be destroyed, funds locked",
+        likelihood="Medium"
+    ),
+    # ==================== HIGH (🟠) ====================
+    Rule(
+        rule_id="missing-access-control",
+        name="Missing access control",
+        severity=RiskLevel.HIGH,
+        fix="Add onlyOwner modifier or implement proper authorization checks",
+        cwe_reference="CWE-284",
+        impact="Unauthorized users can access critical functions",
+        likelihood="High"
+    ),
+    Rule(
+        rule_id="integer-overflow",
+        name="Integer overflow/underflow",
+        severity=RiskLevel.HIGH,
+        fix="1. Upgrade to Solidity >=0.8.0\n2. Use SafeMath library\n3. Use unchecked blocks only when safe",
+        cwe_reference="CWE-190",
+        impact="Unexpected values, potential exploitation",
+        likelihood="Medium"
+    ),
+    # ==================== MEDIUM (🟡) ====================
+    Rule(
+        rule_id="tx-origin",
+        name="tx.origin authentication",
+        severity=RiskLevel.MEDIUM,
+        fix="Use msg.sender instead of tx.origin for authentication",
+        cwe_reference="CWE-477",
+        impact="Users may be tricked into authorizing malicious contracts",
+        likelihood="Medium"
+    ),
+    Rule(
+        rule_id="gas-limit",
+        name="Gas limit",
+        severity=RiskLevel.MEDIUM,
+        fix="Use call() with appropriate gas amount: (bool success, ) = to.call{value: amount}(\"\")",
+        cwe_reference="CWE-682",
+        impact="Functions may become unusable",
+        likelihood="Low"
+    ),
+    Rule(
+        rule_id="timestamp-dependency",
+        name="Timestamp dependency",
+        severity=RiskLevel.MEDIUM,
+        fix="Use Chainlink VRF or commit-reveal scheme for randomness",
+        cwe_reference="CWE-682",
+        impact="Miners can influence outcomes",
+        likelihood="Medium"
+    ),
+    # ==================== LOW (🔵) ====================
+    Rule(
+        rule_id="floating-pragma",
+        name="Floating pragma",
+        severity=RiskLevel.LOW,
+        fix="Use exact pragma version: pragma solidity X.Y.Z",
+        cwe_reference="CWE-1103",
+        impact="Unexpected behavior with different compiler versions",
+        likelihood="Low"
+    ),
+    Rule(
+        rule_id="unused-state-variable",
+        name="Unused state variable",
+        severity=RiskLevel.LOW,
+        fix="Remove unused variables or document why they're needed",
+        impact="Higher gas costs, code clutter",
+        likelihood="N/A"
+    ),
+    # ==================== INFO (🟢) ====================
+    Rule(
+        rule_id="best-practices",
+        name="Best practices",
+        severity=RiskLevel.INFO,
+        fix="",
+        impact="Improved security and maintainability",
+        likelihood="N/A"
+    ),
+    # ==================== ANALYSIS ====================
+    Rule(
+        rule_id="rule-timeout",
+        name="Rule timed out",
+        severity=RiskLevel.MEDIUM,
+        fix="Review the code this check covers manually; very long or generated lines are the usual cause",
+        impact="Issues this check looks for may be present but unreported",
+        likelihood="Unknown"
+    ),
+]}
@@ -0,0 +1,131 @@
+# D:\My_Work\smartShiledAI\backend\app\scanner\sarif.py
+from typing import List, Dict, Any, Tuple
+
+from app.scanner.rules import RiskLevel, RULES
+
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+SARIF_VERSION = "2.1.0"
+TOOL_NAME = "SmartShield AI"
+SARIF_MEDIA_TYPE = "application/sarif+json"
+
+# SARIF result level per severity
+LEVELS = {
+    RiskLevel.CRITICAL: "error",
+    RiskLevel.HIGH: "error",
+    RiskLevel.MEDIUM: "warning",
+    RiskLevel.LOW: "note",
+    RiskLevel.INFO: "note",
+    RiskLevel.SAFE: "none",
+}
+
+# Numeric scores code-scanning UIs use to bucket findings (>= 9 critical, >= 7 high, >= 4 medium)
+SECURITY_SEVERITY = {
+    RiskLevel.CRITICAL: "9.5",
+    RiskLevel.HIGH: "8.0",
+    RiskLevel.MEDIUM: "5.5",
+    RiskLevel.LOW: "3.0",
+}
+
+RULE_IDS = list(RULES)
+
+
+def _risk_level(severity: str) -> RiskLevel:
+    """Stored findings carry the display value ("🔴 CRITICAL")"""
+    for level in RiskLevel:
+        if level.value == severity:
+            return level
+    return RiskLevel.INFO
+
+
+def _rule_descriptor(rule_id: str) -> Dict[str, Any]:
+    rule = RULES[rule_id]
+    properties = {"tags": ["security", "solidity"]}
+    if rule.cwe_reference:
+        properties["tags"].append(f"external/cwe/{rule.cwe_reference.lower()}")
+        properties["cwe"] = rule.cwe_reference
+    if rule.severity in SECURITY_SEVERITY:
+        properties["security-severity"] = SECURITY_SEVERITY[rule.severity]
+
+    descriptor = {
+        "id": rule_id,
+        "name": rule.name,
+        "shortDescription": {"text": rule.name},
+        "defaultConfiguration": {"level": LEVELS[rule.severity]},
+        "properties": properties,
+    }
+    if rule.fix:
+        descriptor["help"] = {"text": rule.fix}
+    if rule.impact:
+        descriptor["fullDescription"] = {"text": rule.impact}
+    return descriptor
+
+
+def sarif_result(finding: Dict[str, Any], uri: str) -> Dict[str, Any]:
+    """One SARIF result for a serialized finding (fresh or loaded from a stored report)"""
+    rule_id = finding.get("rule_id") or finding.get("issue", "unknown")
+    level = _risk_level(finding.get("severity", ""))
+    line_numbers = finding.get("line_numbers") or []
+
+    location = {"physicalLocation": {"artifactLocation": {"uri": uri}}}
+    if line_numbers:
+        location["physicalLocation"]["region"] = {"startLine": line_numbers[0]}
+
+    result = {
+        "ruleId": rule_id,
+        "level": LEVELS[level],
+        "message": {"text": f"{finding.get('issue', '')}: {finding.get('description', '')}"},
+        "locations": [location],
+        "properties": {
+            "severity": level.name.lower(),
+            "fix": finding.get("fix", ""),
+            "impact": finding.get("impact", ""),
+            "likelihood": finding.get("likelihood", ""),
+        },
+    }
+    if rule_id in RULES:
+        result["ruleIndex"] = RULE_IDS.index(rule_id)
+    if len(line_numbers) > 1:
+        result["relatedLocations"] = [
+            {
+                "id": index,
+                "physicalLocation": {"artifactLocation": {"uri": uri}, "region": {"startLine": line}},
+            }
+            for index, line in enumerate(line_numbers[1:], 1)
+        ]
+    if finding.get("fingerprint"):
+        result["partialFingerprints"] = {"smartshield/v1": finding["fingerprint"]}
+    return result
+
+
+def to_sarif(reports: List[Tuple[str, Dict[str, Any]]]) -> Dict[str, Any]:
+    """
+    SARIF 2.1.0 log for one or more analyzer reports, given as (file uri, report) pairs.
+    All files go into a single run, so a project archive uploads as one analysis.
+    """
+    artifacts = []
+    results = []
+    for uri, report in reports:
+        artifacts.append({
+            "location": {"uri": uri},
+            "properties": {
+                "security_score": report.get("security_score"),
+                "deployment_readiness": report.get("deployment_readiness"),
+                "summary": report.get("summary"),
+            },
+        })
+        results.extend(sarif_result(finding, uri) for finding in report.get("vulnerabilities", []))
+
+    return {
+        "$schema": SARIF_SCHEMA,
+        "version": SARIF_VERSION,
+        "runs": [{
+            "tool": {
+                "driver": {
+                    "name": TOOL_NAME,
+                    "rules": [_rule_descriptor(rule_id) for rule_id in RULE_IDS],
+                }
+            },
+            "artifacts": artifacts,
+            "results": results,
+        }],
+    }
@@ -0,0 +1,143 @@
+# D:\My_Work\smartShiledAI\backend\app\scanner\scheduler.py
+import os
+import time
+import asyncio
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Deque, Dict, Optional
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Analyses run at once per process, and the part of them reserved for the fast lane
+SCAN_WORKERS = int(os.getenv("SCAN_WORKERS", os.cpu_count() or 2))
+SCAN_FAST_LANE_SHARE = float(os.getenv("SCAN_FAST_LANE_SHARE", "0.5"))
+# Larger single files go to the bulk lane
+SCAN_FAST_LANE_MAX_BYTES = int(os.getenv("SCAN_FAST_LANE_MAX_BYTES", 256 * 1024))
+
+# Small single-file scans (dashboard uploads) vs archives, large files and lane=bulk (CI)
+FAST = "fast"
+BULK = "bulk"
+LANES = [FAST, BULK]
+
+
+def choose_lane(size_bytes: int, requested: Optional[str] = None, archive: bool = False) -> str:
+    """Lane of a scan; asking for the fast lane doesn't get large or multi-file work into it"""
+    if requested == BULK or archive or size_bytes > SCAN_FAST_LANE_MAX_BYTES:
+        return BULK
+    return FAST
+
+
+@dataclass
+class Ticket:
+    """A granted slot: which lane it came from and how long the scan queued for it"""
+    lane: str
+    queued_at: float
+    started_at: float = 0.0
+
+    @property
+    def wait_ms(self) -> float:
+        return round((self.started_at - self.queued_at) * 1000, 1)
+
+
+class _Lane:
+    def __init__(self, name: str, slots: int):
+        self.name = name
+        self.slots = slots
+        self.busy = 0
+        # user -> waiters, in round-robin order (a served user moves to the back)
+        self.waiting: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+
+    def has_free_slot(self) -> bool:
+        return self.busy < self.slots
+
+    def pop_waiter(self) -> Optional[asyncio.Future]:
+        """Next waiter, taking users in turn"""
+        if not self.waiting:
+            return None
+        user, queue = next(iter(self.waiting.items()))
+        waiter = queue.popleft()
+        if queue:
+            self.waiting.move_to_end(user)
+        else:
+            del self.waiting[user]
+        return waiter
+
+
+class ScanScheduler:
+    """Analysis slots per lane for this process, handed out round-robin between users"""
+
+    def __init__(self, workers: int = SCAN_WORKERS, fast_share: float = SCAN_FAST_LANE_SHARE):
+        workers = max(workers, 2)
+        fast_slots = min(max(round(workers * fast_share), 1), workers - 1)
+        self.lanes: Dict[str, _Lane] = {
+            FAST: _Lane(FAST, fast_slots),
+            BULK: _Lane(BULK, workers - fast_slots),
+        }
+
+    def _grant(self, lane: str) -> Optional[str]:
+        """Take a free slot for lane without queueing; returns the lane it belongs to"""
+        own = self.lanes[lane]
+        if own.has_free_slot() and not own.waiting:
+            own.busy += 1
+            return lane
+        bulk = self.lanes[BULK]
+        if lane == FAST and bulk.has_free_slot() and not bulk.waiting:
+            bulk.busy += 1
+            return BULK
+        return None
+
+    def _release(self, slot_lane: str):
+        """Hand a freed slot to the next waiter of its lane (idle bulk slots also serve fast)"""
+        for lane in ([BULK, FAST] if slot_lane == BULK else [FAST]):
+            while (waiter := self.lanes[lane].pop_waiter()) is not None:
+                # Skip waiters cancelled since they queued
+                if not waiter.done():
+                    waiter.set_result(slot_lane)
+                    return
+        self.lanes[slot_lane].busy -= 1
+
+    @asynccontextmanager
+    async def slot(self, user: str, lane: str):
+        """Wait for an analysis slot in lane, fairly among users; yields the Ticket"""
+        ticket = Ticket(lane=lane, queued_at=time.perf_counter())
+        slot_lane = self._grant(lane)
+        if slot_lane is None:
+            waiter = asyncio.get_running_loop().create_future()
+            waiting = self.lanes[lane].waiting
+            waiting.setdefault(user, deque()).append(waiter)
+            try:
+                slot_lane = await waiter
+            except asyncio.CancelledError:
+                if waiter.cancelled():
+                    # Client went away while queued
+                    queue = waiting.get(user)
+                    if queue is not None and waiter in queue:
+                        queue.remove(waiter)
+                        if not queue:
+                            del waiting[user]
+                else:
+                    # Cancelled right after being granted: pass the slot on
+                    self._release(waiter.result())
+                raise
+        ticket.started_at = time.perf_counter()
+        try:
+            yield ticket
+        finally:
+            self._release(slot_lane)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            name: {
+                "slots": lane.slots,
+                "busy": lane.busy,
+                "waiting": sum(len(queue) for queue in lane.waiting.values()),
+                "waiting_users": len(lane.waiting),
+            }
+            for name, lane in self.lanes.items()
+        }
+
+
+scan_scheduler = ScanScheduler()
@@ -0,0 +1,176 @@
+# D:\My_Work\smartShiledAI\backend\app\scanner\scoring.py
+import os
+import re
+import json
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional, Tuple
+from dotenv import load_dotenv
+
+from app.scanner.rules import RiskLevel
+
+# Load environment variables
+load_dotenv()
+
+# Optional JSON file overriding parts of the default policy, e.g.
+# {"version": "2", "deductions": {"gas-limit": 3}, "blocking_severities": ["critical"]}
+SCORING_POLICY_PATH = os.getenv("SCORING_POLICY_PATH")
+
+# Stored findings carry the display value ("🔴 CRITICAL")
+SEVERITY_NAMES = {level.value: level.name.lower() for level in RiskLevel}
+SUMMARY_SEVERITIES = ["critical", "high", "medium", "low", "info"]
+
+# Points lost per finding, by rule_id, or by "rule_id:severity" for rules whose
+# severity depends on the contract (selfdestruct is milder behind access control)
+DEFAULT_DEDUCTIONS = {
+    "reentrancy": 30,
+    "unchecked-external-call": 25,
+    "selfdestruct:high": 20,
+    "selfdestruct:medium": 10,
+    "missing-access-control": 20,
+    "integer-overflow": 15,
+    "tx-origin": 10,
+    "gas-limit": 5,
+    "timestamp-dependency": 8,
+    "floating-pragma": 2,
+    "unused-state-variable": 1,
+}
+
+# Rules whose finding groups several items, each deducted separately
+UNIT_COUNTS = {
+    "unused-state-variable": re.compile(r'Found (\d+) unused'),
+}
+
+# Reports stored before findings carried a rule_id are matched on their title
+LEGACY_ISSUE_PREFIXES = [
+    ("Critical Reentrancy", "reentrancy"),
+    ("Unchecked External", "unchecked-external-call"),
+    ("Selfdestruct Usage", "selfdestruct"),
+    ("Missing Access Control", "missing-access-control"),
+    ("Integer Overflow", "integer-overflow"),
+    ("TX.Origin", "tx-origin"),
+    ("Gas Limit", "gas-limit"),
+    ("Timestamp Dependency", "timestamp-dependency"),
+    ("Floating Pragma", "floating-pragma"),
+    ("Unused State Variables", "unused-state-variable"),
+    ("Best Practices", "best-practices"),
+    ("Rule Timed Out", "rule-timeout"),
+]
+
+# Readiness of a report whose worst finding has this severity, if that severity blocks deployment
+BLOCKING_READINESS = {
+    "critical": ("CRITICAL", "DO NOT DEPLOY! Critical vulnerabilities detected."),
+    "high": ("HIGH", "Fix high severity issues before deployment."),
+    "medium": ("MEDIUM", "Fix medium severity issues before deployment."),
+    "low": ("LOW", "Fix low severity issues before deployment."),
+}
+
+
+def finding_rule_id(finding: Dict[str, Any]) -> str:
+    """rule_id of a serialized finding, inferred from its title for legacy reports"""
+    if finding.get("rule_id"):
+        return finding["rule_id"]
+    issue = finding.get("issue", "")
+    for prefix, rule_id in LEGACY_ISSUE_PREFIXES:
+        if issue.startswith(prefix):
+            return rule_id
+    return ""
+
+
+def _units(rule_id: str, finding: Dict[str, Any]) -> int:
+    pattern = UNIT_COUNTS.get(rule_id)
+    if pattern is None:
+        return 1
+    match = pattern.search(finding.get("description", ""))
+    return int(match.group(1)) if match else 1
+
+
+@dataclass(frozen=True)
+class ScoringPolicy:
+    """
+    How findings turn into a security score, severity summary and deployment readiness.
+    Works on serialized findings only, so stored reports can be rescored without the source.
+    """
+    version: str = "1"
+    base_score: int = 100
+    deductions: Dict[str, int] = field(default_factory=lambda: dict(DEFAULT_DEDUCTIONS))
+    # Severities that block deployment, most severe first
+    blocking_severities: Tuple[str, ...] = ("critical", "high")
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ScoringPolicy":
+        """Policy from a JSON document; deductions are merged over the defaults"""
+        deductions = dict(DEFAULT_DEDUCTIONS)
+        deductions.update(data.get("deductions", {}))
+        blocking = tuple(data.get("blocking_severities", cls.blocking_severities))
+        unknown = [name for name in blocking if name not in BLOCKING_READINESS]
+        if unknown:
+            raise ValueError(f"Unknown blocking severities: {unknown}")
+        return cls(
+            version=str(data.get("version", cls.version)),
+            base_score=int(data.get("base_score", cls.base_score)),
+            deductions=deductions,
+            blocking_severities=tuple(name for name in BLOCKING_READINESS if name in blocking),
+        )
+
+    @classmethod
+    def from_env(cls) -> "ScoringPolicy":
+        if not SCORING_POLICY_PATH:
+            return cls()
+        with open(SCORING_POLICY_PATH, encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+    def deduction(self, finding: Dict[str, Any]) -> int:
+        """Points one finding costs"""
+        rule_id = finding_rule_id(finding)
+        severity = SEVERITY_NAMES.get(finding.get("severity"), "")
+        points = self.deductions.get(f"{rule_id}:{severity}", self.deductions.get(rule_id, 0))
+        return points * _units(rule_id, finding) if points else 0
+
+    def score(self, findings: List[Dict[str, Any]]) -> int:
+        score = self.base_score - sum(self.deduction(finding) for finding in findings)
+        return max(0, min(100, score))
+
+    def summary(self, findings: List[Dict[str, Any]]) -> Dict[str, int]:
+        counts = dict.fromkeys(SUMMARY_SEVERITIES, 0)
+        for finding in findings:
+            severity = SEVERITY_NAMES.get(finding.get("severity"))
+            if severity in counts:
+                counts[severity] += 1
+        counts["total"] = len(findings)
+        return counts
+
+    def readiness(self, summary: Dict[str, int]) -> Dict[str, Any]:
+        for severity in self.blocking_severities:
+            if summary.get(severity):
+                risk_level, message = BLOCKING_READINESS[severity]
+                return {
+                    "can_deploy": False,
+                    "risk_level": risk_level,
+                    "reason": message,
+                    "recommendation": "Fix critical issues before deployment"
+                }
+        return {
+            "can_deploy": True,
+            "risk_level": "LOW",
+            "reason": "Contract is safe to deploy.",
+            "recommendation": "Ready for deployment"
+        }
+
+    def apply(self, report: Dict[str, Any]) -> bool:
+        """
+        Recompute score, summary and readiness of a report from its findings, in place.
+        Returns whether anything changed.
+        """
+        findings = report.get("vulnerabilities", [])
+        summary = self.summary(findings)
+        scored = {
+            "security_score": self.score(findings),
+            "deployment_readiness": self.readiness(summary),
+            "summary": summary,
+        }
+        changed = any(report.get(key) != value for key, value in scored.items())
+        report.update(scored)
+        return changed
+
+
+scoring_policy = ScoringPolicy.from_env()
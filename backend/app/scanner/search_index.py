@@ -0,0 +1,292 @@
+# D:\My_Work\smartShiledAI\backend\app\scanner\search_index.py
+import os
+import re
+import sqlite3
+import hashlib
+import argparse
+import threading
+from typing import List, Dict, Any, Optional, Tuple
+from dotenv import load_dotenv
+
+from app.scanner.rescore import REPORTS_DIR, REPORT_SUFFIX
+from app.scanner.rules import RiskLevel
+from app.storage.storage import get_storage
+from app.tracing.logs import get_logger
+
+# Load environment variables
+load_dotenv()
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# "sqlite" keeps a local FTS5 index of every finding (one file per host, shared by its
+# workers), "off" disables search
+SEARCH_INDEX_BACKEND = os.getenv("SEARCH_INDEX_BACKEND", "sqlite")
+SEARCH_INDEX_PATH = os.getenv("SEARCH_INDEX_PATH", os.path.join(BACKEND_DIR, "search_index.db"))
+
+MAX_RESULTS = 200
+# Severity filter values are level names ("critical"); findings store the display value
+SEVERITY_VALUES = {level.name.lower(): level.value for level in RiskLevel}
+SEVERITY_NAMES = {value: name for name, value in SEVERITY_VALUES.items()}
+
+TERM_PATTERN = re.compile(r'"([^"]*)"|(\S+)')
+
+logger = get_logger("search_index")
+
+SCHEMA = [
+    # Filterable columns, one row per finding; the text lives in finding_text under the same rowid
+    """CREATE TABLE IF NOT EXISTS findings (
+        id INTEGER PRIMARY KEY,
+        report_id TEXT NOT NULL,
+        uploaded_by TEXT NOT NULL,
+        filename TEXT,
+        uploaded_at TEXT,
+        rule_id TEXT,
+        severity TEXT,
+        cwe TEXT,
+        line_numbers TEXT
+    )""",
+    "CREATE INDEX IF NOT EXISTS ix_findings_report ON findings (report_id)",
+    "CREATE INDEX IF NOT EXISTS ix_findings_user ON findings (uploaded_by, severity, rule_id)",
+    # owner holds one token per user, so a text query only walks that user's postings
+    """CREATE VIRTUAL TABLE IF NOT EXISTS finding_text USING fts5(
+        owner, issue, description, cwe, snippet, tokenize = 'unicode61'
+    )""",
+]
+
+
+def owner_token(uploaded_by: str) -> str:
+    return "u" + hashlib.sha256(uploaded_by.encode("utf-8")).hexdigest()[:24]
+
+
+def fts_query(text: str) -> str:
+    """
+    FTS5 query for user input: every term (or "quoted phrase") must match, a trailing *
+    makes a prefix search. Terms are quoted, so input can never be a syntax error.
+    """
+    parts = []
+    for phrase, term in TERM_PATTERN.findall(text):
+        words = phrase or term
+        prefix = not phrase and words.endswith("*")
+        words = words.rstrip("*").replace('"', '""')
+        if words:
+            parts.append(f'"{words}"' + ("*" if prefix else ""))
+    return " ".join(parts)
+
+
+class SearchIndex:
+    """Full-text index of findings across all stored reports, with severity/rule facets"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        conn = self._connection()
+        for statement in SCHEMA:
+            conn.execute(statement)
+
+    @classmethod
+    def from_env(cls) -> Optional["SearchIndex"]:
+        if SEARCH_INDEX_BACKEND == "off":
+            return None
+        try:
+            return cls(SEARCH_INDEX_PATH)
+        except sqlite3.Error:
+            # e.g. an SQLite build without FTS5
+            logger.exception("Search index unavailable")
+            return None
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # ---- indexing ----
+
+    def index_report(self, report_id: str, full_report: dict):
+        """Replace the indexed findings of one report"""
+        report = full_report.get("report") or {}
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._delete(conn, report_id)
+            for finding in report.get("vulnerabilities", []):
+                cursor = conn.execute(
+                    "INSERT INTO findings (report_id, uploaded_by, filename, uploaded_at, rule_id, severity, cwe, line_numbers) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        report_id,
+                        full_report.get("uploaded_by", ""),
+                        full_report.get("filename"),
+                        full_report.get("uploaded_at"),
+                        finding.get("rule_id"),
+                        finding.get("severity"),
+                        finding.get("cwe_reference") or None,
+                        ",".join(str(n) for n in finding.get("line_numbers", [])),
+                    ),
+                )
+                conn.execute(
+                    "INSERT INTO finding_text (rowid, owner, issue, description, cwe, snippet) VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        cursor.lastrowid,
+                        owner_token(full_report.get("uploaded_by", "")),
+                        finding.get("issue", ""),
+                        finding.get("description", ""),
+                        finding.get("cwe_reference", ""),
+                        # Only reports made with detailed=True store their snippets
+                        finding.get("code_snippet", ""),
+                    ),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _delete(self, conn: sqlite3.Connection, report_id: str):
+        conn.execute(
+            "DELETE FROM finding_text WHERE rowid IN (SELECT id FROM findings WHERE report_id = ?)",
+            (report_id,),
+        )
+        conn.execute("DELETE FROM findings WHERE report_id = ?", (report_id,))
+
+    # ---- search ----
+
+    def search(
+        self,
+        uploaded_by: str,
+        query: str = "",
+        severities: Optional[List[str]] = None,
+        rules: Optional[List[str]] = None,
+        cwe: Optional[str] = None,
+        limit: int = 50,
+        offset: int = 0,
+    ) -> Dict[str, Any]:
+        """
+        Findings of one user's reports matching query (all of its terms, anywhere in issue,
+        description, CWE or snippet) and the filters, best match first. Facets count the
+        matches per severity and rule, each ignoring its own filter, so the UI can show
+        what the other choices would return.
+        """
+        terms = fts_query(query)
+        conditions = [("f.uploaded_by = ?", [uploaded_by])]
+        if cwe:
+            conditions.append(("f.cwe = ?", [cwe.upper()]))
+        if terms:
+            # Text terms only search the text columns, never the owner token
+            match = f'owner : "{owner_token(uploaded_by)}" AND {{issue description cwe snippet}} : ({terms})'
+            conditions.append(("finding_text MATCH ?", [match]))
+        severity_filter = rule_filter = None
+        if severities:
+            values = [SEVERITY_VALUES.get(name, name) for name in severities]
+            severity_filter = (f"f.severity IN ({','.join('?' * len(values))})", values)
+        if rules:
+            rule_filter = (f"f.rule_id IN ({','.join('?' * len(rules))})", list(rules))
+
+        def where(*filters) -> Tuple[str, list]:
+            clauses, params = [], []
+            for condition in conditions + [item for item in filters if item]:
+                clauses.append(condition[0])
+                params.extend(condition[1])
+            return " AND ".join(clauses), params
+
+        # With a text query the FTS match drives the join (CROSS JOIN fixes the order; the
+        # planner would otherwise re-run the match for every row of the user's findings).
+        # Without one nothing touches the FTS table but the page of results.
+        source = "finding_text CROSS JOIN findings f ON f.id = finding_text.rowid" if terms else "findings f"
+        conn = self._connection()
+        clause, params = where(severity_filter, rule_filter)
+        total, reports = conn.execute(
+            f"SELECT COUNT(*), COUNT(DISTINCT f.report_id) FROM {source} WHERE {clause}", params
+        ).fetchone()
+
+        # Rank and page on ids first; text is only fetched (and highlighted) for the page
+        order = "bm25(finding_text, 0, 10, 5, 5, 1)" if terms else "f.id DESC"
+        rows = conn.execute(
+            f"SELECT f.id, f.report_id, f.filename, f.uploaded_at, f.rule_id, f.severity, f.cwe, f.line_numbers "
+            f"FROM {source} WHERE {clause} ORDER BY {order} LIMIT ? OFFSET ?",
+            params + [min(limit, MAX_RESULTS), offset],
+        ).fetchall()
+        texts = {}
+        if rows:
+            ids = [row[0] for row in rows]
+            placeholders = ",".join("?" * len(ids))
+            if terms:
+                texts = {rowid: (issue, excerpt) for rowid, issue, excerpt in conn.execute(
+                    "SELECT rowid, highlight(finding_text, 1, '[', ']'), snippet(finding_text, 4, '[', ']', '…', 12) "
+                    f"FROM finding_text WHERE finding_text MATCH ? AND rowid IN ({placeholders})",
+                    [match] + ids,
+                )}
+            else:
+                texts = {rowid: (issue, None) for rowid, issue in conn.execute(
+                    f"SELECT rowid, issue FROM finding_text WHERE rowid IN ({placeholders})", ids
+                )}
+
+        clause, params = where(rule_filter)
+        severity_counts = conn.execute(
+            f"SELECT f.severity, COUNT(*) FROM {source} WHERE {clause} GROUP BY f.severity", params
+        ).fetchall()
+        clause, params = where(severity_filter)
+        rule_counts = conn.execute(
+            f"SELECT f.rule_id, COUNT(*) FROM {source} WHERE {clause} GROUP BY f.rule_id ORDER BY COUNT(*) DESC", params
+        ).fetchall()
+
+        return {
+            "query": query,
+            "total": total,
+            "reports": reports,
+            "results": [
+                {
+                    "report_id": report_id,
+                    "filename": filename,
+                    "uploaded_at": uploaded_at,
+                    "rule_id": rule_id,
+                    "severity": severity,
+                    "cwe_reference": cwe_reference,
+                    "line_numbers": [int(n) for n in line_numbers.split(",") if n] if line_numbers else [],
+                    "issue": texts.get(rowid, (None, None))[0],
+                    "match": texts.get(rowid, (None, None))[1],
+                }
+                for rowid, report_id, filename, uploaded_at, rule_id, severity, cwe_reference, line_numbers in rows
+            ],
+            "facets": {
+                "severity": {SEVERITY_NAMES.get(severity, severity): count for severity, count in severity_counts},
+                "rule": {rule_id or "unknown": count for rule_id, count in rule_counts},
+            },
+        }
+
+
+search_index = SearchIndex.from_env()
+
+
+def index_report_findings(report_id: str, full_report: dict):
+    """Index a stored report's findings for search; a failure only leaves the report unsearchable"""
+    if search_index is None:
+        return
+    try:
+        search_index.index_report(report_id, full_report)
+    except sqlite3.Error:
+        logger.exception("Search indexing failed", extra={"fields": {"report": report_id}})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index the findings of every stored report for search")
+    parser.parse_args()
+    if search_index is None:
+        raise SystemExit("Search index is disabled (SEARCH_INDEX_BACKEND=off) or unavailable")
+
+    storage = get_storage("reports", REPORTS_DIR)
+    indexed = failed = 0
+    for report_id in storage.iter_keys_sync(REPORT_SUFFIX):
+        try:
+            search_index.index_report(report_id, storage.read_json_sync(report_id))
+            indexed += 1
+        except (OSError, ValueError, sqlite3.Error):
+            failed += 1
+            logger.exception("Search indexing failed", extra={"fields": {"report": report_id}})
+    logger.info("Search index rebuilt", extra={"fields": {"indexed": indexed, "failed": failed}})
+
+
+if __name__ == "__main__":
+    main()
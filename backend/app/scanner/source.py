@@ -0,0 +1,175 @@
+# D:\My_Work\smartShiledAI\backend\app\scanner\source.py
+import mmap
+from array import array
+from bisect import bisect_right
+from typing import List, Iterable, Iterator, Optional
+from app.scanner.patterns import pattern_cache
+
+
+def _line_starts(buffer, newline) -> array:
+    """Offsets where each line starts, found with the buffer's own (C level) find"""
+    offsets = array('Q', [0])
+    position = buffer.find(newline)
+    while position != -1:
+        offsets.append(position + 1)
+        position = buffer.find(newline, position + 1)
+    return offsets
+
+
+def _literal_lines(buffer, offsets: array, literal) -> List[int]:
+    """
+    1-based numbers of the lines containing literal.
+    After a hit the search jumps to the next line, so each line is reported once.
+    """
+    lines = []
+    position = buffer.find(literal)
+    while position != -1:
+        line_index = bisect_right(offsets, position) - 1
+        lines.append(line_index + 1)
+        if line_index + 1 >= len(offsets):
+            break
+        position = buffer.find(literal, offsets[line_index + 1])
+    return lines
+
+
+def _single_line(pattern: str) -> str:
+    """A line-level pattern made safe to run over a whole buffer: \\s must not cross a newline"""
+    return pattern.replace(r'\s', r'[^\S\n]')
+
+
+class InMemorySource:
+    """
+    Contract source held as a str, split into lines once.
+    With max_line_length, longer lines (minified or crafted input) are cut to that length,
+    so no rule regex ever runs over an unbounded line.
+    """
+
+    def __init__(self, code: str, max_line_length: Optional[int] = None):
+        self.size = len(code.encode('utf-8'))
+        self._lines = code.split('\n')
+        self.truncated_lines = 0
+        if max_line_length and len(code) > max_line_length:
+            for index, line in enumerate(self._lines):
+                if len(line) > max_line_length:
+                    self._lines[index] = line[:max_line_length]
+                    self.truncated_lines += 1
+            if self.truncated_lines:
+                code = '\n'.join(self._lines)
+        self.code = code
+        self._offsets = None
+
+    def __len__(self) -> int:
+        return len(self._lines)
+
+    def __getitem__(self, index: int) -> str:
+        return self._lines[index]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._lines)
+
+    def search(self, pattern: str) -> Optional[str]:
+        """First match of pattern in the whole source (group 1 if the pattern has one)"""
+        match = pattern_cache.search(pattern, self.code, linear=True)
+        if not match:
+            return None
+        return match.group(1) if match.re.groups else match.group(0)
+
+    def findall(self, pattern: str) -> List[str]:
+        return pattern_cache.findall(pattern, self.code, linear=True)
+
+    def contains(self, literal: str) -> bool:
+        return literal in self.code
+
+    def literal_lines(self, literal: str) -> List[int]:
+        """Line numbers containing literal, without walking the lines in Python"""
+        if self._offsets is None:
+            self._offsets = _line_starts(self.code, '\n')
+        return _literal_lines(self.code, self._offsets, literal)
+
+    def matching_lines(self, pattern: str, literals: Iterable[str] = ()) -> List[int]:
+        """Line numbers a line-level pattern matches, from one regex pass over the whole code"""
+        if self._offsets is None:
+            self._offsets = _line_starts(self.code, '\n')
+        compiled = pattern_cache.compile(_single_line(pattern), linear=True)
+        offsets = self._offsets
+        lines = []
+        for match in compiled.finditer(self.code):
+            line_num = bisect_right(offsets, match.start())
+            if not lines or lines[-1] != line_num:
+                lines.append(line_num)
+        return lines
+
+    def close(self):
+        pass
+
+
+class MappedSource:
+    """
+    Contract source read through mmap for huge/generated files.
+    Only an array of line start offsets is kept in memory; lines are decoded on access.
+    """
+
+    def __init__(self, path: str, max_line_length: Optional[int] = None):
+        self.max_line_length = max_line_length
+        self._file = open(path, "rb")
+        self.size = self._file.seek(0, 2)
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b""
+        self.code = None
+
+        # 8 bytes per line instead of a str object per line
+        self._offsets = _line_starts(self._map, b'\n')
+        # Lines are cut on access. Counted by byte length, so lines of multi-byte text
+        # just under the cap may be counted too
+        self.truncated_lines = 0
+        if max_line_length:
+            ends = self._offsets[1:].tolist() + [self.size + 1]
+            self.truncated_lines = sum(1 for start, end in zip(self._offsets, ends) if end - start - 1 > max_line_length)
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def __getitem__(self, index: int) -> str:
+        if index < 0:
+            index += len(self._offsets)
+        start = self._offsets[index]
+        end = self._offsets[index + 1] - 1 if index + 1 < len(self._offsets) else self.size
+        line = self._map[start:end].decode('utf-8', errors='replace')
+        return line[:self.max_line_length] if self.max_line_length else line
+
+    def __iter__(self) -> Iterator[str]:
+        for index in range(len(self._offsets)):
+            yield self[index]
+
+    def search(self, pattern: str) -> Optional[str]:
+        """First match of pattern in the whole source (group 1 if the pattern has one)"""
+        match = pattern_cache.search(pattern.encode('utf-8'), self._map, linear=True)
+        if not match:
+            return None
+        value = match.group(1) if match.re.groups else match.group(0)
+        return value.decode('utf-8', errors='replace')
+
+    def findall(self, pattern: str) -> List[str]:
+        return [m.decode('utf-8', errors='replace') for m in pattern_cache.findall(pattern.encode('utf-8'), self._map, linear=True)]
+
+    def contains(self, literal: str) -> bool:
+        return self._map.find(literal.encode('utf-8')) != -1
+
+    def literal_lines(self, literal: str) -> List[int]:
+        """Line numbers containing literal, searched directly in the mapped bytes"""
+        return _literal_lines(self._map, self._offsets, literal.encode('utf-8'))
+
+    def matching_lines(self, pattern: str, literals: Iterable[str] = ()) -> List[int]:
+        """
+        Line numbers a line-level pattern matches. The pattern runs on the decoded
+        candidate lines (those holding one of literals), so str regex semantics apply.
+        """
+        candidates = set()
+        for literal in literals:
+            candidates.update(self.literal_lines(literal))
+        compiled = pattern_cache.compile(pattern)
+        return [line_num for line_num in sorted(candidates) if compiled.search(self[line_num - 1])]
+
+    def close(self):
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
@@ -0,0 +1,437 @@
+# D:\My_Work\smartShiledAI\backend\app\scanner\symbols.py
+import re
+from dataclasses import dataclass, field
+from typing import List, Dict, Iterable, Iterator, Tuple
+
+from app.scanner.function_memo import Summary, function_key
+
+# One regex for every token we care about; comments and strings are recognized so
+# that identifiers inside them never count as usage
+TOKEN_PATTERN = re.compile(r'''
+    (?P<line_comment>//.*)
+  | (?P<block_comment>/\*)
+  | (?P<string>"(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')
+  | (?P<ident>[A-Za-z_$][\w$]*)
+  | (?P<number>\d[\w.]*)
+  | (?P<op><<=|>>=|\+\+|--|[+\-*/%&|^]=|==|!=|<=|>=|=>|[=(){}\[\];,.])
+  | (?P<other>\S)
+''', re.VERBOSE)
+
+ELEMENTARY_TYPE = re.compile(r'(?:u?int\d*|bytes\d*|address|bool|string|mapping)$')
+ASSIGN_OPS = {'=', '+=', '-=', '*=', '/=', '%=', '&=', '|=', '^=', '<<=', '>>='}
+UNARY_WRITE_OPS = {'++', '--', 'delete'}
+CONTRACT_KEYWORDS = {'contract', 'library', 'interface'}
+FUNCTION_KEYWORDS = {'function', 'modifier', 'constructor', 'fallback', 'receive'}
+NON_STATE_BLOCKS = {'struct', 'enum', 'event', 'error'}
+# Lines opening a function-like block, the unit the function memo caches
+FUNCTION_START = re.compile(r'\s*(?:function|modifier|constructor|fallback|receive)\b')
+# Remapping a cached summary costs about as much as tokenizing a couple of lines again
+MIN_MEMO_LINES = 4
+DECLARATION_MODIFIERS = {
+    'public', 'private', 'internal', 'external', 'constant', 'immutable', 'override',
+    'payable', 'memory', 'storage', 'calldata', 'transient'
+}
+
+
+@dataclass
+class Location:
+    line: int
+    column: int
+
+
+@dataclass
+class Symbol:
+    name: str
+    type: str
+    kind: str  # "state" or "local"
+    declared_at: Location
+    reads: List[Location] = field(default_factory=list)
+    writes: List[Location] = field(default_factory=list)
+
+    @property
+    def is_referenced(self) -> bool:
+        return bool(self.reads or self.writes)
+
+
+Token = Tuple[str, str, int, int]
+
+
+class Tokenizer:
+    """Tokenizer that carries block-comment state between calls, so a file can be fed in pieces"""
+
+    def __init__(self):
+        self.in_block_comment = False
+
+    def tokens(self, lines: Iterable[str], first_line: int = 1) -> Iterator[Token]:
+        """Yield (kind, text, line, column) for code tokens, skipping comments"""
+        for line_num, line in enumerate(lines, first_line):
+            position = 0
+            if self.in_block_comment:
+                end = line.find('*/')
+                if end == -1:
+                    continue
+                position = end + 2
+                self.in_block_comment = False
+
+            while True:
+                match = TOKEN_PATTERN.search(line, position)
+                if not match:
+                    break
+                kind = match.lastgroup
+                if kind == 'line_comment':
+                    break
+                if kind == 'block_comment':
+                    end = line.find('*/', match.end())
+                    if end == -1:
+                        self.in_block_comment = True
+                        break
+                    position = end + 2
+                    continue
+                position = match.end()
+                yield kind, match.group(), line_num, match.start() + 1
+
+
+def tokenize(lines: Iterable[str]) -> Iterator[Token]:
+    """Yield (kind, text, line, column) for code tokens, skipping comments"""
+    return Tokenizer().tokens(lines)
+
+
+def function_spans(lines: List[str]) -> List[Tuple[int, int]]:
+    """
+    (first, last) 0-based line indexes of function-like blocks, found by counting braces
+    on raw lines. Only a guess (braces in strings or comments fool it); the builder checks
+    each span is a self-contained block before caching it.
+    """
+    spans = []
+    index = 0
+    count = len(lines)
+    while index < count:
+        if FUNCTION_START.match(lines[index]):
+            depth = 0
+            opened = False
+            end = index
+            while end < count:
+                line = lines[end]
+                if '{' in line:
+                    opened = True
+                depth += line.count('{') - line.count('}')
+                if opened and depth <= 0:
+                    break
+                if not opened and ';' in line:
+                    break  # declaration without a body
+                end += 1
+            if opened and depth <= 0:
+                spans.append((index, end))
+                index = end + 1
+                continue
+        index += 1
+    return spans
+
+
+def _normalize_span(lines: List[str], first: int, last: int) -> Tuple[List[int], str]:
+    """
+    Line numbers a span's tokens can come from, and the text its memo key is built from:
+    indentation, trailing whitespace, blank lines and (outside block comments) comment
+    lines do not change what the span contributes, so they are left out.
+    """
+    span = lines[first:last + 1]
+    drop_comment_lines = not any('/*' in line for line in span)
+    kept = []
+    normalized = []
+    for line_num, line in enumerate(span, first + 1):
+        stripped = line.strip()
+        if not stripped or (drop_comment_lines and stripped.startswith('//')):
+            continue
+        kept.append(line_num)
+        normalized.append(stripped)
+    return kept, '\n'.join(normalized)
+
+
+def _indent(line: str) -> int:
+    return len(line) - len(line.lstrip())
+
+
+class SymbolTable:
+    """
+    Declarations, reads and writes of variables, built from a single token pass.
+    Names are resolved by name only (no lexical scoping), which is enough for
+    usage-style rules and cheap data-flow questions.
+    """
+
+    def __init__(self):
+        self.symbols: Dict[str, List[Symbol]] = {}
+        # References to names with no declaration in this file (inherited, globals, ...)
+        self.external_reads: Dict[str, List[Location]] = {}
+        self.external_writes: Dict[str, List[Location]] = {}
+
+    @classmethod
+    def build(cls, lines: Iterable[str], memo=None) -> "SymbolTable":
+        """
+        Build the table from a file's lines. With a FunctionMemo, function bodies seen
+        before (in this file or any earlier scan) reuse their cached contribution,
+        remapped to their lines here, instead of being tokenized again.
+        """
+        table = cls()
+        builder = _TableBuilder(table)
+        if memo is None:
+            builder.feed(builder.tokenizer.tokens(lines))
+        else:
+            builder.feed_with_memo(lines if isinstance(lines, list) else list(lines), memo)
+        builder.finish()
+        return table
+
+    @staticmethod
+    def _block_kind(header: List[Token], block_stack: List[str]) -> str:
+        words = {text for kind, text, _, _ in header if kind == 'ident'}
+        if words & CONTRACT_KEYWORDS:
+            return 'contract'
+        if words & FUNCTION_KEYWORDS:
+            return 'function'
+        if words & NON_STATE_BLOCKS:
+            return 'type'
+        # if/for/unchecked/assembly blocks inherit their parent
+        return block_stack[-1] if block_stack else 'file'
+
+    def _collect(
+        self,
+        statement: List[Token],
+        block_stack: List[str],
+        ends_with_semicolon: bool,
+        declarations: List[Symbol],
+        references: list
+    ):
+        if not statement:
+            return
+        parent = block_stack[-1] if block_stack else 'file'
+        if parent == 'type' or statement[0][1] in ('event', 'error'):
+            return  # struct members and event parameters are not variables
+
+        declared_index = -1
+        if ends_with_semicolon and parent in ('contract', 'function'):
+            declared_index = self._declaration_index(statement)
+            if declared_index != -1:
+                _, name, line, column = statement[declared_index]
+                symbol = Symbol(
+                    name=name,
+                    type=statement[0][1],
+                    kind='state' if parent == 'contract' else 'local',
+                    declared_at=Location(line, column),
+                )
+                declarations.append(symbol)
+
+        for index, (kind, text, line, column) in enumerate(statement):
+            if kind != 'ident' or index == declared_index:
+                continue
+            previous = statement[index - 1][1] if index else ''
+            if previous == '.':
+                continue  # member access, not a variable of this contract
+            is_write = previous in UNARY_WRITE_OPS or self._assigned_after(statement, index)
+            is_read = not is_write or previous in ('++', '--') or self._is_compound_assignment(statement, index)
+            references.append((text, Location(line, column), is_read, is_write))
+
+    @staticmethod
+    def _declaration_index(statement: List[Token]) -> int:
+        """Index of the declared name in 'type [modifiers] name [= value]', or -1"""
+        if statement[0][0] != 'ident' or not ELEMENTARY_TYPE.match(statement[0][1]):
+            return -1
+        if len(statement) < 2 or (statement[1][1] == '(' and statement[0][1] != 'mapping'):
+            return -1  # type conversion such as uint256(x), not a declaration
+        depth = 0
+        candidate = -1
+        for index, (kind, text, _, _) in enumerate(statement):
+            if text in ('(', '['):
+                depth += 1
+            elif text in (')', ']'):
+                depth -= 1
+            elif depth == 0 and text == '=':
+                break
+            elif depth == 0 and index > 0 and kind == 'ident' and text not in DECLARATION_MODIFIERS:
+                candidate = index
+            elif depth == 0 and kind == 'op' and text != '.':
+                return -1  # an expression statement, not a declaration
+        return candidate
+
+    @staticmethod
+    def _skip_accessors(statement: List[Token], index: int) -> int:
+        """Skip [..] indexing and .member chains after an identifier"""
+        index += 1
+        while index < len(statement):
+            text = statement[index][1]
+            if text == '[':
+                depth = 0
+                while index < len(statement):
+                    if statement[index][1] == '[':
+                        depth += 1
+                    elif statement[index][1] == ']':
+                        depth -= 1
+                        if depth == 0:
+                            break
+                    index += 1
+                index += 1
+            elif text == '.' and index + 1 < len(statement) and statement[index + 1][0] == 'ident':
+                index += 2
+            else:
+                break
+        return index
+
+    def _assigned_after(self, statement: List[Token], index: int) -> bool:
+        following = self._skip_accessors(statement, index)
+        if following >= len(statement):
+            return False
+        text = statement[following][1]
+        return text in ASSIGN_OPS or text in ('++', '--')
+
+    def _is_compound_assignment(self, statement: List[Token], index: int) -> bool:
+        following = self._skip_accessors(statement, index)
+        return following < len(statement) and statement[following][1] != '='
+
+    def state_variables(self) -> List[Symbol]:
+        """State variables in declaration order"""
+        found = [s for symbols in self.symbols.values() for s in symbols if s.kind == 'state']
+        return sorted(found, key=lambda s: (s.declared_at.line, s.declared_at.column))
+
+    def reads(self, name: str) -> List[Location]:
+        if name in self.symbols:
+            return self.symbols[name][0].reads
+        return self.external_reads.get(name, [])
+
+    def writes(self, name: str) -> List[Location]:
+        if name in self.symbols:
+            return self.symbols[name][0].writes
+        return self.external_writes.get(name, [])
+
+
+class _TableBuilder:
+    """State of one SymbolTable.build: tokens are fed in file order, possibly in pieces"""
+
+    def __init__(self, table: SymbolTable):
+        self.table = table
+        self.tokenizer = Tokenizer()
+        self.declarations: List[Symbol] = []
+        self.references: list = []
+        self.block_stack: List[str] = []
+        self.statement: List[Token] = []
+        # Lowest stack depth reached, and whether a '}' closed nothing, since a span started
+        self.low_water = 0
+        self.underflow = False
+
+    def feed(self, tokens: Iterable[Token]):
+        table = self.table
+        block_stack = self.block_stack
+        statement = self.statement
+        for token in tokens:
+            kind, text, _, _ = token
+            if kind == 'op' and text in ('{', '}', ';'):
+                if text == '}':
+                    table._collect(statement, block_stack, False, self.declarations, self.references)
+                    statement.clear()
+                    if block_stack:
+                        block_stack.pop()
+                        self.low_water = min(self.low_water, len(block_stack))
+                    else:
+                        self.underflow = True
+                    continue
+                table._collect(statement, block_stack, text == ';', self.declarations, self.references)
+                if text == '{':
+                    block_stack.append(SymbolTable._block_kind(statement, block_stack))
+                statement.clear()
+            else:
+                statement.append(token)
+
+    def feed_with_memo(self, lines: List[str], memo):
+        spans = []
+        for first, last in function_spans(lines):
+            kept, normalized = _normalize_span(lines, first, last)
+            if len(kept) >= MIN_MEMO_LINES:
+                spans.append((first, last, kept, normalized))
+        # Nearly every function starts at contract level, so fetch those keys in one batch
+        memo.prefetch(function_key('contract', normalized) for _, _, _, normalized in spans)
+
+        computed = {}
+        position = 0
+        for first, last, kept, normalized in spans:
+            self.feed(self.tokenizer.tokens(lines[position:first], position + 1))
+            self._feed_span(lines, first, last, kept, normalized, memo, computed)
+            position = last + 1
+        self.feed(self.tokenizer.tokens(lines[position:], position + 1))
+        memo.persist(computed)
+
+    def _feed_span(self, lines: List[str], first: int, last: int, kept: List[int], normalized: str, memo, computed: dict):
+        context = self.block_stack[-1] if self.block_stack else 'file'
+        # What a span contributes only depends on its text if it starts at a statement boundary
+        if self.statement or self.tokenizer.in_block_comment or context == 'type':
+            self.feed(self.tokenizer.tokens(lines[first:last + 1], first + 1))
+            return
+
+        key = function_key(context, normalized)
+        summary = memo.get(key)
+        if summary is not None:
+            self._apply(summary, lines, kept)
+            return
+
+        depth = len(self.block_stack)
+        declared_from = len(self.declarations)
+        referenced_from = len(self.references)
+        self.low_water = depth
+        self.underflow = False
+        self.feed(self.tokenizer.tokens(lines[first:last + 1], first + 1))
+
+        # Cache only self-contained blocks: back at the starting depth without ever
+        # closing an outer block, and with no statement or comment left open
+        if (self.low_water < depth or self.underflow or len(self.block_stack) != depth
+                or self.statement or self.tokenizer.in_block_comment):
+            return
+        summary = self._summarize(lines, kept, declared_from, referenced_from)
+        memo.put(key, summary)
+        computed[key] = summary
+
+    def _summarize(self, lines: List[str], kept: List[int], declared_from: int, referenced_from: int) -> Summary:
+        index_of = {line_num: index for index, line_num in enumerate(kept)}
+        declarations = []
+        for symbol in self.declarations[declared_from:]:
+            line = symbol.declared_at.line
+            column = symbol.declared_at.column - _indent(lines[line - 1])
+            declarations.append((symbol.name, symbol.type, symbol.kind, index_of[line], column))
+        references = []
+        for name, location, is_read, is_write in self.references[referenced_from:]:
+            column = location.column - _indent(lines[location.line - 1])
+            references.append((name, index_of[location.line], column, is_read, is_write))
+        return declarations, references
+
+    def _apply(self, summary: Summary, lines: List[str], kept: List[int]):
+        declarations, references = summary
+        indents = {}
+
+        def location(index: int, column: int) -> Location:
+            if index not in indents:
+                indents[index] = _indent(lines[kept[index] - 1])
+            return Location(kept[index], indents[index] + column)
+
+        for name, type_, kind, index, column in declarations:
+            self.declarations.append(Symbol(name=name, type=type_, kind=kind, declared_at=location(index, column)))
+        append = self.references.append
+        for name, index, column, is_read, is_write in references:
+            append((name, location(index, column), is_read, is_write))
+
+    def finish(self):
+        table = self.table
+        table._collect(self.statement, self.block_stack, False, self.declarations, self.references)
+        for symbol in self.declarations:
+            table.symbols.setdefault(symbol.name, []).append(symbol)
+
+        # Resolve references only once every declaration is known. Symbols sharing
+        # a name share one list, so repeated declarations stay linear.
+        reads: Dict[str, List[Location]] = {}
+        writes: Dict[str, List[Location]] = {}
+        for name, location, is_read, is_write in self.references:
+            if is_read:
+                reads.setdefault(name, []).append(location)
+            if is_write:
+                writes.setdefault(name, []).append(location)
+
+        for name, symbols in table.symbols.items():
+            for symbol in symbols:
+                symbol.reads = reads.get(name, [])
+                symbol.writes = writes.get(name, [])
+        table.external_reads = {n: locs for n, locs in reads.items() if n not in table.symbols}
+        table.external_writes = {n: locs for n, locs in writes.items() if n not in table.symbols}
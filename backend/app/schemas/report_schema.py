@@ -0,0 +1,30 @@
+from datetime import date
+from typing import List, Optional
+from pydantic import BaseModel, Field, model_validator
+
+# Most report summaries served by one batch request
+MAX_BATCH_REPORTS = 100
+# Most PDFs in one bulk export
+MAX_EXPORT_REPORTS = 500
+
+
+# For batched report summary lookup
+class ReportBatchRequest(BaseModel):
+    report_ids: List[str] = Field(..., min_length=1, max_length=MAX_BATCH_REPORTS)
+
+
+# For bulk PDF export: either report_ids, or every report uploaded from date_from to date_to
+class ReportExportRequest(BaseModel):
+    report_ids: Optional[List[str]] = Field(None, min_length=1, max_length=MAX_EXPORT_REPORTS)
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+
+    @model_validator(mode="after")
+    def check_selection(self):
+        if self.report_ids is None and self.date_from is None and self.date_to is None:
+            raise ValueError("Give report_ids or a date range (date_from / date_to)")
+        if self.report_ids is not None and (self.date_from is not None or self.date_to is not None):
+            raise ValueError("Give either report_ids or a date range, not both")
+        if self.date_from and self.date_to and self.date_from > self.date_to:
+            raise ValueError("date_from is after date_to")
+        return self
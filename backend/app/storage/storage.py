@@ -0,0 +1,341 @@
+import os
+import json
+import shutil
+import hashlib
+import threading
+import tempfile
+import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Iterator, Optional, Tuple
+from dotenv import load_dotenv
+from fastapi.concurrency import run_in_threadpool
+
+try:
+    import boto3
+    from botocore.exceptions import ClientError
+except ImportError:  # optional, only needed for STORAGE_BACKEND=s3
+    boto3 = None
+
+# Load environment variables
+load_dotenv()
+
+# Get the absolute path to the backend directory
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+UPLOAD_DIR = os.path.join(BACKEND_DIR, "uploads")
+REPORTS_DIR = os.path.join(BACKEND_DIR, "reports")
+
+# "local" keeps uploads and reports on disk, "s3" in any S3-compatible object store
+# (AWS, or MinIO/LocalStack running locally via S3_ENDPOINT_URL)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local")
+S3_BUCKET = os.getenv("S3_BUCKET", "smartshield")
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL")
+# Streamed uploads stay in memory up to this size before spilling to a temp file
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+ETAG_CACHE_MAX_ENTRIES = 10_000
+
+# path -> (mtime_ns, size, etag), least recently used first
+_etag_cache: "OrderedDict[str, Tuple[int, int, str]]" = OrderedDict()
+_etag_lock = threading.Lock()
+
+
+def file_etag(path: str) -> str:
+    """
+    Strong ETag from the sha256 of a file's content.
+    Hashes are remembered per (mtime, size) so repeat requests don't re-read the file.
+    """
+    stat = os.stat(path)
+    with _etag_lock:
+        cached = _etag_cache.get(path)
+        if cached is not None:
+            _etag_cache.move_to_end(path)
+    if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return cached[2]
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    etag = f'"{digest.hexdigest()}"'
+
+    with _etag_lock:
+        _etag_cache[path] = (stat.st_mtime_ns, stat.st_size, etag)
+        _etag_cache.move_to_end(path)
+        while len(_etag_cache) > ETAG_CACHE_MAX_ENTRIES:
+            _etag_cache.popitem(last=False)
+    return etag
+
+
+@dataclass
+class StoredObject:
+    size: int
+    mtime: float
+
+
+class Storage:
+    """
+    Key/value file storage. Backends implement the blocking *_sync methods; the async
+    methods run them in the threadpool so request handlers never block the event loop.
+    """
+
+    # ---- implemented by backends ----
+
+    def read_bytes_sync(self, key: str) -> bytes:
+        raise NotImplementedError
+
+    def write_bytes_sync(self, key: str, data: bytes):
+        """Write atomically: readers see the old object or the new one, never a partial one"""
+        raise NotImplementedError
+
+    def write_file_sync(self, key: str, fileobj):
+        """Store the content of an open binary file object"""
+        raise NotImplementedError
+
+    def stat_sync(self, key: str) -> Optional[StoredObject]:
+        raise NotImplementedError
+
+    def etag_sync(self, key: str) -> str:
+        """Strong, quoted ETag of the stored content"""
+        raise NotImplementedError
+
+    def delete_sync(self, key: str):
+        raise NotImplementedError
+
+    def iter_keys_sync(self, suffix: str = "") -> Iterator[str]:
+        """Keys of stored objects ending in suffix, yielded as listed (never all held at once)"""
+        raise NotImplementedError
+
+    def local_path(self, key: str) -> Optional[str]:
+        """Path of the object on local disk, if the backend has one"""
+        return None
+
+    def download_sync(self, key: str, path: str):
+        with open(path, "wb") as f:
+            f.write(self.read_bytes_sync(key))
+
+    # ---- shared helpers ----
+
+    def exists_sync(self, key: str) -> bool:
+        return self.stat_sync(key) is not None
+
+    def read_json_sync(self, key: str) -> dict:
+        return json.loads(self.read_bytes_sync(key))
+
+    def write_json_sync(self, key: str, data: dict):
+        self.write_bytes_sync(key, json.dumps(data, indent=2).encode("utf-8"))
+
+    # ---- async API ----
+
+    async def read_bytes(self, key: str) -> bytes:
+        return await run_in_threadpool(self.read_bytes_sync, key)
+
+    async def write_bytes(self, key: str, data: bytes):
+        await run_in_threadpool(self.write_bytes_sync, key, data)
+
+    async def read_json(self, key: str) -> dict:
+        return await run_in_threadpool(self.read_json_sync, key)
+
+    async def write_json(self, key: str, data: dict):
+        await run_in_threadpool(self.write_json_sync, key, data)
+
+    async def exists(self, key: str) -> bool:
+        return await run_in_threadpool(self.exists_sync, key)
+
+    async def stat(self, key: str) -> Optional[StoredObject]:
+        return await run_in_threadpool(self.stat_sync, key)
+
+    async def etag(self, key: str) -> str:
+        return await run_in_threadpool(self.etag_sync, key)
+
+    async def delete(self, key: str):
+        await run_in_threadpool(self.delete_sync, key)
+
+    async def write_stream(self, key: str, chunks: AsyncIterator[bytes]) -> int:
+        """Store an async stream of chunks (e.g. an upload) without holding it in memory"""
+        spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+        size = 0
+        try:
+            async for chunk in chunks:
+                await run_in_threadpool(spool.write, chunk)
+                size += len(chunk)
+            spool.seek(0)
+            await run_in_threadpool(self.write_file_sync, key, spool)
+        finally:
+            spool.close()
+        return size
+
+    @asynccontextmanager
+    async def local_copy(self, key: str):
+        """Yield a local file path for the object (downloaded to a temp file if needed)"""
+        path = self.local_path(key)
+        if path is not None:
+            yield path
+            return
+
+        fd, temp_path = tempfile.mkstemp(suffix=os.path.splitext(key)[1])
+        os.close(fd)
+        try:
+            await run_in_threadpool(self.download_sync, key, temp_path)
+            yield temp_path
+        finally:
+            os.remove(temp_path)
+
+
+class LocalStorage(Storage):
+    """Files in a directory on local (or network mounted) disk"""
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        # Keys are flat file names; never let one escape the root
+        return os.path.join(self.root, os.path.basename(key))
+
+    def local_path(self, key: str) -> Optional[str]:
+        return self._path(key)
+
+    def _temp_path(self) -> str:
+        # Same directory as the target so the final rename never crosses filesystems
+        return os.path.join(self.root, f".tmp-{uuid.uuid4().hex}")
+
+    def read_bytes_sync(self, key: str) -> bytes:
+        with open(self._path(key), "rb") as f:
+            return f.read()
+
+    def _write_atomic(self, key: str, write):
+        temp_path = self._temp_path()
+        try:
+            with open(temp_path, "xb") as f:
+                write(f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self._path(key))
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def write_bytes_sync(self, key: str, data: bytes):
+        self._write_atomic(key, lambda f: f.write(data))
+
+    def write_file_sync(self, key: str, fileobj):
+        self._write_atomic(key, lambda f: shutil.copyfileobj(fileobj, f, 1024 * 1024))
+
+    async def write_stream(self, key: str, chunks: AsyncIterator[bytes]) -> int:
+        """Stream straight into the temp file that is renamed into place (no extra copy)"""
+        temp_path = self._temp_path()
+        size = 0
+        try:
+            with open(temp_path, "xb") as f:
+                async for chunk in chunks:
+                    await run_in_threadpool(f.write, chunk)
+                    size += len(chunk)
+                await run_in_threadpool(os.fsync, f.fileno())
+            await run_in_threadpool(os.replace, temp_path, self._path(key))
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return size
+
+    def stat_sync(self, key: str) -> Optional[StoredObject]:
+        try:
+            stat = os.stat(self._path(key))
+        except FileNotFoundError:
+            return None
+        return StoredObject(size=stat.st_size, mtime=stat.st_mtime)
+
+    def etag_sync(self, key: str) -> str:
+        return file_etag(self._path(key))
+
+    def delete_sync(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def iter_keys_sync(self, suffix: str = "") -> Iterator[str]:
+        with os.scandir(self.root) as entries:
+            for entry in entries:
+                # Skip in-flight atomic writes
+                if entry.name.startswith(".tmp-") or not entry.name.endswith(suffix):
+                    continue
+                if entry.is_file():
+                    yield entry.name
+
+
+class S3Storage(Storage):
+    """Objects under a prefix of an S3-compatible bucket (PUTs are atomic by nature)"""
+
+    def __init__(self, bucket: str, prefix: str, endpoint_url: Optional[str] = None):
+        if boto3 is None:
+            raise RuntimeError("STORAGE_BACKEND=s3 requires boto3 (pip install boto3)")
+        self.bucket = bucket
+        self.prefix = prefix.rstrip("/") + "/"
+        self.client = boto3.client("s3", endpoint_url=endpoint_url)
+
+    def _key(self, key: str) -> str:
+        return self.prefix + os.path.basename(key)
+
+    def _head(self, key: str) -> Optional[dict]:
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+
+    def read_bytes_sync(self, key: str) -> bytes:
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=self._key(key))
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey"):
+                raise FileNotFoundError(key)
+            raise
+        return response["Body"].read()
+
+    def write_bytes_sync(self, key: str, data: bytes):
+        self.client.put_object(Bucket=self.bucket, Key=self._key(key), Body=data)
+
+    def write_file_sync(self, key: str, fileobj):
+        self.client.upload_fileobj(fileobj, self.bucket, self._key(key))
+
+    def download_sync(self, key: str, path: str):
+        self.client.download_file(self.bucket, self._key(key), path)
+
+    def stat_sync(self, key: str) -> Optional[StoredObject]:
+        head = self._head(key)
+        if head is None:
+            return None
+        return StoredObject(size=head["ContentLength"], mtime=head["LastModified"].timestamp())
+
+    def etag_sync(self, key: str) -> str:
+        head = self._head(key)
+        if head is None:
+            raise FileNotFoundError(key)
+        return head["ETag"]
+
+    def delete_sync(self, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+    def iter_keys_sync(self, suffix: str = "") -> Iterator[str]:
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix):
+            for obj in page.get("Contents", []):
+                key = obj["Key"][len(self.prefix):]
+                if key.endswith(suffix):
+                    yield key
+
+
+def get_storage(namespace: str, local_root: str) -> Storage:
+    """Storage for one kind of file ("uploads", "reports"), backend chosen by STORAGE_BACKEND"""
+    if STORAGE_BACKEND == "s3":
+        return S3Storage(S3_BUCKET, namespace, endpoint_url=S3_ENDPOINT_URL)
+    return LocalStorage(local_root)
+
+
+# Uploaded sources and stored reports, shared by the API and the background jobs
+upload_storage = get_storage("uploads", UPLOAD_DIR)
+report_storage = get_storage("reports", REPORTS_DIR)
@@ -0,0 +1,66 @@
+import os
+import sys
+import json
+import logging
+from dotenv import load_dotenv
+
+from app.tracing.tracer import current_trace_ids
+
+# Load environment variables
+load_dotenv()
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# "json" for log shipping, "text" for reading in a terminal
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+
+ROOT_LOGGER = "smartshield"
+
+
+class StructuredFormatter(logging.Formatter):
+    """One JSON object per record, tagged with the trace/span of the request that logged it"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        trace_id, span_id = current_trace_ids()
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "trace_id": trace_id,
+            "span_id": span_id,
+        }
+        # Structured fields: logger.info("...", extra={"fields": {...}})
+        entry.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        trace_id, _ = current_trace_ids()
+        fields = " ".join(f"{k}={v}" for k, v in getattr(record, "fields", {}).items())
+        line = f"{self.formatTime(record)} {record.levelname} [{trace_id or '-'}] {record.name}: {record.getMessage()}"
+        if fields:
+            line += f" {fields}"
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+def _configure():
+    logger = logging.getLogger(ROOT_LOGGER)
+    if logger.handlers:
+        return
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(StructuredFormatter() if LOG_FORMAT == "json" else TextFormatter())
+    logger.addHandler(handler)
+    logger.setLevel(LOG_LEVEL)
+    # Keep our records out of uvicorn's root handlers (no duplicates)
+    logger.propagate = False
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger under the app's namespace, configured on first use"""
+    _configure()
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
@@ -0,0 +1,199 @@
+import os
+import re
+import sys
+import json
+import time
+import random
+import threading
+from contextvars import ContextVar
+from typing import Any, Dict, Optional, Tuple
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Fraction of requests whose spans are recorded (0 = tracing off, only trace IDs for logs)
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0"))
+# "console" writes spans to stdout, "file" appends them to TRACE_FILE (one JSON object per line)
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "file")
+TRACE_FILE = os.getenv("TRACE_FILE", os.path.join(BACKEND_DIR, "traces.jsonl"))
+# Let callers decide sampling through the traceparent flag; only for trusted upstreams
+# (a gateway), otherwise any client could force every one of its requests to be recorded
+TRACE_TRUST_PARENT = os.getenv("TRACE_TRUST_PARENT", "false").lower() in ("1", "true", "yes")
+
+# W3C trace context: version-traceid-parentid-flags
+TRACEPARENT_PATTERN = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$')
+
+
+def _new_trace_id() -> str:
+    return f"{random.getrandbits(128):032x}"
+
+
+def _new_span_id() -> str:
+    return f"{random.getrandbits(64):016x}"
+
+
+class TraceContext:
+    """Trace of the current request: its ID, whether it is sampled and the active span"""
+    __slots__ = ("trace_id", "sampled", "span")
+
+    def __init__(self, trace_id: str, sampled: bool, span: Optional["Span"] = None):
+        self.trace_id = trace_id
+        self.sampled = sampled
+        self.span = span
+
+
+_context: ContextVar[Optional[TraceContext]] = ContextVar("trace_context", default=None)
+
+
+class Span:
+    """One timed operation; exported when it ends"""
+    __slots__ = ("tracer", "name", "trace_id", "span_id", "parent_id", "attributes",
+                 "start_ns", "end_ns", "status", "error", "_token")
+
+    def __init__(self, tracer: "Tracer", name: str, context: TraceContext, attributes: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = context.trace_id
+        self.span_id = _new_span_id()
+        self.parent_id = context.span.span_id if context.span else None
+        self.attributes = attributes
+        self.start_ns = 0
+        self.end_ns = 0
+        self.status = "ok"
+        self.error = None
+        self._token = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def __enter__(self) -> "Span":
+        self._token = _context.set(TraceContext(self.trace_id, True, self))
+        self.start_ns = time.time_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end_ns = time.time_ns()
+        if exc is not None:
+            self.status = "error"
+            self.error = f"{exc_type.__name__}: {exc}"
+        _context.reset(self._token)
+        self.tracer.export(self)
+        return False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class NoopSpan:
+    """Returned when the trace is not sampled, so instrumented code costs next to nothing"""
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def __enter__(self) -> "NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NOOP_SPAN = NoopSpan()
+
+
+class ConsoleSpanExporter:
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self._lock = threading.Lock()
+
+    def export(self, span: Span):
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+
+class FileSpanExporter:
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+
+    def export(self, span: Span):
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, "a", buffering=1)
+            self._file.write(line + "\n")
+
+
+class Tracer:
+    """Per-request traces with parent/child spans, propagated through contextvars"""
+
+    def __init__(self, exporter=None, sample_rate: float = 0.0, trust_parent: bool = False):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.trust_parent = trust_parent
+
+    @classmethod
+    def from_env(cls) -> "Tracer":
+        if TRACE_EXPORTER == "console":
+            exporter = ConsoleSpanExporter()
+        elif TRACE_EXPORTER == "file":
+            exporter = FileSpanExporter(TRACE_FILE)
+        else:
+            exporter = None
+        return cls(exporter, TRACE_SAMPLE_RATE if exporter else 0.0, TRACE_TRUST_PARENT)
+
+    def start_trace(self, traceparent: Optional[str] = None) -> Tuple[TraceContext, Any]:
+        """
+        Begin the trace of a request, continuing the caller's trace ID if a valid
+        traceparent header was sent. Its sampled flag is only honoured with
+        trust_parent; otherwise the local sample rate decides.
+        Returns the context and a token for end_trace().
+        """
+        match = TRACEPARENT_PATTERN.match(traceparent or "")
+        if match and self.exporter is not None and self.trust_parent:
+            sampled = bool(int(match.group(3), 16) & 1)
+        else:
+            sampled = random.random() < self.sample_rate
+        context = TraceContext(match.group(1) if match else _new_trace_id(), sampled)
+        return context, _context.set(context)
+
+    def end_trace(self, token):
+        _context.reset(token)
+
+    def span(self, name: str, **attributes):
+        """Child span of the active span; a no-op when the trace is not sampled"""
+        context = _context.get()
+        if context is None or not context.sampled:
+            return NOOP_SPAN
+        return Span(self, name, context, attributes)
+
+    def export(self, span: Span):
+        if self.exporter is not None:
+            self.exporter.export(span)
+
+
+def current_trace_ids() -> Tuple[Optional[str], Optional[str]]:
+    """(trace_id, span_id) of the current context, for log records"""
+    context = _context.get()
+    if context is None:
+        return None, None
+    return context.trace_id, context.span.span_id if context.span else None
+
+
+tracer = Tracer.from_env()
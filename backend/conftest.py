@@ -0,0 +1,4 @@
+import os
+
+# app.database.connection builds its engine at import time; tests that touch it use SQLite
+os.environ.setdefault("DATABASE_URL", "sqlite://")
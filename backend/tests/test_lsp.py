@@ -0,0 +1,53 @@
+from app.scanner.lsp import Document
+
+
+def edit(start, end, text):
+    return {"range": {"start": {"line": start[0], "character": start[1]},
+                      "end": {"line": end[0], "character": end[1]}},
+            "text": text}
+
+
+def test_full_text_change_replaces_document():
+    document = Document("file:///tmp/a.sol", 1, "old\ntext")
+    document.apply_change({"text": "new"})
+    assert document.lines == ["new"]
+
+
+def test_edit_after_bmp_characters():
+    # "é" and "€" are one UTF-16 code unit each
+    document = Document("file:///tmp/a.sol", 1, 'string s = "é€";')
+    document.apply_change(edit((0, 14), (0, 14), "x"))
+    assert document.text == 'string s = "é€x";'
+
+
+def test_edit_after_astral_characters():
+    # "😀" is a surrogate pair: two UTF-16 code units, one Python character
+    document = Document("file:///tmp/a.sol", 1, '// 😀😀 note')
+    document.apply_change(edit((0, 8), (0, 12), "todo"))
+    assert document.text == '// 😀😀 todo'
+
+
+def test_edit_replacing_astral_character():
+    document = Document("file:///tmp/a.sol", 1, 'a😀b')
+    document.apply_change(edit((0, 1), (0, 3), "-"))
+    assert document.text == 'a-b'
+
+
+def test_multi_line_edit_across_multi_byte_lines():
+    document = Document("file:///tmp/a.sol", 1, '// ünï\n// 😀 one\n// two 😀')
+    document.apply_change(edit((0, 5), (2, 6), "X\nY"))
+    assert document.lines == ["// ünX", "Y 😀"]
+
+
+def test_edit_past_end_of_document_appends_lines():
+    document = Document("file:///tmp/a.sol", 1, "a")
+    document.apply_change(edit((2, 0), (2, 0), "c"))
+    assert document.lines == ["a", "", "c"]
+
+
+def test_line_range_counts_utf16_units():
+    document = Document("file:///tmp/a.sol", 1, '    emit Log("😀");')
+    assert document.line_range(1) == {
+        "start": {"line": 0, "character": 4},
+        "end": {"line": 0, "character": 19},
+    }
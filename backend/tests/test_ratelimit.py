@@ -0,0 +1,59 @@
+import pytest
+
+from app.ratelimit.limiter import MemoryBucketStore, Rate, RateLimiter, SQLiteBucketStore
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "sqlite":
+        return SQLiteBucketStore(str(tmp_path / "ratelimit.db"))
+    return MemoryBucketStore()
+
+
+def limiter(store, user="2/minute", ip="10/minute"):
+    return RateLimiter(store, {"analysis": {"user": Rate.parse(user), "ip": Rate.parse(ip)}})
+
+
+def test_rejection_by_user_bucket_does_not_charge_ip_bucket(store):
+    rate_limiter = limiter(store)
+    assert rate_limiter.check("analysis", "1.2.3.4", user="a").allowed
+    assert rate_limiter.check("analysis", "1.2.3.4", user="a").allowed
+    for _ in range(5):
+        rejected = rate_limiter.check("analysis", "1.2.3.4", user="a")
+        assert not rejected.allowed
+        assert rejected.limit == 2
+        assert rejected.retry_after > 0
+
+    # Only the two allowed requests came out of the shared IP bucket
+    other = rate_limiter.check("analysis", "1.2.3.4", user="b")
+    assert other.allowed
+    ip_decision = store.consume([("analysis:ip:1.2.3.4", Rate.parse("10/minute"))], cost=0)[0]
+    assert ip_decision.remaining == 7
+
+
+def test_rejection_by_ip_bucket_does_not_charge_user_bucket(store):
+    rate_limiter = limiter(store, user="3/minute", ip="1/minute")
+    assert rate_limiter.check("analysis", "1.2.3.4", user="a").allowed
+    for _ in range(3):
+        assert not rate_limiter.check("analysis", "1.2.3.4", user="a").allowed
+
+    # The user still has the two tokens the rejected requests didn't spend
+    user_decision = store.consume([("analysis:user:a", Rate.parse("3/minute"))], cost=0)[0]
+    assert user_decision.remaining == 2
+
+
+def test_cost_larger_than_any_bucket_is_rejected_without_charge(store):
+    rate_limiter = limiter(store)
+    assert not rate_limiter.check("analysis", "1.2.3.4", user="a", cost=3).allowed
+    assert rate_limiter.check("analysis", "1.2.3.4", user="a", cost=2).allowed
+
+
+def test_only_short_buckets_report_rejection(store):
+    decisions = store.consume([("user", Rate.parse("1/minute")), ("ip", Rate.parse("5/minute"))], cost=2)
+    assert [decision.allowed for decision in decisions] == [False, True]
+    assert decisions[1].remaining == 5
+
+
+def test_disabled_scope_returns_no_decision(store):
+    rate_limiter = limiter(store, user="off", ip="off")
+    assert rate_limiter.check("analysis", "1.2.3.4", user="a") is None
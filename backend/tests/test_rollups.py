@@ -0,0 +1,110 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.database.connection import Base
+from app.database.models import DailyRollup, ScanReport, UserRollup
+from app.scanner.rollups import (
+    ROLLUP_COUNTS, UNKNOWN_DAY, apply_rollup_change, contribution, rebuild_rollups,
+)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(
+        bind=engine, tables=[ScanReport.__table__, DailyRollup.__table__, UserRollup.__table__]
+    )
+    with Session(engine) as session:
+        yield session
+
+
+def report(report_id, user="a@example.com", uploaded_at="20260301_120000", score=80, **counts):
+    row = ScanReport(
+        report_id=report_id, uploaded_by=user, filename=f"{report_id}.sol", uploaded_at=uploaded_at,
+        security_score=score, can_deploy=score >= 70, total=sum(counts.values()),
+    )
+    for severity in ["critical", "high", "medium", "low", "info"]:
+        setattr(row, severity, counts.get(severity, 0))
+    return row
+
+
+def rollups(db):
+    """Non-zero counters of every rollup row"""
+    def counts(row):
+        return {name: getattr(row, name) for name in ROLLUP_COUNTS if getattr(row, name)}
+
+    daily = {(row.uploaded_by, row.day): counts(row) for row in db.query(DailyRollup)}
+    users = {row.uploaded_by: counts(row) for row in db.query(UserRollup)}
+    return {key: value for key, value in daily.items() if value}, {key: value for key, value in users.items() if value}
+
+
+def test_insert_then_delete_leaves_nothing(db):
+    row = report("r1", high=2, low=1)
+    apply_rollup_change(db, None, contribution(row))
+    daily, users = rollups(db)
+    assert daily == {("a@example.com", "2026-03-01"): {
+        "scans": 1, "score_sum": 80, "deployable": 1, "high": 2, "low": 1, "findings": 3,
+    }}
+    assert users == {"a@example.com": daily[("a@example.com", "2026-03-01")]}
+
+    apply_rollup_change(db, contribution(row), None)
+    assert rollups(db) == ({}, {})
+
+
+def test_update_moves_counts_between_days(db):
+    before = report("r1", uploaded_at="20260301_120000", score=50, critical=1)
+    after = report("r1", uploaded_at="20260302_120000", score=90, info=2)
+    apply_rollup_change(db, None, contribution(before))
+    apply_rollup_change(db, contribution(before), contribution(after))
+    daily, users = rollups(db)
+    assert daily == {("a@example.com", "2026-03-02"): {
+        "scans": 1, "score_sum": 90, "deployable": 1, "info": 2, "findings": 2,
+    }}
+    assert users == {"a@example.com": daily[("a@example.com", "2026-03-02")]}
+
+
+def test_unchanged_update_writes_nothing(db):
+    row = report("r1", medium=1)
+    apply_rollup_change(db, contribution(row), contribution(row))
+    assert db.query(DailyRollup).count() == 0
+    assert db.query(UserRollup).count() == 0
+
+
+def test_report_without_timestamp_is_taken_back_from_the_same_day(db):
+    row = report("r1", uploaded_at="bogus", high=1)
+    assert contribution(row)[1] == UNKNOWN_DAY
+    apply_rollup_change(db, None, contribution(row))
+    assert list(rollups(db)[0]) == [("a@example.com", UNKNOWN_DAY)]
+    apply_rollup_change(db, contribution(row), None)
+    assert rollups(db) == ({}, {})
+
+
+def test_reports_without_a_score_contribute_nothing():
+    row = report("r1")
+    row.security_score = None
+    assert contribution(row) is None
+
+
+def test_incremental_changes_match_a_rebuild(db):
+    reports = {
+        "r1": report("r1", high=1),
+        "r2": report("r2", user="b@example.com", score=40, critical=2),
+        "r3": report("r3", uploaded_at="20260305_080000", low=3),
+    }
+    for row in reports.values():
+        db.add(row)
+        apply_rollup_change(db, None, contribution(row))
+
+    # Re-analysis rescored r1, and r2 was deleted
+    r1 = reports["r1"]
+    before = contribution(r1)
+    r1.security_score, r1.high, r1.medium, r1.total = 60, 0, 4, 4
+    apply_rollup_change(db, before, contribution(r1))
+    apply_rollup_change(db, contribution(reports["r2"]), None)
+    db.delete(reports["r2"])
+    db.commit()
+    incremental = rollups(db)
+
+    rebuild_rollups(db)
+    assert rollups(db) == incremental
@@ -0,0 +1,133 @@
+import asyncio
+
+import pytest
+
+from app.scanner.scheduler import BULK, FAST, ScanScheduler
+
+
+def run(coroutine):
+    # A slot that is never released leaves waiters hanging: fail instead
+    return asyncio.run(asyncio.wait_for(coroutine, timeout=5))
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_waiters_are_served_round_robin_between_users():
+    async def scenario():
+        scheduler = ScanScheduler(workers=2)
+        order = []
+        release = asyncio.Event()
+
+        async def scan(user, name):
+            async with scheduler.slot(user, BULK):
+                order.append(name)
+                await settle()
+
+        async def holder():
+            async with scheduler.slot("a", BULK):
+                await release.wait()
+
+        tasks = [asyncio.create_task(holder())]
+        await settle()
+        # One user queues three scans before another queues one
+        for user, name in [("a", "a1"), ("a", "a2"), ("a", "a3"), ("b", "b1")]:
+            tasks.append(asyncio.create_task(scan(user, name)))
+            await settle()
+        assert scheduler.stats()[BULK]["waiting"] == 4
+        release.set()
+        await asyncio.gather(*tasks)
+        return order, scheduler.stats()
+
+    order, stats = run(scenario())
+    assert order == ["a1", "b1", "a2", "a3"]
+    assert stats[BULK]["busy"] == 0
+
+
+def test_slot_is_released_when_the_scan_fails():
+    async def scenario():
+        scheduler = ScanScheduler(workers=2)
+        with pytest.raises(RuntimeError):
+            async with scheduler.slot("a", FAST):
+                assert scheduler.stats()[FAST]["busy"] == 1
+                raise RuntimeError("analysis failed")
+        return scheduler.stats()
+
+    stats = run(scenario())
+    assert stats[FAST]["busy"] == 0
+    assert stats[BULK]["busy"] == 0
+
+
+def test_fast_scan_borrows_an_idle_bulk_slot():
+    async def scenario():
+        scheduler = ScanScheduler(workers=2)
+        async with scheduler.slot("a", FAST):
+            async with scheduler.slot("b", FAST) as ticket:
+                busy = {name: lane["busy"] for name, lane in scheduler.stats().items()}
+                assert ticket.lane == FAST
+        return busy, scheduler.stats()
+
+    busy, stats = run(scenario())
+    assert busy == {FAST: 1, BULK: 1}
+    assert stats[FAST]["busy"] == 0
+    assert stats[BULK]["busy"] == 0
+
+
+def test_cancelled_waiter_leaves_the_queue_and_does_not_hold_a_slot():
+    async def scenario():
+        scheduler = ScanScheduler(workers=2)
+        release = asyncio.Event()
+        served = []
+
+        async def holder():
+            async with scheduler.slot("a", BULK):
+                await release.wait()
+
+        async def scan(user):
+            async with scheduler.slot(user, BULK):
+                served.append(user)
+
+        first = asyncio.create_task(holder())
+        await settle()
+        gone = asyncio.create_task(scan("b"))
+        waiting = asyncio.create_task(scan("c"))
+        await settle()
+        gone.cancel()
+        await settle()
+        queued = scheduler.stats()[BULK]
+        release.set()
+        await asyncio.gather(first, waiting)
+        return queued, served, scheduler.stats()
+
+    queued, served, stats = run(scenario())
+    assert queued["waiting"] == 1
+    assert queued["waiting_users"] == 1
+    assert served == ["c"]
+    assert stats[BULK] == {"slots": 1, "busy": 0, "waiting": 0, "waiting_users": 0}
+
+
+def test_cancel_right_after_grant_passes_the_slot_on():
+    async def scenario():
+        scheduler = ScanScheduler(workers=2)
+        served = []
+
+        async def scan(user):
+            async with scheduler.slot(user, BULK):
+                served.append(user)
+
+        holder = scheduler.slot("a", BULK)
+        await holder.__aenter__()
+        granted = asyncio.create_task(scan("b"))
+        waiting = asyncio.create_task(scan("c"))
+        await settle()
+        # The slot goes to "b", which is cancelled before it gets to run
+        await holder.__aexit__(None, None, None)
+        granted.cancel()
+        await asyncio.gather(granted, waiting, return_exceptions=True)
+        return served, scheduler.stats()
+
+    served, stats = run(scenario())
+    assert served == ["c"]
+    assert stats[BULK]["busy"] == 0
@@ -37,6 +37,14 @@ export const authApiSlice = baseApi.injectEndpoints({
             query: (reportId) => `/scan/report/${reportId}`,
         }),
 
+        getReportSummaries: builder.query({
+            query: (reportIds) => ({
+                url: "/scan/reports/batch",
+                method: "POST",
+                body: { report_ids: reportIds },
+            }),
+        }),
+
         downloadReport: builder.query({
             query: (reportId) => ({
                 url: `/scan/report/${reportId}/download`,
@@ -51,5 +59,6 @@ export const {
     useSignupUserMutation,
     useUploadContractMutation,
     useGetReportQuery,
+    useGetReportSummariesQuery,
     useLazyDownloadReportQuery,
 } = authApiSlice;
\ No newline at end of file